@@ -0,0 +1,300 @@
+"""
+파서 / 엑셀 저장 경로 마이크로벤치마크
+
+품목마다 한 번씩 실행되는 함수의 비용을 측정하고 결과를 JSON 기록 파일에 누적한다.
+직전 기록보다 중앙값이 threshold 이상 느려지거나, 행 수를 10배 늘렸을 때
+시간이 max-scaling 배 이상 늘어나면(O(n) → O(n²) 변화) 회귀로 보고 종료 코드 1을 반환한다.
+
+측정 대상:
+    parse_*   : 코드 펜스 제거 + json.loads (응답 크기별)
+    find_*    : save_excel_gemini.find_item_row (행 수별)
+    save_*    : save_to_excel_gemini / save_to_excel_v2 / 트렌드 save_to_excel 행 저장 왕복 (행 수별)
+
+사용 예:
+    python benchmarks/bench_micro.py
+    python benchmarks/bench_micro.py --sizes 1000 10000 100000 --filter save_
+    python benchmarks/bench_micro.py --threshold 0.2 --no-save
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 저장소 최상위 경로
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import make_workbook, item_code  # noqa: E402
+from fake_server import market_response, trend_response, keyword_response  # noqa: E402
+
+# 기본 기록 파일
+HISTORY_FILE = os.path.join(BENCH_DIR, 'micro_history.json')
+
+
+def load_module(name, relative_path):
+    """
+    같은 이름의 모듈(gemini_api, save_to_excel)이 디렉토리마다 있으므로
+    파일 경로로 각각 다른 이름을 붙여 불러옴
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(func, min_time=1.0, max_rounds=50):
+    """
+    func 실행 시간 측정 (pytest-benchmark와 같은 방식)
+
+    한 라운드가 10ms 이상이 되도록 반복 횟수를 정한 뒤 min_time 동안 라운드를 반복한다.
+    한 라운드가 min_time보다 오래 걸리면 한 번만 측정한다.
+
+    Returns:
+        dict: 호출 1회당 min / median / mean / stddev(초), rounds, iterations
+    """
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= 0.01 or iterations >= 100_000:
+            break
+        iterations *= 10
+
+    samples = [elapsed / iterations]
+    deadline = time.perf_counter() + min_time
+    while elapsed < min_time and len(samples) < max_rounds and time.perf_counter() < deadline:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter() - started) / iterations)
+
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.mean(samples),
+        'stddev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'rounds': len(samples),
+        'iterations': iterations,
+    }
+
+
+def fenced(payload):
+    """모델 응답처럼 설명 문장과 ```json 코드 펜스로 감싼 문자열"""
+    return "다음은 조사 결과입니다.\n```json\n" + json.dumps(payload, ensure_ascii=False, indent=2) + "\n```\n참고하세요."
+
+
+def padded(payload, size):
+    """설명 필드를 늘려 응답 텍스트를 size 바이트 정도로 만듦"""
+    payload = json.loads(json.dumps(payload))
+    text = json.dumps(payload, ensure_ascii=False)
+    filler = "가" * max(0, (size - len(text.encode('utf-8'))) // 3)
+    for value in payload.values():
+        if isinstance(value, dict):
+            key = next((k for k in value if k.endswith('description')), None)
+            if key:
+                value[key] += filler
+                break
+    return payload
+
+
+def parse_cases():
+    """응답 크기별 파싱 벤치마크 (market / trend / keyword / packed)"""
+    market = load_module('market_gemini_api', 'gemini_api.py')
+    trend = load_module('trend_gemini_api', 'search_trend_company/gemini_api.py')
+    keyword = load_module('keyword_gemini_api', 'search_item_keyword/gemini_api.py')
+
+    cases = {}
+    for label, size in (('1k', 1_000), ('32k', 32_000), ('256k', 256_000)):
+        trend_text = fenced(padded(trend_response(), size))
+        keyword_text = fenced(padded(keyword_response(), size))
+        cases[f'parse_trend_{label}'] = lambda text=trend_text: trend.parse_trend_companies_with_gemini(text)
+        cases[f'parse_keyword_{label}'] = lambda text=keyword_text: keyword.parse_item_keyword_with_gemini(text)
+
+    for count in (1, 8, 64):
+        market_text = fenced(market_response() * count)
+        packed_text = fenced([dict(item_code=item_code(i), **trend_response()) for i in range(count)])
+        cases[f'parse_market_x{count}'] = lambda text=market_text: market.parse_industry_data_with_gemini(text)
+        cases[f'parse_trend_packed_x{count}'] = (
+            lambda text=packed_text: trend.parse_trend_companies_packed_with_gemini(text)
+        )
+    return cases
+
+
+def excel_cases(workdir, sizes):
+    """행 수별 find_item_row / 행 저장 왕복 벤치마크"""
+    import pandas as pd
+
+    save_gemini = load_module('save_excel_gemini', 'save_excel_gemini.py')
+    save_v2 = load_module('save_excel2', 'save_excel2.py')
+    trend_save = load_module('trend_save_to_excel', 'search_trend_company/save_to_excel.py')
+
+    # 저장 함수별 입력 데이터 (save_to_excel_v2는 한글 키 양식)
+    market_data = market_response()[0]
+    v2_data = save_v2.create_sample_data()
+    trend_data = trend_response()
+
+    cases = {}
+    for rows in sizes:
+        label = f'{rows // 1000}k' if rows >= 1000 else str(rows)
+        # 표 가운데 품목을 조회 (앞쪽에서 바로 찾는 경우를 피함)
+        item_name = f"합성 품목 {rows // 2}"
+
+        market_book = os.path.join(workdir, f'market_{rows}.xlsx')
+        v2_book = os.path.join(workdir, f'market_v2_{rows}.xlsx')
+        trend_book = os.path.join(workdir, f'trend_{rows}.xlsx')
+        make_workbook(market_book, 'market', rows, '')
+        make_workbook(v2_book, 'market', rows, '', name_header=None)
+        make_workbook(trend_book, 'trend', rows, '')
+
+        def save_trend_row(path=trend_book):
+            # ExcelRowSink(flush_every=1)과 같은 순서: 읽기 → 행 갱신 → 전체 저장
+            df = pd.read_excel(path, dtype=object)
+            index = len(df) // 2
+            df.loc[index] = trend_save.save_to_excel(df.loc[index].copy(), trend_data)
+            df.to_excel(path, index=False)
+
+        cases[f'find_item_row_{label}'] = lambda path=market_book, name=item_name: save_gemini.find_item_row(path, name)
+        cases[f'save_gemini_{label}'] = (
+            lambda path=market_book, name=item_name: save_gemini.save_to_excel_gemini(path, name, market_data)
+        )
+        cases[f'save_v2_{label}'] = lambda path=v2_book, name=item_name: save_v2.save_to_excel_v2(path, name, v2_data)
+        cases[f'save_trend_row_{label}'] = save_trend_row
+    return cases
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def previous_medians(history):
+    """벤치마크별 가장 최근 기록의 중앙값"""
+    medians = {}
+    for entry in history:
+        for name, result in entry['results'].items():
+            medians[name] = result['median']
+    return medians
+
+
+def find_regressions(results, history, threshold, max_scaling):
+    """
+    회귀 항목 목록 반환
+
+    Args:
+        results (dict): 이번 측정 결과
+        history (list): 이전 기록
+        threshold (float): 직전 기록 대비 허용 증가율 (0.25 = 25%)
+        max_scaling (float): 행 수가 10배일 때 허용하는 시간 배수
+    """
+    regressions = []
+    baseline = previous_medians(history)
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and result['median'] > previous * (1 + threshold):
+            regressions.append(f"{name}: {previous * 1000:.3f}ms → {result['median'] * 1000:.3f}ms "
+                               f"(+{(result['median'] / previous - 1) * 100:.0f}%)")
+
+    # 같은 벤치마크의 행 수별 결과 비교 (1k → 10k → 100k)
+    for name, result in results.items():
+        prefix, _, label = name.rpartition('_')
+        if not label.endswith('k'):
+            continue
+        larger = results.get(f"{prefix}_{int(label[:-1]) * 10}k")
+        if larger and larger['median'] > result['median'] * max_scaling:
+            regressions.append(f"{prefix}: 행 수 10배에 {larger['median'] / result['median']:.1f}배 증가 "
+                               f"({label} → {int(label[:-1]) * 10}k, 허용 {max_scaling:.0f}배)")
+    return regressions
+
+
+def print_results(results, history):
+    baseline = previous_medians(history)
+    print(f"{'benchmark':<26} {'median(ms)':>11} {'min(ms)':>10} {'stddev':>8} {'rounds':>7} {'vs prev':>8}")
+    print('-' * 74)
+    for name, r in results.items():
+        previous = baseline.get(name)
+        change = f"{(r['median'] / previous - 1) * 100:+.0f}%" if previous else '-'
+        print(f"{name:<26} {r['median'] * 1000:>11.3f} {r['min'] * 1000:>10.3f} "
+              f"{r['stddev'] * 1000:>8.3f} {r['rounds']:>7} {change:>8}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='파서 / 엑셀 저장 경로 마이크로벤치마크')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000], help='워크북 행 수')
+    parser.add_argument('--filter', help='이름에 이 문자열이 포함된 벤치마크만 실행')
+    parser.add_argument('--min-time', type=float, default=1.0, help='벤치마크별 최소 측정 시간(초)')
+    parser.add_argument('--history', default=HISTORY_FILE, help='결과 기록 JSON 파일')
+    parser.add_argument('--threshold', type=float, default=0.25, help='직전 기록 대비 허용 증가율 (0.25 = 25%%)')
+    parser.add_argument('--max-scaling', type=float, default=20, help='행 수 10배일 때 허용하는 시간 배수')
+    parser.add_argument('--no-save', action='store_true', help='기록 파일에 결과를 추가하지 않음')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    history_path = os.path.abspath(args.history)
+
+    # 측정 중 로그 출력/파일 기록 비용이 섞이지 않도록 함 (logs 폴더도 임시 디렉토리에 생성)
+    logging.disable(logging.CRITICAL)
+    workdir = tempfile.mkdtemp(prefix='bench-micro-')
+    os.chdir(workdir)
+    try:
+        cases = parse_cases()
+        if not args.filter or not args.filter.startswith('parse'):
+            cases.update(excel_cases(workdir, sorted(args.sizes)))
+        if args.filter:
+            cases = {name: func for name, func in cases.items() if args.filter in name}
+
+        results = {}
+        for name, func in cases.items():
+            print(f"[bench] {name}", file=sys.stderr)
+            results[name] = measure(func, min_time=args.min_time)
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    history = load_history(history_path)
+    print_results(results, history)
+    regressions = find_regressions(results, history, args.threshold, args.max_scaling)
+
+    if not args.no_save:
+        history.append({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_revision(),
+            'python': platform.python_version(),
+            'results': results,
+        })
+        with open(history_path, 'w', encoding='utf-8') as f:
+            json.dump(history, f, ensure_ascii=False, indent=2)
+
+    if regressions:
+        print("\n성능 회귀 감지:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+오프라인 파이프라인 벤치마크
+
+로컬 가짜 API 서버(fake_server.py)를 띄우고 합성 워크북(1천~10만 행)을 만든 뒤
+idnolab 파이프라인을 그대로 실행해 처리량과 자원 사용량을 측정한다.
+실제 Gemini / Perplexity API는 호출하지 않는다.
+
+측정 항목:
+    items/sec, 항목당 종단 지연(p50 / p99), CPU 시간(user + sys), 최대 메모리(RSS)
+
+사용 예:
+    python benchmarks/bench_pipeline.py --pipelines trend keyword --rows 1000 10000 --workers 8
+    python benchmarks/bench_pipeline.py --pipelines trend --rows 1000 --pack 4 --rate-429 0.02 --json result.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# 저장소 최상위 경로
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from idnolab.cli import PIPELINES  # noqa: E402
+
+# 파이프라인별 합성 워크북 열 구성 (code, code_name, 개념설명 뒤에 붙는 열)
+MARKET_COLUMNS = [
+    f'{label} ({year})' if label != '출처' else f'출처 ({region} {year})'
+    for region in ('국내', '해외')
+    for year in (2022, 2023, 2024)
+    for label in (f'{region} 산업규모', f'{region} 추정여부', f'{region} 추정근거', '출처')
+]
+TREND_COLUMNS = [
+    '회사명', '회사소개', '회사 홈페이지', '주력제품명', '주력제품 특징', '자료 출처',
+    '글로벌_회사명', '글로벌_회사소개', '글로벌_회사_홈페이지', '글로벌_주력제품명', '글로벌_주력제품_특징', '글로벌_자료출처',
+]
+KEYWORD_COLUMNS = [f'{field}_{i}' for i in range(1, 4) for field in ('item_keyword', 'item_description', 'item_url')]
+
+WORKBOOK_COLUMNS = {
+    'market': MARKET_COLUMNS,
+    'trend': TREND_COLUMNS,
+    'keyword': KEYWORD_COLUMNS,
+    'validate': KEYWORD_COLUMNS,
+    'urlcheck': MARKET_COLUMNS,
+}
+
+
+def item_code(i):
+    """i번째 합성 품목 코드 (7자리, 같은 상위 분류에 8개씩)"""
+    return f"{chr(65 + i // 80_000)}{i // 800 % 100:02d}{i // 8 % 100:02d}{i % 8 + 1:02d}"
+
+
+def synthetic_value(pipeline, column, i, base_url):
+    """검증 / URL 검사 파이프라인은 이미 채워진 결과 열이 필요하므로 값을 만들어 넣음"""
+    if pipeline == 'validate':
+        if column.startswith('item_url'):
+            return f"{base_url}/page/{i}-{column[-1]}"
+        return f"{column} {i}"
+    if pipeline == 'urlcheck':
+        if column.startswith('출처'):
+            return f"{base_url}/page/{i}-{len(column)}"
+        return str(i)
+    return None
+
+
+def make_workbook(path, pipeline, rows, base_url, name_header='code_name'):
+    """
+    합성 워크북 생성 (openpyxl 쓰기 전용 모드)
+
+    실제 작업 파일과 같이 첫 데이터 행은 'code / code_name' 의사 헤더로 둔다.
+    name_header를 None으로 주면 B열 머리글이 비어 'Unnamed: 1'로 읽힌다 (save_excel2 양식).
+    """
+    from openpyxl import Workbook
+
+    columns = WORKBOOK_COLUMNS[pipeline]
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append([None, name_header, '개념설명'] + columns)
+    sheet.append(['code', 'code_name', 'item_contents'] + [None] * len(columns))
+    for i in range(rows):
+        sheet.append(
+            [item_code(i), f"합성 품목 {i}", f"합성 품목 {i}에 대한 개념 설명"]
+            + [synthetic_value(pipeline, column, i, base_url) for column in columns]
+        )
+    workbook.save(path)
+
+
+def start_fake_server(args):
+    """가짜 API 서버를 하위 프로세스로 실행하고 (프로세스, 주소) 반환"""
+    command = [
+        sys.executable, os.path.join(REPO_ROOT, 'benchmarks', 'fake_server.py'),
+        '--latency', args.latency,
+        '--error-rate', str(args.error_rate),
+        '--rate-429', str(args.rate_429),
+    ]
+    if args.seed is not None:
+        command += ['--seed', str(args.seed)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    base_url = process.stdout.readline().strip()
+    if not base_url:
+        process.kill()
+        raise RuntimeError("가짜 API 서버 시작 실패")
+    return process, base_url
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 분위수 (nearest-rank)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(q / 100 * len(values))) - 1))
+    return values[index]
+
+
+def run_child(options):
+    """
+    (하위 프로세스) 파이프라인 한 번 실행 후 측정 결과를 JSON으로 출력
+
+    파이프라인마다 같은 이름의 gemini_api 모듈을 쓰므로 프로세스를 분리해 실행한다.
+    """
+    import importlib
+
+    info = PIPELINES[options.pipeline]
+    sys.path.insert(0, os.path.join(REPO_ROOT, info['directory']))
+    os.chdir(options.workdir)
+
+    module = importlib.import_module(info['module'])
+    pipeline = module.build(options)
+
+    started = time.monotonic()
+    stats = pipeline.run()
+    elapsed = time.monotonic() - started
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    latencies = sorted(pipeline.latencies)
+    completed = len(latencies)
+    # 묶음 모드에서는 작업 하나가 여러 품목을 처리하므로 품목 수는 체크포인트 기준
+    items = len(pipeline.checkpoint.done) or completed
+    print(json.dumps({
+        'pipeline': options.pipeline,
+        'rows': options.bench_rows,
+        'items': items,
+        'elapsed': elapsed,
+        'items_per_sec': items / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'cpu': usage.ru_utime + usage.ru_stime,
+        # 리눅스 ru_maxrss 단위는 KB (macOS는 바이트)
+        'peak_rss_mb': usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024),
+        'failed': sum(stage['failed'] for name, stage in stats.items() if name != 'skipped'),
+    }))
+
+
+def run_case(args, pipeline, rows, base_url):
+    """합성 워크북을 만들고 하위 프로세스에서 파이프라인 실행"""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{pipeline}-") as workdir:
+        workbook = os.path.join(workdir, f"{pipeline}_{rows}.xlsx")
+        make_workbook(workbook, pipeline, rows, base_url)
+
+        env = dict(
+            os.environ,
+            GOOGLE_API_KEY='fake-key',
+            PERPLEXITY_API_KEY='fake-key',
+            GOOGLE_GEMINI_BASE_URL=base_url,
+            PERPLEXITY_BASE_URL=base_url,
+            PYTHONPATH=REPO_ROOT,
+        )
+        env.pop('GEMINI_API_KEY', None)
+        command = [
+            sys.executable, os.path.abspath(__file__), '--child',
+            '--pipelines', pipeline,
+            '--rows', str(rows),
+            '--workdir', workdir,
+            '--workbook', workbook,
+            '--workers', str(args.workers),
+            '--pack', str(args.pack),
+            '--flush-every', str(args.flush_every),
+            '--max-retries', str(args.max_retries),
+            '--retry-budget', str(args.retry_budget),
+            '--checkpoint', os.path.join(workdir, 'checkpoint.jsonl'),
+            '--output', os.path.join(workdir, 'output.xlsx'),
+        ]
+        if args.patch:
+            command.append('--patch')
+        result = subprocess.run(command, env=env, capture_output=True, text=True)
+        lines = result.stdout.strip().splitlines()
+        if result.returncode != 0 or not lines:
+            raise RuntimeError(f"{pipeline} {rows}행 벤치마크 실패:\n{result.stderr[-2000:]}")
+        return json.loads(lines[-1])
+
+
+def print_table(results):
+    header = f"{'pipeline':<9} {'rows':>7} {'items':>7} {'items/s':>9} {'p50(s)':>8} {'p99(s)':>8} {'cpu(s)':>8} {'rss(MB)':>8} {'failed':>6}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['pipeline']:<9} {r['rows']:>7} {r['items']:>7} {r['items_per_sec']:>9.1f} {r['p50']:>8.3f} "
+              f"{r['p99']:>8.3f} {r['cpu']:>8.1f} {r['peak_rss_mb']:>8.1f} {r['failed']:>6}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='가짜 API 서버를 이용한 오프라인 파이프라인 벤치마크')
+    parser.add_argument('--pipelines', nargs='+', default=['trend'], choices=list(PIPELINES))
+    parser.add_argument('--rows', nargs='+', type=int, default=[1000], help='합성 워크북 행 수 (여러 개 지정 가능)')
+    parser.add_argument('--workers', type=int, default=8, help='API 호출 단계 작업자 수')
+    parser.add_argument('--pack', type=int, default=1, help='묶음 요청 최대 품목 수 (trend, keyword)')
+    parser.add_argument('--flush-every', type=int, default=100, help='몇 행마다 엑셀 파일을 저장할지')
+    parser.add_argument('--patch', action='store_true', help='셀 단위 패치 저장(ExcelPatchWriter) 사용')
+    parser.add_argument('--latency', default='lognormal:0.2,0.4', help='가짜 서버 응답 지연 분포')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='가짜 서버 500 오류 비율')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='가짜 서버 429 비율')
+    parser.add_argument('--seed', type=int, help='가짜 서버 난수 시드')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일')
+    # 하위 프로세스 전용 옵션
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--workbook', help=argparse.SUPPRESS)
+    parser.add_argument('--checkpoint', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    parser.add_argument('--codes', help=argparse.SUPPRESS)
+    parser.add_argument('--gaps', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--plan', help=argparse.SUPPRESS)
+    parser.add_argument('--extend', help=argparse.SUPPRESS)
+    parser.add_argument('--hierarchical', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--dedup', type=float, help=argparse.SUPPRESS)
+    parser.add_argument('--dedup-exclude', help=argparse.SUPPRESS)
+    parser.add_argument('--cache', help=argparse.SUPPRESS)
+    parser.add_argument('--rpm', type=float, help=argparse.SUPPRESS)
+    parser.add_argument('--tpm', type=float, help=argparse.SUPPRESS)
+    parser.add_argument('--max-rpm', type=float, help=argparse.SUPPRESS)
+    parser.add_argument('--order', default='sheet', help=argparse.SUPPRESS)
+    parser.add_argument('--weights', help=argparse.SUPPRESS)
+    parser.add_argument('--flagged', help=argparse.SUPPRESS)
+    parser.add_argument('--failures', help=argparse.SUPPRESS)
+    parser.add_argument('--deadline', help=argparse.SUPPRESS)
+    parser.add_argument('--budget', type=float, help=argparse.SUPPRESS)
+    parser.add_argument('--queue', help=argparse.SUPPRESS)
+    parser.add_argument('--merge', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--lease', type=float, default=600, help=argparse.SUPPRESS)
+    parser.add_argument('--max-retries', type=int, default=3, help='API 요청 한 건의 최대 시도 횟수')
+    parser.add_argument('--retry-budget', type=float, default=0.2, help='실행 전체 재시도 예산 (요청 수 대비 비율)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.child:
+        args.pipeline = args.pipelines[0]
+        args.bench_rows = args.rows[0]
+        args.rows = None
+        args.interval = 0
+        run_child(args)
+        return 0
+
+    server, base_url = start_fake_server(args)
+    results = []
+    try:
+        for pipeline in args.pipelines:
+            for rows in args.rows:
+                print(f"[bench] {pipeline} {rows}행 실행 중...", file=sys.stderr)
+                results.append(run_case(args, pipeline, rows, base_url))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'settings': {key: getattr(args, key) for key in
+                             ('workers', 'pack', 'flush_every', 'latency', 'error_rate', 'rate_429')},
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+로컬 가짜 Gemini / Perplexity API 서버 (오프라인 벤치마크용)
+
+- Gemini: POST /v1beta/models/{model}:generateContent
+- Perplexity: POST /chat/completions
+- 출처 페이지: GET/HEAD /page/... (항상 200)
+- 요청 통계: GET /stats
+
+프롬프트 내용을 보고 시장 규모 / 트렌드 기업 / 키워드 / 검증 응답을 만들어 돌려주며,
+응답 지연 분포와 오류·429 비율을 설정할 수 있다.
+
+사용 예:
+    python benchmarks/fake_server.py --port 8765 --latency lognormal:0.5,0.4 --rate-429 0.02
+
+클라이언트 설정:
+    GOOGLE_GEMINI_BASE_URL=http://127.0.0.1:8765 PERPLEXITY_BASE_URL=http://127.0.0.1:8765
+"""
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 품목 코드 패턴 (묶음 프롬프트의 '[F010101]' 표기)
+ITEM_CODE_PATTERN = re.compile(r'\[([A-Z]\d{2,})\]')
+# 시장 규모 프롬프트 스키마의 연도 키 ('"year_2024"')
+YEAR_KEY_PATTERN = re.compile(r'"year_(\d{4})"')
+YEARS = ('2022', '2023', '2024')
+
+
+def parse_latency(spec):
+    """
+    지연 분포 문자열을 샘플링 함수로 변환
+
+    Args:
+        spec (str): 'fixed:0.2', 'uniform:0.1,0.5', 'lognormal:중앙값,sigma' 중 하나 (단위: 초)
+
+    Returns:
+        callable: 호출할 때마다 지연 시간(초)을 반환하는 함수
+    """
+    kind, _, params = spec.partition(':')
+    values = [float(v) for v in params.split(',') if v]
+    if kind == 'fixed':
+        return lambda: values[0]
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'lognormal':
+        median, sigma = values[0], values[1] if len(values) > 1 else 0.5
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"알 수 없는 지연 분포: {spec}")
+
+
+def yearly(value, years=YEARS):
+    return {f"year_{year}": value for year in years}
+
+
+def market_response(years=YEARS):
+    """시장 규모 조사 응답 (MarketResearchResponse 배열, 프롬프트 스키마의 연도만 포함)"""
+    size = str(random.randint(10_000, 90_000_000))
+    return [{
+        "market_size": {"domestic": yearly(size, years), "overseas": yearly(str(int(size) * 7), years)},
+        "is_estimated": {"domestic": yearly("True", years), "overseas": yearly("False", years)},
+        "estimate_reason": {"domestic": yearly("상위 시장 규모와 점유율 기반 추정", years), "overseas": yearly("보고서 수치", years)},
+        "references": {"domestic": yearly("https://example.com/kr-report", years),
+                       "overseas": yearly("https://example.com/global-report", years)},
+    }]
+
+
+def company(prefix):
+    return {
+        "company_name": f"{prefix} 기업",
+        "company_url": "https://example.com",
+        "company_description": "AI 기반 제품을 만드는 성장 기업",
+        "company_best_product": f"{prefix} 제품",
+        "company_best_product_url": "https://example.com/product",
+        "company_best_product_description": "시장 점유율이 빠르게 늘고 있는 주력 제품",
+    }
+
+
+def trend_response():
+    return {"domestic_company": company("국내"), "global_company": company("글로벌")}
+
+
+def keyword_response():
+    return {
+        f"item_keyword_{i}": {
+            "item_keyword": f"키워드 {i}",
+            "item_description": "정부 보고서에서 언급된 핵심 동향",
+            "item_url": f"https://example.com/report-{i}",
+        }
+        for i in range(1, 4)
+    }
+
+
+def validation_response():
+    return {"url_accessibility": 9, "url_content_relevance": 8, "total_score": 17, "validation_details": "가짜 서버 응답"}
+
+
+def build_text(prompt):
+    """프롬프트 종류에 맞는 응답 텍스트 생성"""
+    codes = ITEM_CODE_PATTERN.findall(prompt)
+    if 'item_code' in prompt and codes:
+        single = trend_response if 'domestic_company' in prompt else keyword_response
+        return json.dumps([dict(item_code=code, **single()) for code in codes], ensure_ascii=False)
+    if 'url_accessibility' in prompt:
+        return json.dumps(validation_response())
+    if 'market_size' in prompt:
+        years = sorted(set(YEAR_KEY_PATTERN.findall(prompt))) or YEARS
+        return "```json\n" + json.dumps(market_response(years), ensure_ascii=False) + "\n```"
+    if 'domestic_company' in prompt:
+        return json.dumps(trend_response(), ensure_ascii=False)
+    if 'item_keyword_1' in prompt:
+        return json.dumps(keyword_response(), ensure_ascii=False)
+    return json.dumps({"text": "ok"})
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    server_version = "FakeGenAI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # 요청마다 출력하지 않음
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _inject_failure(self):
+        """잘못된 키이거나 분당 할당량을 넘었거나 설정된 비율에 걸리면 400 / 429 / 500 응답을 보내고 True 반환"""
+        config = self.server.config
+        key = self.headers.get('x-goog-api-key') or self.headers.get('Authorization', '').removeprefix('Bearer ')
+        if key in config.invalid_keys:
+            self.server.count('invalid_key')
+            self._send_json(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT",
+                                            "message": "API key not valid. Please pass a valid API key."}})
+            return True
+        wait = self.server.over_quota(key)
+        if wait is not None:
+            self.server.count('429')
+            self._send_json(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                            "message": "Resource has been exhausted (e.g. check quota)."}},
+                            headers={'Retry-After': f"{wait:.1f}"})
+            return True
+        roll = random.random()
+        if roll < config.rate_429:
+            self.server.count('429')
+            self._send_json(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                            "message": "Resource has been exhausted (e.g. check quota)."}},
+                            headers={'Retry-After': str(config.retry_after)})
+            return True
+        if roll < config.rate_429 + config.error_rate:
+            self.server.count('500')
+            self._send_json(500, {"error": {"code": 500, "status": "INTERNAL", "message": "Internal error"}})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        time.sleep(self.server.latency())
+
+        if self._inject_failure():
+            return
+
+        if ':generateContent' in self.path:
+            prompt = "".join(
+                part.get('text', '') for content in body.get('contents', []) for part in content.get('parts', [])
+            )
+            text = build_text(prompt)
+            self.server.count('gemini')
+            self._send_json(200, {
+                "candidates": [{
+                    "content": {"parts": [{"text": text}], "role": "model"},
+                    "finishReason": "STOP",
+                    "groundingMetadata": {
+                        "webSearchQueries": ["fake query"],
+                        "groundingChunks": [{"web": {"uri": "https://vertexaisearch.cloud.google.com/grounding-api-redirect/fake",
+                                                     "title": "example.com"}}],
+                    },
+                }],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4,
+                                  "totalTokenCount": (len(prompt) + len(text)) // 4},
+                "modelVersion": self.path.split('/')[-1].split(':')[0],
+            })
+        elif self.path.rstrip('/').endswith('/chat/completions'):
+            content = json.dumps(market_response()[0], ensure_ascii=False)
+            self.server.count('perplexity')
+            self._send_json(200, {
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "citations": ["https://example.com/kr-report"],
+                "usage": {"prompt_tokens": 900, "completion_tokens": len(content) // 4, "total_tokens": 900 + len(content) // 4},
+            })
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": f"unknown path {self.path}"}})
+
+    def do_GET(self):
+        # 요청 통계 조회
+        if self.path == '/stats':
+            self._send_json(200, dict(self.server.counts))
+        elif self.path.startswith('/page/'):
+            # 합성 워크북의 출처 URL (URL 검사 / 검증 파이프라인용)
+            self.server.count('page')
+            self._send_json(200, {"title": "fake page"})
+        else:
+            self._send_json(404, {"error": {"code": 404}})
+
+    def do_HEAD(self):
+        status = 200 if self.path.startswith('/page/') else 404
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class FakeAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, FakeAPIHandler)
+        self.config = config
+        self.latency = parse_latency(config.latency)
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._windows = {}
+
+    def over_quota(self, key):
+        """키별 quota_rpm을 넘으면 다음 요청이 가능할 때까지 남은 시간(초), 아니면 None (1분 이동 창)"""
+        if not self.config.quota_rpm:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            window = self._windows[key] = [t for t in self._windows.get(key, []) if now - t < 60]
+            if len(window) >= self.config.quota_rpm:
+                return 60 - (now - window[0])
+            window.append(now)
+            return None
+
+    def handle_error(self, request, client_address):
+        # 클라이언트가 연결을 먼저 끊는 경우(작업자 종료 등)는 무시
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def count(self, key):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='로컬 가짜 Gemini / Perplexity API 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='포트 (0이면 빈 포트 자동 선택)')
+    parser.add_argument('--latency', default='lognormal:0.2,0.4',
+                        help="응답 지연 분포: fixed:초 | uniform:최소,최대 | lognormal:중앙값,sigma")
+    parser.add_argument('--error-rate', type=float, default=0.0, help='500 오류 비율 (0~1)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='429 RESOURCE_EXHAUSTED 비율 (0~1)')
+    parser.add_argument('--retry-after', type=float, default=1, help='429 응답의 Retry-After 값(초)')
+    parser.add_argument('--quota-rpm', type=int, help='API 키별 분당 요청 할당량 (넘으면 429, 적응형 속도 제한 시험용)')
+    parser.add_argument('--invalid-keys', type=lambda value: set(value.split(',')), default=set(),
+                        help='잘못된 키로 거부할 API 키 목록 (쉼표 구분, 키 풀 격리 시험용)')
+    parser.add_argument('--seed', type=int, help='난수 시드')
+    return parser
+
+
+def main(argv=None):
+    config = build_parser().parse_args(argv)
+    if config.seed is not None:
+        random.seed(config.seed)
+    server = FakeAPIServer((config.host, config.port), config)
+    # 첫 줄에 주소를 출력해 상위 프로세스가 포트를 알 수 있게 함
+    print(f"http://{config.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.counts), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -135,18 +135,13 @@ async def check_url(session, url, source_info):
     print(f"Warning: Reached end of check_url without return | URL: {url} | Source: {source_info}")
     return None, "Valid", source_info
 
-async def main():
-    """
-    메인 비동기 실행 함수
+def collect_url_tasks(df, columns_to_check):
     """
-    excel_file_path = 'item_info_v0.xlsx'
-    try:
-        df = pd.read_excel(excel_file_path)
-    except FileNotFoundError:
-        print(f"오류: 파일 '{excel_file_path}'을(를) 찾을 수 없습니다.")
-        return
+    지정된 열에서 URL을 추출하여 (URL, 출처 정보) 목록을 만듭니다.
 
-    columns_to_check = [6, 10, 14, 18, 22, 26]
+    Returns:
+        tuple: ({(열 이름, 행 번호): [URL, ...]}, [(URL, 출처 정보), ...])
+    """
     url_dict = {}  # {(column_name, row_index): [url1, url2, ...]} 형태
 
     print("=== 지정된 열에서 URL 추출 시작 ===")
@@ -174,16 +169,78 @@ async def main():
         else:
             print(f"경고: {col_index + 1}번째 열이 파일에 존재하지 않아 건너뜁니다.")
     
-    if not url_dict:
-        print("\n검사할 URL을 찾지 못했습니다.")
-        return
-
     # 모든 URL과 소스 정보를 준비
     all_url_tasks = []
     for (column_name, row_index), urls in url_dict.items():
         for url in urls:
             source_info = f"{column_name}[{row_index}]"
             all_url_tasks.append((url, source_info))
+    return url_dict, all_url_tasks
+
+
+def save_result_json(excel_file_path, df, columns_to_check, url_dict, all_url_tasks, invalid_urls_with_info):
+    """
+    검사 결과(실패한 URL만)를 타임스탬프가 붙은 JSON 파일로 저장합니다.
+    """
+    result_data = {
+        "검사_정보": {
+            "검사_시간": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "엑셀_파일": excel_file_path,
+            "검사한_열": [f"{i+1}번째 열" for i in columns_to_check if i < df.shape[1]],
+            "검사한_열_이름": [df.columns[i] for i in columns_to_check if i < df.shape[1]]
+        },
+        "통계": {
+            "검사한_열_개수": len(columns_to_check),
+            "URL이_있는_셀_개수": len(url_dict),
+            "총_검사한_URL_개수": len(all_url_tasks),
+            "유효한_URL_개수": len(all_url_tasks) - len(invalid_urls_with_info),
+            "유효하지_않은_URL_개수": len(invalid_urls_with_info)
+        },
+        "실패한_URL": {}
+    }
+    
+    # 유효하지 않은 URL만 저장
+    for url, reason, source_info in invalid_urls_with_info:
+        if reason not in result_data["실패한_URL"]:
+            result_data["실패한_URL"][reason] = []
+        
+        result_data["실패한_URL"][reason].append({
+            "URL": url,
+            "출처": source_info,
+            "오류_유형": reason
+        })
+    
+    # JSON 파일로 저장
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    json_filename = f"url_validation_result_{timestamp}.json"
+    
+    try:
+        with open(json_filename, 'w', encoding='utf-8') as f:
+            json.dump(result_data, f, ensure_ascii=False, indent=2)
+        print(f"\n=== JSON 결과 저장 완료 ===")
+        print(f"파일명: {json_filename}")
+    except Exception as e:
+        print(f"\nJSON 저장 중 오류 발생: {e}")
+    return json_filename
+
+
+async def main():
+    """
+    메인 비동기 실행 함수
+    """
+    excel_file_path = 'item_info_v0.xlsx'
+    try:
+        df = pd.read_excel(excel_file_path)
+    except FileNotFoundError:
+        print(f"오류: 파일 '{excel_file_path}'을(를) 찾을 수 없습니다.")
+        return
+
+    columns_to_check = [6, 10, 14, 18, 22, 26]
+    url_dict, all_url_tasks = collect_url_tasks(df, columns_to_check)
+
+    if not url_dict:
+        print("\n검사할 URL을 찾지 못했습니다.")
+        return
 
     print(f"\n=== 총 {len(all_url_tasks)}개의 URL 유효성 검사 시작 ===")
 
@@ -274,46 +331,8 @@ async def main():
         print(f"유효한 URL: {len(all_url_tasks) - len(invalid_urls_with_info)}개")
 
     # JSON 결과 저장 (실패한 URL만)
-    result_data = {
-        "검사_정보": {
-            "검사_시간": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "엑셀_파일": excel_file_path,
-            "검사한_열": [f"{i+1}번째 열" for i in columns_to_check if i < df.shape[1]],
-            "검사한_열_이름": [df.columns[i] for i in columns_to_check if i < df.shape[1]]
-        },
-        "통계": {
-            "검사한_열_개수": len(columns_to_check),
-            "URL이_있는_셀_개수": len(url_dict),
-            "총_검사한_URL_개수": len(all_url_tasks),
-            "유효한_URL_개수": len(all_url_tasks) - len(invalid_urls_with_info),
-            "유효하지_않은_URL_개수": len(invalid_urls_with_info)
-        },
-        "실패한_URL": {}
-    }
-    
-    # 유효하지 않은 URL만 저장
-    for url, reason, source_info in invalid_urls_with_info:
-        if reason not in result_data["실패한_URL"]:
-            result_data["실패한_URL"][reason] = []
-        
-        result_data["실패한_URL"][reason].append({
-            "URL": url,
-            "출처": source_info,
-            "오류_유형": reason
-        })
-    
-    # JSON 파일로 저장
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    json_filename = f"url_validation_result_{timestamp}.json"
-    
-    try:
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(result_data, f, ensure_ascii=False, indent=2)
-        print(f"\n=== JSON 결과 저장 완료 ===")
-        print(f"파일명: {json_filename}")
-                except Exception as e:
-        print(f"\nJSON 저장 중 오류 발생: {e}")
-                    
+    save_result_json(excel_file_path, df, columns_to_check, url_dict, all_url_tasks, invalid_urls_with_info)
+
 if __name__ == "__main__":
     # 비동기 이벤트 루프 실행
     asyncio.run(main())
@@ -1,133 +1,157 @@
-from pydantic import BaseModel
+from pydantic import create_model
 from dotenv import load_dotenv
 from logger_config import get_logger
+from idnolab import metrics
+from idnolab.schema import YEARS, REGIONS
+from functools import lru_cache
 import os
+import threading
 import time
-from google import genai
-from google.genai import types
 import json
-from save_excel_gemini import save_to_excel_gemini
-# .env 파일에서 환경변수 로드
-load_dotenv()
 
 # 로거 설정
 logger = get_logger("gemini_api")
 
-class YearlyData(BaseModel):
-    """연도별 데이터 모델"""
-    year_2022: str
-    year_2023: str
-    year_2024: str
+# 응답 필드 → 프롬프트에 넣을 설명 (시트 열 이름은 idnolab.schema.FIELD_COLUMNS)
+FIELD_DESCRIPTIONS = {
+    'market_size': "구체적인 천원단위 숫자의 금액 또는 천원단위의 숫자의 추정값",
+    'is_estimated': "True 또는 False",
+    'estimate_reason': "추정 근거",
+    'references': "출처 URL",
+}
 
-class MarketSizeData(BaseModel):
-    """시장 규모 데이터 모델"""
-    domestic: YearlyData  # 국내
-    overseas: YearlyData  # 해외
 
-class EstimatedData(BaseModel):
-    """추정 여부 데이터 모델"""
-    domestic: YearlyData  # 국내
-    overseas: YearlyData  # 해외
+def yearly_model(years=YEARS):
+    """연도별 데이터 모델 (year_2022, year_2023 ... 필드)"""
+    return create_model('YearlyData', **{f"year_{year}": (str, ...) for year in years})
 
-class EstimateReasonData(BaseModel):
-    """추정 근거 데이터 모델"""
-    domestic: YearlyData  # 국내
-    overseas: YearlyData  # 해외
 
-class ReferencesData(BaseModel):
-    """참조 데이터 모델"""
-    domestic: YearlyData  # 국내
-    overseas: YearlyData  # 해외
+@lru_cache(maxsize=None)
+def market_research_model(years=YEARS):
+    """
+    시장 조사 응답 전체 모델 (필드 → 국내/해외 → 연도)
+
+    Args:
+        years (tuple[str, ...]): 조사 연도
+    """
+    yearly = yearly_model(years)
+    regions = create_model('RegionData', **{key: (yearly, ...) for key in REGIONS.values()})
+    return create_model('MarketResearchResponse', **{field: (regions, ...) for field in FIELD_DESCRIPTIONS})
+
+
+YearlyData = yearly_model()
+MarketResearchResponse = market_research_model()
 
-class MarketResearchResponse(BaseModel):
-    """시장 조사 응답 전체 모델"""
-    market_size: MarketSizeData
-    is_estimated: EstimatedData
-    estimate_reason: EstimateReasonData
-    references: ReferencesData
 
+# 여러 작업자 스레드가 처음에 동시에 호출해도 클라이언트를 하나만 만들도록 보호
+# (중복 생성된 클라이언트가 정리되면서 사용 중인 연결이 닫히는 문제 방지)
+_client_lock = threading.Lock()
 
-# Gemini API 설정
-GEMINI_API_KEY = os.getenv('GOOGLE_API_KEY')
 
-# Gemini 클라이언트 초기화 (v1alpha API 사용으로 프리뷰 모델 접근)
-client = genai.Client(
-    api_key=GEMINI_API_KEY
-)
+def get_client(api_key=None):
+    """
+    Gemini 클라이언트를 처음 필요할 때 생성하고 재사용하는 함수
+
+    import 시점에는 .env 로드나 클라이언트 생성을 하지 않으므로
+    API 키 없이도 모듈을 불러올 수 있다.
+
+    Args:
+        api_key (str): 사용할 API 키 (기본값: GOOGLE_API_KEY 환경변수)
+    """
+    with _client_lock:
+        return _create_client(api_key)
 
-# Define the grounding tool
-grounding_tool = types.Tool(
-    google_search=types.GoogleSearch()
-)
 
-url_context_tool = types.Tool(
-    url_context = types.UrlContext()
-)
+@lru_cache(maxsize=None)
+def _create_client(api_key):
+    from google import genai
+
+    # .env 파일에서 환경변수 로드
+    load_dotenv()
+
+    # GOOGLE_GEMINI_BASE_URL이 있으면 해당 주소로 요청 (로컬 가짜 서버 벤치마크용)
+    base_url = os.getenv('GOOGLE_GEMINI_BASE_URL')
+    return genai.Client(
+        api_key=api_key or os.getenv('GOOGLE_API_KEY'),
+        http_options={'base_url': base_url} if base_url else None
+    )
+
+
+@lru_cache(maxsize=None)
+def get_config(years=YEARS, search=True):
+    """
+    검색(grounding)/URL 컨텍스트 도구가 포함된 생성 설정을 처음 필요할 때 생성하는 함수
+
+    Args:
+        years (tuple[str, ...]): 응답 스키마에 넣을 조사 연도
+        search (bool): False면 검색 도구 없이 URL 컨텍스트만 사용 (상위 분류 출처가 있는 하위 품목)
+    """
+    from google.genai import types
+
+    # Define the grounding tool
+    grounding_tool = types.Tool(
+        google_search=types.GoogleSearch()
+    )
 
-# Configure generation settings
-config = types.GenerateContentConfig(
-    tools=[grounding_tool, url_context_tool],
-    response_mime_type="text/plain",
-    response_schema=list[MarketResearchResponse]
-)
+    url_context_tool = types.Tool(
+        url_context = types.UrlContext()
+    )
 
+    # Configure generation settings
+    return types.GenerateContentConfig(
+        tools=[grounding_tool, url_context_tool] if search else [url_context_tool],
+        response_mime_type="text/plain",
+        response_schema=list[market_research_model(years)]
+    )
 
 
-def get_prompt(item_name, item_description):
 
+def schema_template(cells):
+    """
+    프롬프트에 넣을 JSON 스키마 예시 (요청한 (지역, 연도) 셀의 키만 포함)
+
+    Args:
+        cells (Iterable[tuple[str, str]]): (지역, 연도) 목록 (예: [('국내', '2023')])
+    """
+    cells = list(cells)
+    return json.dumps({
+        field: {
+            key: {f"year_{year}": description for r, year in cells if r == region}
+            for region, key in REGIONS.items() if any(r == region for r, _ in cells)
+        }
+        for field, description in FIELD_DESCRIPTIONS.items()
+    }, ensure_ascii=False, indent=4)
+
+
+def parent_context(parent):
+    """
+    상위 분류 조사 결과를 프롬프트 참고 자료 문단으로 변환
+
+    Args:
+        parent (dict): {'code_name': 상위 분류명, 'market_size': {(지역, 연도): 값}, 'references': [URL, ...]}
+    """
+    sizes = '\n'.join(
+        f"                    - {region} {year}: {value}" for (region, year), value in sorted(parent['market_size'].items())
+    ) or "                    - (시장 규모 없음)"
+    references = '\n'.join(f"                    - {url}" for url in parent['references']) or "                    - (출처 없음)"
+    return f"""
+                    상위 분류 '{parent['code_name']}'의 조사 결과 (참고 자료):
+                    시장 규모 (천원/천달러 단위):
+{sizes}
+                    출처:
+{references}
+                    - 위 출처를 먼저 확인하고 상위 분류 규모에서 이 품목의 비중을 추정해 활용
+                    - 이 품목의 시장 규모는 상위 분류 시장 규모를 넘을 수 없음
+                """
+
+
+def get_prompt(item_name, item_description, years=YEARS, parent=None):
+
+    template = schema_template((region, year) for region in REGIONS for year in years)
     prompt = f"""당신은 시장 분석 전문가입니다. '{item_name}: {item_description}' 제품/서비스의 시장 규모에 대한 정확한 데이터를 제공해주세요.
 
                         다음 정확한 JSON 스키마 형식으로 응답해주세요:
-                        {{
-                            "market_size": {{
-                                "domestic": {{
-                                    "year_2022": "구체적인 천원단위 숫자의 금액 또는 천원단위의 숫자의 추정값",
-                                    "year_2023": "구체적인 천원단위 숫자의 금액 또는 천원단위의 숫자의 추정값", 
-                                    "year_2024": "구체적인 천원단위 숫자의 금액 또는 천원단위의 숫자의 추정값"
-                                }},
-                                "overseas": {{
-                                    "year_2022": "구체적인 천원단위 숫자의 금액 또는 천원단위의 숫자의 추정값",
-                                    "year_2023": "구체적인 천원단위 숫자의 금액 또는 천원단위의 숫자의 추정값",
-                                    "year_2024": "구체적인 천원단위 숫자의 금액 또는 천원단위의 숫자의 추정값"
-                                }}
-                            }},
-                            "is_estimated": {{
-                                "domestic": {{
-                                    "year_2022": "True 또는 False",
-                                    "year_2023": "True 또는 False",
-                                    "year_2024": "True 또는 False"
-                                }},
-                                "overseas": {{
-                                    "year_2022": "True 또는 False",x
-                                    "year_2023": "True 또는 False",
-                                    "year_2024": "True 또는 False"
-                                }}
-                            }},
-                            "estimate_reason": {{
-                                "domestic": {{
-                                    "year_2022": "추정 근거",
-                                    "year_2023": "추정 근거",
-                                    "year_2024": "추정 근거"
-                                }},
-                                "overseas": {{
-                                    "year_2022": "추정 근거",
-                                    "year_2023": "추정 근거",
-                                    "year_2024": "추정 근거"
-                                }}
-                            }},
-                            "references": {{
-                                "domestic": {{
-                                    "year_2022": "출처 URL",
-                                    "year_2023": "출처 URL",
-                                    "year_2024": "출처 URL"
-                                }},
-                                "overseas": {{
-                                    "year_2022": "출처 URL", 
-                                    "year_2023": "출처 URL",
-                                    "year_2024": "출처 URL"
-                                }}
-                            }}
-                        }}
+                        {template}
 
                     중요한 요구사항:
                     1. 반드시 위의 정확한 JSON 구조를 따라야 합니다 (키 이름 변경 금지)
@@ -150,27 +174,113 @@ def get_prompt(item_name, item_description):
                     9. 완전히 데이터를 찾을 수 없는 경우에만 "데이터없음"으로 표시
                     10. JSON 형식 외의 다른 텍스트나 설명은 포함하지 않습니다
                 """
+    if parent:
+        prompt += parent_context(parent)
     return prompt
 
 
+def get_gap_prompt(item_name, item_description, cells, known=None):
+    """
+    비어 있는(또는 다시 조회할) 셀만 묻는 좁은 프롬프트
+
+    전체 프롬프트는 2개 지역 × 3개 연도 × 4개 필드를 모두 요구하므로 셀 하나만 비어 있어도
+    응답 전체를 다시 받아야 한다. 여기서는 요청한 (지역, 연도) 셀의 키만 스키마에 넣는다.
+
+    Args:
+        item_name (str): 품목명
+        item_description (str): 개념설명
+        cells (list[tuple[str, str]]): 조회할 (지역, 연도) 목록 (예: [('국내', '2023')])
+        known (dict): 이미 채워진 시장 규모 {(지역, 연도): 값} (연도 간 일관성 참고용)
+    """
+    requested = ', '.join(f"{region} {year}년" for region, year in cells)
+    known_lines = '\n'.join(
+        f"                    - {region} {year}년: {value}" for (region, year), value in sorted((known or {}).items())
+    )
+    known_text = f"""
+                    이미 조사된 시장 규모 (천원 단위, 연도 간 일관성 참고용이며 다시 제공하지 않음):
+{known_lines}
+""" if known_lines else ""
+
+    return f"""당신은 시장 분석 전문가입니다. '{item_name}: {item_description}' 제품/서비스의 시장 규모 중 다음 항목만 조사해주세요: {requested}
+{known_text}
+                    다음 JSON 스키마 형식으로만 응답해주세요 (스키마에 없는 연도·지역은 포함하지 않음):
+                    {schema_template(cells)}
+
+                    중요한 요구사항:
+                    1. 반드시 위의 정확한 JSON 구조를 따라야 합니다 (키 이름 변경 금지)
+                    2. 시장 규모는 반드시 구체적인 금액으로 제공 (백분율이나 출하량 제외)
+                    3. market_size 필드에는 한국 시장은 원화 단위, 해외 시장은 달러 단위, 단위 표시하지 않고 천원 단위의 숫자로만 표기
+                    4. is_estimated 필드에는 오직 추정이면 True 그렇지 않으면 False 형태로 표기
+                    5. 직접적인 데이터가 없으면 관련 산업 규모, 점유율, 성장률로 추정하고 추정 근거와 출처 URL을 기록
+                    6. 출처 URL은 유효한 웹 주소여야 하며 [1] 같은 주석 형태가 아닌 URL로 줄바꿈 없이 제공
+                    7. 완전히 데이터를 찾을 수 없는 경우에만 "데이터없음"으로 표시
+                    8. JSON 형식 외의 다른 텍스트나 설명은 포함하지 않습니다
+                """
+
+
+@lru_cache(maxsize=None)
+def gap_response_model(cells):
+    """
+    요청한 셀만 담는 응답 스키마 (pydantic 모델)
+
+    Args:
+        cells (tuple[tuple[str, str], ...]): (지역, 연도) 목록
+    """
+    regions = {}
+    for region, key in REGIONS.items():
+        years = sorted(year for r, year in cells if r == region)
+        if years:
+            yearly = create_model(f"GapYearly_{key}", **{f"year_{year}": (str, ...) for year in years})
+            regions[key] = (yearly, ...)
+    group = create_model("GapRegions", **regions)
+    return create_model("GapResponse", **{field: (group, ...) for field in FIELD_DESCRIPTIONS})
+
+
+@lru_cache(maxsize=None)
+def get_gap_config(cells):
+    """빈 셀 조회용 생성 설정 (검색 도구는 같고 응답 스키마만 좁힘)"""
+    from google.genai import types
+
+    config = get_config()
+    return types.GenerateContentConfig(
+        tools=config.tools,
+        response_mime_type="text/plain",
+        response_schema=list[gap_response_model(cells)]
+    )
+
+
+def request_gemini(contents, config=None, api_key=None):
+    """
+    시장 규모 조사 설정으로 Gemini API를 호출하고 응답 텍스트를 반환 (api_key: 기본값 GOOGLE_API_KEY 환경변수)
+    """
+    with metrics.observe_api('gemini'):
+        response = get_client(api_key).models.generate_content(
+            model="gemini-2.5-pro",
+            contents=contents,
+            config=config or get_config()
+        )
+    return response.text
+
+
 def get_industry_data_with_gemini(item_name,item_description, max_retries=3):
     """
     Gemini API를 사용하여 특정 물품의 국내, 해외 산업 규모 데이터를 요청
+
+    재시도는 idnolab.resilience 공통 규칙(백오프, 서킷 브레이커, 재시도 예산)으로 최대 max_retries번 시도하고,
+    각 시도는 API 키 풀(idnolab.keys)에서 여유가 가장 많은 키의 속도 제한기 차례를 기다린다.
     """
-    
-    
+    from idnolab.keys import pooled
+    from idnolab.pipeline import AbortRun
+    from idnolab.resilience import RetryPolicy
+
+    policy = RetryPolicy('gemini', 'gemini-2.5-pro', max_attempts=max_retries)
+    request = pooled(request_gemini, 'gemini', 'gemini-2.5-pro')
     try:
         # logger.info("token count:" + str(client.models.count_tokens(model="gemini-2.5-pro", contents=get_prompt(item_name, item_description))))
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
-            contents= get_prompt(item_name, item_description),
-
-            config = config
-        )
-        
+        return policy.call(request, get_prompt(item_name, item_description))
 
-        return response.text
-            
+    except AbortRun:
+        raise
     except Exception as e:
         logger.error(f"{item_name} API 요청 실패: {str(e)}")
         return f"API 요청 오류: {str(e)}"
@@ -266,6 +376,8 @@ def parse_industry_data_with_gemini(response_text):
 
 
 if __name__ == "__main__":
+    from save_excel_gemini import save_to_excel_gemini
+
     # 사용 가능한 모든 모델 조회
     # for model in client.models.list():
     #     print(f"모델명: {model.name}")
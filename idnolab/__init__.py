@@ -0,0 +1,6 @@
+"""
+idnolab 공용 파이프라인 모듈
+
+품목 정보 보강(시장 규모, 트렌드 기업, 키워드) 스크립트들이 함께 쓰는 기능을 모아둔 패키지.
+무거운 의존성(pandas, google-genai 등)은 각 모듈 안에서 필요할 때만 import 한다.
+"""
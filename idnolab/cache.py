@@ -0,0 +1,61 @@
+"""
+API 응답 캐시
+
+요청 지문(idnolab.singleflight.fingerprint) → 응답 텍스트를 메모리에 보관하고, path가 있으면
+Checkpoint와 같은 JSON Lines 파일에 이어 써서 다음 실행에서도 같은 요청을 다시 보내지 않는다.
+조회 결과는 metrics.CACHE_REQUESTS(result: hit, miss)에 기록된다.
+"""
+import json
+import os
+import threading
+import time
+
+from logger_config import get_logger
+from idnolab import metrics
+
+# 로거 설정
+logger = get_logger("cache")
+
+
+class ResponseCache:
+    """
+    요청 지문 → 응답 캐시
+
+    Args:
+        path (str): 캐시 파일 경로 (None이면 실행 중 메모리에만 보관)
+        name (str): 지표 라벨용 캐시 이름 (예: 'market', 'url')
+    """
+
+    def __init__(self, path=None, name='gemini'):
+        self.path = path
+        self.name = name
+        self._values = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        self._values[record['key']] = record['value']
+            logger.info(f"응답 캐시 로드: {len(self._values)}개 ({path})")
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key):
+        """캐시된 응답 (없으면 None)"""
+        with self._lock:
+            value = self._values.get(key)
+        metrics.CACHE_REQUESTS.inc(cache=self.name, result='miss' if value is None else 'hit')
+        return value
+
+    def put(self, key, value):
+        """응답 저장 (None은 저장하지 않음)"""
+        if value is None:
+            return
+        with self._lock:
+            self._values[key] = value
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'key': key, 'value': value, 'time': time.time()}, ensure_ascii=False) + '\n')
@@ -0,0 +1,499 @@
+"""
+idnolab 통합 실행 진입점
+
+사용 예:
+    python -m idnolab status
+    python -m idnolab run trend --dry-run
+    python -m idnolab run keyword --pack 4 --checkpoint keyword.jsonl
+    python -m idnolab run market --rows 3,11,24-30 --workers 2
+    python -m idnolab run market --plan requery_plan.csv --patch
+    python -m idnolab run market --extend 2025 --patch
+    python -m idnolab run urlcheck --workers 20
+    python -m idnolab run keyword --order priority --flagged F01,F0203 --deadline 06:00
+    python -m idnolab run market --order priority --failures market_failures.jsonl --budget 2000000
+    python -m idnolab run trend --trace trace.json --profile profile.folded
+    python -m idnolab run keyword --metrics-textfile /var/lib/node_exporter/textfile/idnolab.prom
+    python -m idnolab queue add trend --queue trend_queue.db
+    IDNOLAB_QUEUE_TOKEN=비밀값 python -m idnolab queue serve --queue trend_queue.db --host 0.0.0.0 --port 8800
+    IDNOLAB_QUEUE_TOKEN=비밀값 python -m idnolab run trend --queue http://10.0.0.5:8800 --workers 4
+    python -m idnolab run trend --queue trend_queue.db --merge
+    python -m idnolab export market --output market.csv
+    python -m idnolab export trend --output item_info_trend_final.xlsx
+    python -m idnolab normalize --output market_sizes.csv
+    python -m idnolab check --output requery_plan.csv
+
+run 명령은 idnolab.pipelines 아래의 파이프라인 정의(source → prompt → call → parse → validate → sink)를
+실행하며, 단계별 작업자 수·큐·체크포인트는 idnolab.pipeline이 공통으로 처리한다.
+실행할 파이프라인의 모듈만 필요할 때 불러오므로 status, dry-run, export 같은
+가벼운 명령은 google-genai나 pandas를 import 하지 않고 바로 끝난다.
+"""
+import argparse
+import os
+import sys
+
+from idnolab.source import sheet_rows, sheet_tasks, is_filled, parse_codes
+
+# 저장소 최상위 경로
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 파이프라인 등록 정보
+# module: build(options)를 제공하는 파이프라인 정의 모듈
+# directory: 파이프라인이 실행되는 디렉토리 (모듈 import 기준 경로)
+# progress_column: 값이 채워져 있으면 처리 완료로 보는 열
+# workers / interval: 호출 단계의 기본 작업자 수와 호출 간격(초)
+PIPELINES = {
+    'market': {
+        'description': '시장 규모 조사 (Gemini)',
+        'directory': '.',
+        'module': 'idnolab.pipelines.market',
+        'workbook': 'item_info_3.xlsx',
+        'progress_column': '국내 산업규모 (2024)',
+        'workers': 1,
+        'interval': 10,
+    },
+    'trend': {
+        'description': '트렌드 기업 조사',
+        'directory': 'search_trend_company',
+        'module': 'idnolab.pipelines.trend',
+        'workbook': 'item_info_trend.xlsx',
+        'progress_column': '회사명',
+        'workers': 1,
+        'interval': 10,
+    },
+    'keyword': {
+        'description': '품목 키워드 조사',
+        'directory': 'search_item_keyword',
+        'module': 'idnolab.pipelines.keyword',
+        'workbook': 'item_info_keyword.xlsx',
+        'progress_column': 'item_keyword_1',
+        'workers': 1,
+        'interval': 10,
+    },
+    'validate': {
+        'description': '키워드 데이터 유효성 검증',
+        'directory': 'search_item_keyword',
+        'module': 'idnolab.pipelines.validate',
+        'workbook': 'item_info_keyword_v1.0.xlsx',
+        'progress_column': 'item_keyword_1',
+        'workers': 1,
+        'interval': 1,
+    },
+    'urlcheck': {
+        'description': '시장 규모 출처 URL 검사',
+        'directory': 'check_market_data_url',
+        'module': 'idnolab.pipelines.urlcheck',
+        'workbook': 'item_info_v0.xlsx',
+        'progress_column': '출처 (국내 2024)',
+        'workers': 20,
+        'interval': 0,
+    },
+}
+
+
+def pipeline_path(name, filename):
+    """파이프라인 디렉토리 기준 파일 경로를 반환"""
+    return os.path.join(REPO_ROOT, PIPELINES[name]['directory'], filename)
+
+
+def command_status(args):
+    """파이프라인별 작업 파일의 진행 현황 출력"""
+    names = [args.pipeline] if args.pipeline else list(PIPELINES)
+    for name in names:
+        info = PIPELINES[name]
+        path = pipeline_path(name, args.workbook or info['workbook'])
+        if not os.path.exists(path):
+            print(f"{name:<9} {info['description']}: 작업 파일 없음 ({path})")
+            continue
+
+        total = filled = 0
+        for _, row in sheet_rows(path, ['code_name', info['progress_column']]):
+            if row.get('code_name') in (None, 'code_name'):
+                continue
+            total += 1
+            if is_filled(row.get(info['progress_column'])):
+                filled += 1
+        ratio = filled / total * 100 if total else 0
+        print(f"{name:<9} {info['description']}: {filled}/{total} 완료 ({ratio:.1f}%)")
+    return 0
+
+
+def command_run(args):
+    """파이프라인 실행 (--dry-run이면 처리 대상만 출력)"""
+    info = PIPELINES[args.pipeline]
+    directory = os.path.join(REPO_ROOT, info['directory'])
+
+    if args.dry_run:
+        path = pipeline_path(args.pipeline, args.workbook or info['workbook'])
+        from idnolab.pipeline import parse_rows
+
+        pending = [
+            task.row['code_name'] for task in sheet_tasks(
+                path, [], rows=parse_rows(args.rows), skip_filled=info['progress_column'],
+                code_prefixes=parse_codes(args.codes)
+            )
+        ]
+        print(f"[dry-run] {args.pipeline}: 처리 대상 {len(pending)}개 ({path})")
+        for code_name in pending[:args.limit]:
+            print(f"  - {code_name}")
+        if len(pending) > args.limit:
+            print(f"  ... 외 {len(pending) - args.limit}개")
+        return 0
+
+    import importlib
+    from idnolab.pipeline import parse_rows
+    from idnolab.tracing import tracer
+
+    # 추적/프로파일 결과는 실행한 위치 기준 경로에 저장
+    trace_path = os.path.abspath(args.trace) if args.trace else None
+    profile_path = os.path.abspath(args.profile) if args.profile else None
+    if args.plan:
+        args.plan = os.path.abspath(args.plan)
+    if args.cache:
+        args.cache = os.path.abspath(args.cache)
+    if args.failures:
+        args.failures = os.path.abspath(args.failures)
+    if args.flagged and os.path.isfile(args.flagged):
+        args.flagged = os.path.abspath(args.flagged)
+    if args.deadline:
+        from idnolab.schedule import parse_deadline
+
+        # 상대 기간('6h')은 실행을 시작한 시각부터 셈
+        try:
+            args.deadline = parse_deadline(args.deadline)
+        except ValueError:
+            print(f"마감 시간 형식 오류: {args.deadline} (예: 6h, 90m, 18:30, 2026-10-20T06:00)")
+            return 2
+    if args.queue and not args.queue.startswith(('http://', 'https://')):
+        args.queue = os.path.abspath(args.queue)
+    if args.queue and args.pipeline not in QUEUE_PIPELINES:
+        print(f"작업 큐는 {', '.join(QUEUE_PIPELINES)} 파이프라인만 지원합니다.")
+        return 2
+    if args.merge and (not args.queue or args.queue.startswith(('http://', 'https://'))):
+        # 병합은 큐 파일의 결과를 직접 읽어 작업 파일에 기록하므로 큐 서버 주소로는 할 수 없음
+        print("--merge는 --queue 큐 파일 경로와 함께 지정해야 합니다 (큐 서버 주소는 지원하지 않음).")
+        return 2
+    if args.quota:
+        from idnolab.ratelimit import configure as configure_quota
+        configure_quota(quota=args.quota, priority=args.priority)
+    if args.keys:
+        from idnolab.keys import configure as configure_keys
+        configure_keys(args.keys)
+
+    # 실행할 파이프라인의 디렉토리만 import 경로에 추가
+    # (각 디렉토리에 같은 이름의 gemini_api 모듈이 있으므로 한 프로세스에서 하나만 불러옴)
+    sys.path.insert(0, directory)
+    os.chdir(directory)
+
+    args.rows = parse_rows(args.rows)
+    args.dedup_exclude = parse_rows(args.dedup_exclude)
+    args.codes = parse_codes(args.codes)
+    args.workbook = args.workbook or info['workbook']
+    if args.workers is None:
+        args.workers = info['workers']
+    if args.interval is None:
+        args.interval = info['interval']
+    if args.rpm is None and args.interval:
+        # 고정 호출 간격을 적응형 속도 제한기의 시작 속도로 사용
+        args.rpm = 60 / args.interval
+    if args.rpm:
+        # 호출 간격은 속도 제한기가 조절
+        args.interval = 0
+
+    if trace_path:
+        tracer.enable()
+    exporter = metrics_server = None
+    if args.metrics_textfile:
+        from idnolab.metrics import TextfileExporter
+        exporter = TextfileExporter(os.path.abspath(args.metrics_textfile), args.metrics_interval).start()
+    if args.metrics_port is not None:
+        from idnolab.metrics import serve
+        metrics_server = serve(args.metrics_port)
+    profiler = None
+    if profile_path:
+        from idnolab.profiling import SamplingProfiler
+        profiler = SamplingProfiler(interval=args.profile_interval)
+        profiler.start()
+
+    try:
+        pipeline = importlib.import_module(info['module']).build(args)
+        stats = pipeline.run()
+        print_key_usage()
+    finally:
+        if exporter is not None:
+            exporter.stop()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if trace_path:
+            tracer.export(trace_path, args.trace_format)
+            print(f"추적 파일 저장: {trace_path} ({len(tracer.spans)}개 span)")
+            for name, summary in sorted(tracer.summary().items(), key=lambda item: -item[1]['total']):
+                print(f"  {name:<14} {summary['count']:>6}회  합계 {summary['total']:>9.2f}초  최대 {summary['max']:>7.2f}초")
+        if profiler is not None:
+            profiler.stop()
+            profiler.write(profile_path)
+            print(f"프로파일 저장: {profile_path} ({profiler.samples}회 샘플링, flamegraph.pl / speedscope로 열기)")
+            for name, ratio in profiler.top(5):
+                print(f"  {ratio * 100:5.1f}%  {name}")
+    if pipeline.interrupted:
+        # 종료 신호로 멈춘 실행 (받은 결과는 저장됨, 남은 작업은 다시 실행해 이어서 처리)
+        return 130
+    failed = sum(stage['failed'] for name, stage in stats.items() if name != 'skipped')
+    return 1 if failed else 0
+
+
+def print_key_usage():
+    """API 키를 여러 개 쓴 경우 키별 사용량 출력"""
+    from idnolab.keys import pools
+
+    for pool in pools():
+        if len(pool.keys) < 2:
+            continue
+        print(f"[{pool.provider}] API 키별 사용량")
+        for key, usage in pool.usage().items():
+            state = '정상' if usage['healthy'] else '격리'
+            rate = f"{usage['rpm']:>6.1f} RPM" if usage['rpm'] is not None else '속도 제한 없음'
+            print(f"  {key} {usage['project'] or '':<12} 요청 {usage['requests']:>6}회  실패 {usage['failures']:>4}회  "
+                  f"토큰(추정) {usage['tokens']:>9}  {rate}  {state}")
+
+
+# 작업 큐로 나눠 처리할 수 있는 파이프라인 (행 단위 결과를 작업 파일에 병합)
+QUEUE_PIPELINES = ('trend', 'keyword')
+
+
+def command_queue(args):
+    """작업 큐 관리 (add: 작업 등록, serve: 중앙 큐 서버, status: 현황, retry: 실패 작업 재등록)"""
+    from idnolab.pipeline import parse_rows
+    from idnolab.workqueue import WorkQueue, open_queue, serve
+
+    if args.action == 'status':
+        stats = open_queue(args.queue).stats()
+        print(f"작업 큐 {args.queue}: 대기 {stats['pending']}  임대 {stats['leased']} (작업자 {stats['workers']})  "
+              f"완료 {stats['done']} (병합 {stats['merged']})  실패 {stats['failed']}")
+        return 0
+    if args.queue.startswith(('http://', 'https://')):
+        print(f"queue {args.action}에는 큐 파일 경로를 지정해야 합니다.")
+        return 2
+
+    queue = WorkQueue(args.queue, lease_seconds=args.lease, max_attempts=args.max_attempts)
+    if args.action == 'add':
+        if args.pipeline not in QUEUE_PIPELINES:
+            print(f"작업 큐는 {', '.join(QUEUE_PIPELINES)} 파이프라인만 지원합니다.")
+            return 2
+        info = PIPELINES[args.pipeline]
+        path = pipeline_path(args.pipeline, args.workbook or info['workbook'])
+        tasks = sheet_tasks(path, ['개념설명'], rows=parse_rows(args.rows), skip_filled=info['progress_column'],
+                            code_prefixes=parse_codes(args.codes))
+        added = queue.add(tasks)
+        print(f"작업 {added}개 등록 ({path} → {args.queue})")
+    elif args.action == 'retry':
+        print(f"실패한 작업 {queue.reset_failed()}개를 다시 대기열에 넣었습니다.")
+    elif args.action == 'serve':
+        import time
+
+        try:
+            server = serve(queue, args.port, args.host, token=args.token)
+        except ValueError as e:
+            print(e)
+            return 2
+        try:
+            while True:
+                time.sleep(60)
+                print(f"작업 큐 현황: {queue.stats()}")
+        except KeyboardInterrupt:
+            server.shutdown()
+    return 0
+
+
+def command_export(args):
+    """작업 파일을 CSV 또는 엑셀(쓰기 전용 스트리밍)로 내보내기"""
+    info = PIPELINES[args.pipeline]
+    path = pipeline_path(args.pipeline, args.workbook or info['workbook'])
+    output_format = args.format or ('xlsx' if args.output and args.output.endswith('.xlsx') else 'csv')
+    output = args.output or os.path.splitext(os.path.basename(path))[0] + f'.{output_format}'
+
+    if output_format == 'xlsx':
+        from idnolab.export import export_workbook
+
+        count = export_workbook(path, output, max_rows=args.max_rows)
+        print(f"{count}행을 '{output}' 파일로 내보냈습니다.")
+        return 0
+
+    import csv
+
+    count = 0
+    with open(output, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = None
+        for _, row in sheet_rows(path):
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+    print(f"{count}행을 '{output}' 파일로 내보냈습니다.")
+    return 0
+
+
+def command_normalize(args):
+    """시장 규모 열을 천 단위 숫자로 정규화하고 원화로 환산해 long 형식 CSV로 저장"""
+    import time
+
+    from idnolab.fx import load_fx_rates, to_krw
+    from idnolab.normalize import load_market_sheet, market_size_table
+
+    path = pipeline_path('market', args.workbook or PIPELINES['market']['workbook'])
+    df = load_market_sheet(path)
+
+    started = time.perf_counter()
+    rates = load_fx_rates(args.fx_rates)
+    table = to_krw(market_size_table(df, default_currency=args.default_currency), rates)
+    elapsed = time.perf_counter() - started
+
+    output = args.output or 'market_sizes.csv'
+    table.to_csv(output, index=False, encoding='utf-8-sig')
+    counts = table['status'].value_counts()
+    summary = ', '.join(f"{status} {count}" for status, count in counts.items())
+    print(f"{len(table)}개 셀 정규화 ({elapsed * 1000:.1f}ms, 환율표 {rates.attrs.get('version')}): {summary}")
+    print(f"결과가 '{output}' 파일에 저장되었습니다.")
+    return 0
+
+
+def command_check(args):
+    """시장 규모 결과의 일관성을 검사하고 재조회 계획(품목, 지역, 연도) CSV 저장"""
+    import time
+
+    from idnolab.consistency import check_consistency, requery_plan
+    from idnolab.fx import load_fx_rates, to_krw
+    from idnolab.normalize import load_market_sheet, market_size_table
+
+    path = pipeline_path('market', args.workbook or PIPELINES['market']['workbook'])
+    df = load_market_sheet(path)
+
+    started = time.perf_counter()
+    table = to_krw(market_size_table(df), load_fx_rates(args.fx_rates))
+    issues = check_consistency(table, max_ratio=args.max_ratio, tolerance=args.tolerance)
+    plan = requery_plan(issues)
+    elapsed = time.perf_counter() - started
+
+    output = args.output or 'requery_plan.csv'
+    plan.to_csv(output, index=False, encoding='utf-8-sig')
+    print(f"{len(table)}개 셀 검사 ({elapsed * 1000:.1f}ms)")
+    for check, count in issues['check'].value_counts().items():
+        print(f"  {check:<22} {count:>6}")
+    print(f"재조회 대상 {len(plan)}개 셀 ({plan['code_name'].nunique()}개 품목)이 '{output}' 파일에 저장되었습니다.")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='idnolab', description='idnolab 품목 정보 보강 파이프라인')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    status_parser = subparsers.add_parser('status', help='작업 파일 진행 현황')
+    status_parser.add_argument('pipeline', nargs='?', choices=list(PIPELINES))
+    status_parser.add_argument('--workbook', help='작업 엑셀 파일 (기본값: 파이프라인별 기본 파일)')
+    status_parser.set_defaults(func=command_status)
+
+    run_parser = subparsers.add_parser('run', help='파이프라인 실행')
+    run_parser.add_argument('pipeline', choices=list(PIPELINES))
+    run_parser.add_argument('--dry-run', action='store_true', help='API 호출 없이 처리 대상만 출력')
+    run_parser.add_argument('--limit', type=int, default=20, help='dry-run에서 출력할 최대 항목 수')
+    run_parser.add_argument('--workbook', help='작업 엑셀 파일 (기본값: 파이프라인별 기본 파일)')
+    run_parser.add_argument('--rows', help="처리할 엑셀 행 번호 (예: '3,11,20-25', 지정 시 이미 채워진 행도 다시 처리)")
+    run_parser.add_argument('--codes', help="처리할 품목 코드 접두어 (예: 'F01,F0203')")
+    run_parser.add_argument('--workers', type=int, help='API 호출 단계 작업자 수')
+    run_parser.add_argument('--interval', type=float, help='API 호출 간 최소 간격(초, --rpm이 없으면 적응형 속도 제한기의 시작 속도)')
+    run_parser.add_argument('--rpm', type=float,
+                            help='적응형 속도 제한기의 시작 분당 요청 수 (기본값: 60 / interval, 성공하면 올리고 429를 받으면 낮춤)')
+    run_parser.add_argument('--tpm', type=float, help='분당 토큰 수 제한 (프롬프트 길이로 추정)')
+    run_parser.add_argument('--max-rpm', type=float, help='분당 요청 수 상한 (--rpm과 같게 주면 고정 속도)')
+    run_parser.add_argument('--keys', help="Gemini API 키 파일 (한 줄에 'key' 또는 'project:key', 기본값: GOOGLE_API_KEYS 또는 GOOGLE_API_KEY)")
+    run_parser.add_argument('--quota', default=os.getenv('IDNOLAB_QUOTA'),
+                            help='동시에 실행하는 파이프라인끼리 호출 속도를 나눠 쓸 공유 할당량 파일 (SQLite, 기본값: IDNOLAB_QUOTA)')
+    run_parser.add_argument('--priority', type=int, default=int(os.getenv('IDNOLAB_PRIORITY', 0)),
+                            help='공유 할당량에서 차례를 기다릴 때 우선순위 (클수록 먼저, 기본값: IDNOLAB_PRIORITY 또는 0)')
+    run_parser.add_argument('--order', choices=['sheet', 'priority'], default='sheet',
+                            help='처리 순서 (priority: 고객 요청·빈 셀 수·이전 실패 횟수·추정 비용 점수가 높은 품목부터)')
+    run_parser.add_argument('--weights',
+                            help="우선순위 가중치 (기본값: 'missing=1,flagged=100,failures=-5,cost=-1', cost는 1000 토큰 단위)")
+    run_parser.add_argument('--flagged', help="고객 요청 품목 코드 접두어 (예: 'F01,F0203') 또는 한 줄에 하나씩 적은 파일")
+    run_parser.add_argument('--failures', help='품목별 실패를 기록하고 우선순위 계산에 쓰는 파일 (JSON Lines)')
+    run_parser.add_argument('--deadline', help="이 시각이 되면 새 작업을 넣지 않고 진행 중인 작업만 마무리 (예: 6h, 90m, 18:30)")
+    run_parser.add_argument('--budget', type=float, help='이번 실행의 최대 추정 토큰 수 (넘으면 새 작업을 넣지 않음)')
+    run_parser.add_argument('--queue',
+                            help='작업 큐 파일 또는 큐 서버 주소 (http://...): 작업을 빌려 처리하고 결과를 큐에 기록 (trend, keyword)')
+    run_parser.add_argument('--merge', action='store_true', help='--queue 큐 파일에 모인 결과를 작업 파일에 기록')
+    run_parser.add_argument('--lease', type=float, default=600, help='작업 큐에서 빌린 작업의 임대 시간(초)')
+    run_parser.add_argument('--flush-every', type=int, default=50,
+                            help='엑셀 파일에 모아 저장할 최대 행 수 (저장 단계가 밀린 행을 모두 반영하면 그때도 저장)')
+    run_parser.add_argument('--checkpoint', help='완료 항목을 기록할 체크포인트 파일 (재실행 시 건너뜀)')
+    run_parser.add_argument('--pack', type=int, default=1, help='같은 상위 분류 품목을 묶어 요청할 최대 개수 (trend, keyword)')
+    run_parser.add_argument('--patch', action='store_true', help='바뀐 셀만 기록해 원본 엑셀 서식 유지 (market, trend, keyword)')
+    run_parser.add_argument('--gaps', action='store_true', help='산업규모가 비어 있는 셀만 좁은 프롬프트로 다시 조회 (market)')
+    run_parser.add_argument('--plan', help='check 명령이 만든 재조회 계획 CSV의 셀만 다시 조회 (market)')
+    run_parser.add_argument('--extend', help='새 조사 연도 열을 추가하고 그 연도만 조회 (예: 2025, market)')
+    run_parser.add_argument('--hierarchical', action='store_true',
+                            help='상위 분류를 먼저 조사하고 그 결과를 하위 품목 프롬프트에 참고 자료로 전달 (market)')
+    run_parser.add_argument('--dedup', type=float,
+                            help='이름·개념설명·상위 분류 경로가 이 유사도(0~1, 예: 0.9) 이상인 품목은 한 번만 조회하고 결과 공유')
+    run_parser.add_argument('--dedup-exclude', help="--dedup에서 묶지 않고 따로 조회할 엑셀 행 번호 (예: '3,11,20-25')")
+    run_parser.add_argument('--cache', help='API 응답 캐시 파일 (JSON Lines, 같은 요청은 다시 호출하지 않음, market·trend·keyword)')
+    run_parser.add_argument('--max-retries', type=int, default=3, help='API 요청 한 건의 최대 시도 횟수 (첫 호출 포함)')
+    run_parser.add_argument('--retry-budget', type=float, default=0.2,
+                            help='실행 전체 재시도 예산 (요청 수 대비 비율, 넘으면 더 이상 재시도하지 않음)')
+    run_parser.add_argument('--output', '-o', help='결과 파일 경로 (validate)')
+    run_parser.add_argument('--trace', help='단계별 소요 시간(span)을 저장할 JSON 파일')
+    run_parser.add_argument('--trace-format', choices=['chrome', 'otel'], default='chrome',
+                            help='추적 파일 형식 (chrome: chrome://tracing·Perfetto, otel: OpenTelemetry OTLP/JSON)')
+    run_parser.add_argument('--metrics-textfile', help='Prometheus 지표를 주기적으로 저장할 .prom 파일 (node-exporter textfile collector)')
+    run_parser.add_argument('--metrics-port', type=int, help='Prometheus 지표를 제공할 로컬 HTTP 포트 (/metrics)')
+    run_parser.add_argument('--metrics-interval', type=float, default=15, help='지표 파일 갱신 간격(초)')
+    run_parser.add_argument('--profile', help='샘플링 프로파일 결과를 저장할 파일 (collapsed stack 형식)')
+    run_parser.add_argument('--profile-interval', type=float, default=0.005, help='프로파일 샘플링 간격(초)')
+    run_parser.set_defaults(func=command_run)
+
+    queue_parser = subparsers.add_parser('queue', help='여러 컴퓨터가 나눠 처리할 작업 큐 관리')
+    queue_parser.add_argument('action', choices=['add', 'serve', 'status', 'retry'])
+    queue_parser.add_argument('pipeline', nargs='?', choices=list(QUEUE_PIPELINES), help='작업을 등록할 파이프라인 (add)')
+    queue_parser.add_argument('--queue', required=True, help='작업 큐 파일 (status는 큐 서버 주소도 가능)')
+    queue_parser.add_argument('--workbook', help='작업 엑셀 파일 (기본값: 파이프라인별 기본 파일)')
+    queue_parser.add_argument('--rows', help="등록할 엑셀 행 번호 (예: '3,11,20-25', 지정 시 이미 채워진 행도 등록)")
+    queue_parser.add_argument('--codes', help="등록할 품목 코드 접두어 (예: 'F01,F0203')")
+    queue_parser.add_argument('--host', default='127.0.0.1',
+                              help='큐 서버 주소 (serve, 다른 컴퓨터에서 접속하려면 0.0.0.0, 이때는 --token 필요)')
+    queue_parser.add_argument('--token',
+                              help='큐 서버 공유 토큰 (serve, 기본값: IDNOLAB_QUEUE_TOKEN 환경변수, 작업자도 같은 값을 설정)')
+    queue_parser.add_argument('--port', type=int, default=8800, help='큐 서버 포트 (serve)')
+    queue_parser.add_argument('--lease', type=float, default=600, help='작업자가 heartbeat 없이 작업을 잡아 둘 수 있는 시간(초)')
+    queue_parser.add_argument('--max-attempts', type=int, default=3, help='작업당 최대 임대 횟수 (넘으면 failed)')
+    queue_parser.set_defaults(func=command_queue)
+
+    export_parser = subparsers.add_parser('export', help='작업 파일 내보내기')
+    export_parser.add_argument('pipeline', choices=list(PIPELINES))
+    export_parser.add_argument('--workbook', help='작업 엑셀 파일 (기본값: 파이프라인별 기본 파일)')
+    export_parser.add_argument('--output', '-o', help='출력 파일 경로')
+    export_parser.add_argument('--format', choices=['csv', 'xlsx'], help='출력 형식 (기본값: 출력 파일 확장자, 없으면 csv)')
+    export_parser.add_argument('--max-rows', type=int, default=1_048_576, help='xlsx 시트 하나의 최대 행 수 (넘으면 다음 시트로 나눔)')
+    export_parser.set_defaults(func=command_export)
+
+    normalize_parser = subparsers.add_parser('normalize', help='시장 규모 값을 천 단위 숫자로 정규화')
+    normalize_parser.add_argument('--workbook', help='시장 규모 엑셀 파일 (기본값: item_info_3.xlsx)')
+    normalize_parser.add_argument('--output', '-o', help='출력 CSV 경로 (기본값: market_sizes.csv)')
+    normalize_parser.add_argument('--default-currency',
+                                  help='통화 표시가 없는 값의 통화 (기본값: 국내 KRW, 해외 USD)')
+    normalize_parser.add_argument('--fx-rates', help='연도별 환율 CSV (year,currency,krw_per_unit, 기본값: 패키지 포함 환율표)')
+    normalize_parser.set_defaults(func=command_normalize)
+
+    check_parser = subparsers.add_parser('check', help='시장 규모 결과 일관성 검사 및 재조회 계획 생성')
+    check_parser.add_argument('--workbook', help='시장 규모 엑셀 파일 (기본값: item_info_3.xlsx)')
+    check_parser.add_argument('--output', '-o', help='재조회 계획 CSV 경로 (기본값: requery_plan.csv)')
+    check_parser.add_argument('--max-ratio', type=float, default=3.0, help='연도 간 허용 배율 (넘으면 yoy_jump)')
+    check_parser.add_argument('--tolerance', type=float, default=0.3,
+                              help='하위 분류 합계와 상위 분류 값의 허용 오차 비율 (넘으면 children_sum_mismatch)')
+    check_parser.add_argument('--fx-rates', help='연도별 환율 CSV (기본값: 패키지 포함 환율표)')
+    check_parser.set_defaults(func=command_check)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,213 @@
+"""
+시장 규모 결과 일관성 검사와 재조회 계획
+
+idnolab.normalize / idnolab.fx로 정규화한 long 형식 표 전체에 대해 검사를 한 번에 수행하고,
+의심되는 셀만 (품목, 지역, 연도) 단위 재조회 계획으로 정리한다.
+main2.py처럼 행 번호 목록을 손으로 적어 품목 전체를 다시 조회하는 대신 해당 셀만 다시 요청할 수 있다.
+
+검사 항목:
+- yoy_jump: 같은 품목·지역의 연도별 값이 다른 해와 max_ratio배 이상 차이
+- domestic_gt_overseas: 원화 환산 국내 규모가 해외(글로벌) 규모보다 큼
+- estimate_mismatch: 추정여부가 없거나, 추정(True)인데 추정근거가 없거나, 실제(False)인데 근거가 추정을 설명
+- missing_reference: 값은 있는데 출처 URL이 없음
+- unparsed_value: 산업규모 값을 금액으로 해석하지 못함
+- children_sum_mismatch: 하위 분류 값이 모두 있는데 합계가 상위 분류 값과 tolerance 이상 차이
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from idnolab.normalize import STATUS_OK, STATUS_UNPARSED, MISSING_PATTERN
+from idnolab.taxonomy import nearest_ancestor
+
+# 재조회 계획 열
+PLAN_COLUMNS = ['code', 'code_name', 'region', 'year', 'checks']
+
+URL_PATTERN = re.compile(r'https?://', re.IGNORECASE)
+# 추정여부 불리언 표기 (소문자)
+_TRUE = ('true', '1', '1.0')
+_FALSE = ('false', '0', '0.0')
+
+
+def _missing(series):
+    # 빈 값 / '데이터 없음' 계열 (벡터 연산)
+    text = series.astype('string').str.strip()
+    return (text.isna() | (text == '') | text.str.fullmatch(MISSING_PATTERN).fillna(False)).to_numpy(dtype=bool)
+
+
+def _yoy_jump(table, ok, max_ratio):
+    """
+    같은 품목·지역 안에서 튀는 연도 값
+
+    값이 3개 이상이면 로그 중앙값에서 max_ratio배 이상 벗어난 값, 2개뿐이면 두 값 차이가
+    max_ratio배 이상일 때 뒤쪽 연도 값을 표시한다.
+    """
+    positive = ok & (table['krw_value'].to_numpy(dtype=float) > 0)
+    log_value = pd.Series(np.where(positive, np.log(table['krw_value'].where(positive, 1.0).to_numpy(dtype=float)), np.nan),
+                          index=table.index)
+    groups = log_value.groupby([table['code'], table['region']], dropna=False)
+    median = groups.transform('median').to_numpy()
+    count = groups.transform('count').to_numpy()
+    deviation = np.abs(log_value.to_numpy() - median)
+    limit = np.log(max_ratio)
+
+    year = pd.to_numeric(table['year'], errors='coerce')
+    last_year = year.where(positive).groupby([table['code'], table['region']], dropna=False).transform('max')
+    many = (count >= 3) & (deviation > limit)
+    pair = (count == 2) & (2 * deviation > limit) & (year == last_year).to_numpy()
+    return positive & (many | pair)
+
+
+def _domestic_gt_overseas(table, ok, jump):
+    """
+    같은 품목·연도에서 국내 규모 > 해외 규모
+
+    어느 쪽이 틀렸는지 알 수 없으므로 두 셀을 모두 표시하되, 둘 중 하나가 이미 yoy_jump이면
+    그 셀만 다시 조회하면 되므로 표시하지 않는다. 환율표로 원화 환산된 셀끼리만 비교한다.
+    """
+    converted = ok & ~np.isnan(table['fx_rate'].to_numpy(dtype=float))
+    krw = pd.Series(np.where(converted, table['krw_value'].to_numpy(dtype=float), np.nan), index=table.index)
+    keys = [table['code'], table['year']]
+    domestic = krw.where(table['region'] == '국내').groupby(keys, dropna=False).transform('max')
+    overseas = krw.where(table['region'] == '해외').groupby(keys, dropna=False).transform('max')
+    pair_jump = pd.Series(jump, index=table.index).groupby(keys, dropna=False).transform('max').to_numpy(dtype=bool)
+    return converted & (domestic > overseas).to_numpy() & ~pair_jump
+
+
+def _estimate_flags(series):
+    """
+    추정여부 값을 (추정, 실제) 불리언 배열로 변환
+
+    프롬프트는 True/False를 요구하므로 시트에는 불리언(또는 'True'/'False' 문자열)이 들어 있고,
+    예전 결과에는 '추정'/'실제금액' 표기도 남아 있어 둘 다 받는다.
+    """
+    text = series.astype('string').str.strip().str.lower()
+    estimated = (text.isin(_TRUE) | text.str.contains('추정', regex=False)).fillna(False).to_numpy(dtype=bool)
+    actual = (text.isin(_FALSE) | text.str.contains('실제', regex=False)).fillna(False).to_numpy(dtype=bool)
+    return estimated, actual & ~estimated
+
+
+def _estimate_mismatch(table, ok):
+    """추정여부와 추정근거가 서로 맞지 않는 셀"""
+    reason_missing = _missing(table['estimate_reason'])
+    flag_missing = _missing(table['is_estimated'])
+    estimated, actual = _estimate_flags(table['is_estimated'])
+    reason_estimates = (table['estimate_reason'].astype('string').str.contains('추정', regex=False)
+                        .fillna(False).to_numpy(dtype=bool))
+    return ok & (flag_missing | (estimated & reason_missing) | (actual & reason_estimates))
+
+
+def _missing_reference(table, ok):
+    """값은 있는데 출처 URL이 없는 셀"""
+    has_url = table['reference'].astype('string').str.contains(URL_PATTERN).fillna(False).to_numpy(dtype=bool)
+    return ok & ~has_url
+
+
+def rollup_table(table):
+    """
+    상위 분류 값과 바로 아래 하위 분류 합계 비교표
+
+    Args:
+        table (pd.DataFrame): idnolab.fx.to_krw(market_size_table(df)) 결과
+
+    Returns:
+        pd.DataFrame: code, code_name, region, year, krw_value, children_sum, children, children_ok, ratio
+    """
+    table = table.reset_index(drop=True)
+    codes = table['code'].astype('string').str.strip()
+    known = set(codes.dropna())
+    parents = {code: nearest_ancestor(code, known) for code in known}
+    ok = (table['status'].to_numpy(dtype=object) == STATUS_OK) & ~np.isnan(table['krw_value'].to_numpy(dtype=float))
+
+    children = pd.DataFrame({
+        'code': codes.map(parents),
+        'region': table['region'],
+        'year': table['year'],
+        'krw_value': table['krw_value'].where(ok),
+        'ok': ok,
+    }).dropna(subset=['code'])
+    sums = (children.groupby(['code', 'region', 'year'], sort=False)
+            .agg(children_sum=('krw_value', 'sum'), children=('ok', 'size'), children_ok=('ok', 'sum'))
+            .reset_index())
+
+    parent = table.loc[ok, ['code', 'code_name', 'region', 'year', 'krw_value']].assign(code=codes[ok])
+    rollup = parent.merge(sums, on=['code', 'region', 'year'], how='inner')
+    rollup['ratio'] = rollup['children_sum'] / rollup['krw_value'].where(rollup['krw_value'] > 0)
+    return rollup
+
+
+def _children_sum_mismatch(table, tolerance):
+    """하위 분류 값이 모두 있는데 합계가 상위 분류 값에서 tolerance 비율 이상 벗어난 상위 셀"""
+    rollup = rollup_table(table)
+    complete = rollup['children_ok'] == rollup['children']
+    off = complete & ((rollup['ratio'] - 1).abs() > tolerance)
+    flagged = set(rollup.loc[off, ['code', 'region', 'year']].itertuples(index=False, name=None))
+    keys = zip(table['code'].astype('string').str.strip(), table['region'], table['year'])
+    return np.fromiter((key in flagged for key in keys), dtype=bool, count=len(table))
+
+
+def check_consistency(table, max_ratio=3.0, tolerance=0.3):
+    """
+    정규화된 시장 규모 표 전체 검사
+
+    Args:
+        table (pd.DataFrame): idnolab.fx.to_krw(market_size_table(df)) 결과
+        max_ratio (float): 연도 간 허용 배율 (넘으면 yoy_jump)
+        tolerance (float): 하위 분류 합계 / 상위 분류 값의 허용 오차 (넘으면 children_sum_mismatch)
+
+    Returns:
+        pd.DataFrame: 검사에 걸린 셀 (code, code_name, region, year, check, raw)
+    """
+    table = table.reset_index(drop=True)
+    status = table['status'].to_numpy(dtype=object)
+    ok = (status == STATUS_OK) & ~np.isnan(table['krw_value'].to_numpy(dtype=float))
+
+    jump = _yoy_jump(table, ok, max_ratio)
+    checks = {
+        'yoy_jump': jump,
+        'domestic_gt_overseas': _domestic_gt_overseas(table, ok, jump),
+        'estimate_mismatch': _estimate_mismatch(table, status == STATUS_OK),
+        'missing_reference': _missing_reference(table, status == STATUS_OK),
+        'unparsed_value': status == STATUS_UNPARSED,
+        'children_sum_mismatch': _children_sum_mismatch(table, tolerance),
+    }
+    frames = []
+    for name, mask in checks.items():
+        if mask.any():
+            frame = table.loc[mask, ['code', 'code_name', 'region', 'year', 'raw']].copy()
+            frame.insert(4, 'check', name)
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=['code', 'code_name', 'region', 'year', 'check', 'raw'])
+    return pd.concat(frames).sort_index(kind='stable').reset_index(drop=True)
+
+
+def requery_plan(issues):
+    """
+    검사 결과를 (품목, 지역, 연도) 단위 재조회 계획으로 정리
+
+    Returns:
+        pd.DataFrame: code, code_name, region, year, checks(';'로 연결한 검사 이름)
+    """
+    if issues.empty:
+        return pd.DataFrame(columns=PLAN_COLUMNS)
+    plan = (issues.groupby(['code', 'code_name', 'region', 'year'], sort=False, dropna=False)['check']
+            .agg(';'.join).reset_index(name='checks'))
+    return plan[PLAN_COLUMNS]
+
+
+def load_plan(path):
+    """
+    저장된 재조회 계획 CSV 읽기
+
+    같은 이름의 품목이 여러 행에 있으므로 품목 코드(코드가 없는 행은 행 인덱스)로 구분한다.
+
+    Returns:
+        dict[str, list[tuple[str, str]]]: {품목 코드: [(지역, 연도), ...]}
+    """
+    plan = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+    cells = {}
+    for code, region, year in plan[['code', 'region', 'year']].itertuples(index=False, name=None):
+        cells.setdefault(str(code).strip(), []).append((region, year))
+    return cells
@@ -0,0 +1,165 @@
+"""
+유사 품목 묶기 (MinHash 문자 n-gram 유사도)
+
+'시스템', '업무용', '개방형'처럼 여러 상위 분류 아래 같은(또는 거의 같은) 이름·개념설명으로
+반복되는 품목을 묶어 묶음마다 대표 품목 하나만 조회하고 결과를 나머지 행에 그대로 기록한다.
+
+품목 텍스트(품목명 | 개념설명 | 상위 분류 경로)의 문자 n-gram 집합에 MinHash 서명을 만들고,
+LSH 밴드로 후보 쌍을 찾은 뒤 서명으로 추정한 Jaccard 유사도가 threshold 이상인 쌍만 묶는다.
+
+    from idnolab.dedup import share_tasks
+
+    tasks = share_tasks(tasks, names, threshold=0.9)  # 대표 task.row['members']에 나머지 행
+"""
+import zlib
+
+import numpy as np
+
+from logger_config import get_logger
+from idnolab.taxonomy import parent_code
+
+# 로거 설정
+logger = get_logger("dedup")
+
+# MinHash 해시 함수 수 / LSH 밴드 수 (밴드당 행 수 = NUM_PERM // BANDS)
+NUM_PERM = 128
+BANDS = 32
+# 문자 n-gram 길이
+SHINGLE_SIZE = 3
+
+# splitmix64 상수
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix(values):
+    """splitmix64 마무리 단계 (uint64 곱셈은 자리 넘침을 그대로 버림)"""
+    values = (values ^ (values >> np.uint64(30))) * _MIX1
+    values = (values ^ (values >> np.uint64(27))) * _MIX2
+    return values ^ (values >> np.uint64(31))
+
+
+def item_text(code_name, description, parent_path=()):
+    """유사도 비교에 쓰는 품목 텍스트 (공백 정리)"""
+    parts = [code_name, description, ' > '.join(parent_path)]
+    return ' | '.join(' '.join(str(part).split()) for part in parts if part is not None and part == part)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """문자 n-gram 해시 배열 (텍스트가 size보다 짧으면 텍스트 전체 하나)"""
+    text = text.lower()
+    grams = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(texts, num_perm=NUM_PERM, seed=0):
+    """
+    텍스트별 MinHash 서명
+
+    Returns:
+        np.ndarray: (텍스트 수, num_perm) uint64 배열
+    """
+    # 해시 함수마다 다른 seed를 섞은 뒤 splitmix64로 흩뜨려 서로 독립적인 순열처럼 사용
+    seeds = np.random.default_rng(seed).integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64,
+                                                 endpoint=True)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for i, text in enumerate(texts):
+            signatures[i] = _mix(seeds[:, None] ^ shingles(text)[None, :]).min(axis=1)
+    return signatures
+
+
+def cluster(signatures, threshold, bands=BANDS, exclude=()):
+    """
+    MinHash 서명을 유사도 threshold 기준으로 묶음
+
+    Args:
+        signatures (np.ndarray): minhash() 결과
+        threshold (float): 추정 Jaccard 유사도 하한 (0~1)
+        bands (int): LSH 밴드 수
+        exclude (Container[int]): 묶지 않고 혼자 두는 위치
+
+    Returns:
+        list[int]: 위치별 대표 위치 (묶음 안에서 가장 앞선 위치)
+    """
+    count, num_perm = signatures.shape
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = max(1, num_perm // bands)
+    for start in range(0, num_perm, rows):
+        buckets = {}
+        for i, band in enumerate(map(bytes, signatures[:, start:start + rows])):
+            if i not in exclude:
+                buckets.setdefault(band, []).append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root_first, root_other = find(first), find(other)
+                if root_first == root_other:
+                    continue
+                if np.mean(signatures[first] == signatures[other]) >= threshold:
+                    # 앞선 위치를 대표로 유지
+                    parent[max(root_first, root_other)] = min(root_first, root_other)
+    return [find(i) for i in range(count)]
+
+
+def parent_path(code, names):
+    """상위 분류 이름 경로 (대분류부터, 시트에 없는 단계는 건너뜀)"""
+    path = []
+    code = parent_code(code)
+    while code is not None:
+        if code in names:
+            path.append(names[code])
+        code = parent_code(code)
+    return path[::-1]
+
+
+def share_tasks(tasks, names, threshold, exclude_rows=None):
+    """
+    유사 품목을 묶어 대표 작업만 내보내는 생성기
+
+    대표 작업의 task.row['members']에 결과를 함께 기록할 나머지 작업 목록이 들어 있다 (없으면 빈 목록).
+
+    Args:
+        tasks (Iterable[Task]): sheet_tasks() 결과
+        names (dict[str, str]): {품목 코드: 품목명} (상위 분류 경로용)
+        threshold (float): 추정 Jaccard 유사도 하한
+        exclude_rows (set[int]): 묶지 않고 따로 조회할 엑셀 행 번호
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+    texts = [
+        item_text(task.row['code_name'], task.row.get('개념설명'), parent_path(task.key, names))
+        for task in tasks
+    ]
+    exclude = {i for i, task in enumerate(tasks) if exclude_rows and task.row['index'] + 2 in exclude_rows}
+    representatives = cluster(minhash(texts), threshold, exclude=exclude)
+
+    groups = {}
+    for task, representative in zip(tasks, representatives):
+        groups.setdefault(representative, []).append(task)
+    shared = len(tasks) - len(groups)
+    logger.info(f"유사 품목 묶기: {len(tasks)}개 → {len(groups)}개 요청 "
+                f"({shared}개 결과 공유, 중복률 {shared / len(tasks):.1%})")
+
+    for members in groups.values():
+        representative, others = members[0], members[1:]
+        representative.row['members'] = others
+        if others:
+            logger.debug(f"{representative.key} 결과 공유: {[task.key for task in others]}")
+        yield representative
+
+
+def code_names(path, sheet_name=None):
+    """작업 시트의 {품목 코드: 품목명}"""
+    from idnolab.source import sheet_tasks
+
+    return {task.key: task.row['code_name'] for task in sheet_tasks(path, [], sheet_name=sheet_name)
+            if isinstance(task.key, str)}
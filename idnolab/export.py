@@ -0,0 +1,144 @@
+"""
+쓰기 전용(write-only) 엑셀 내보내기
+
+df.to_excel은 통합 문서 전체를 openpyxl 셀 객체로 메모리에 만든 뒤 저장한다.
+여기서는 openpyxl write_only 모드로 행을 하나씩 흘려 쓰므로 행 수와 관계없이
+메모리 사용량이 일정하다. 원본 시트의 열 너비를 유지하고, 머리글 서식(굵게, 틀 고정)을 적용하며,
+시트 최대 행 수를 넘으면 다음 시트로 나눠 쓴다.
+"""
+import os
+import zipfile
+from xml.etree import ElementTree
+
+from idnolab.source import sheet_rows
+
+# 엑셀 시트 최대 행 수 (머리글 포함)
+EXCEL_MAX_ROWS = 1_048_576
+
+SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+def column_widths(path, sheet_name=None):
+    """
+    원본 시트의 열 너비를 읽음
+
+    openpyxl 읽기 전용 모드는 열 너비를 읽지 않으므로 시트 XML의 <cols> 부분만 직접 파싱한다.
+
+    Returns:
+        dict[int, float]: {열 번호(1부터): 너비}
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        worksheet_path = sheet._worksheet_path
+    finally:
+        workbook.close()
+
+    widths = {}
+    with zipfile.ZipFile(path) as archive, archive.open(worksheet_path) as f:
+        for _, element in ElementTree.iterparse(f, events=('start',)):
+            if element.tag == f'{SPREADSHEET_NS}col' and element.get('width'):
+                for column in range(int(element.get('min')), int(element.get('max')) + 1):
+                    widths[column] = float(element.get('width'))
+            elif element.tag == f'{SPREADSHEET_NS}sheetData':
+                # 열 정의는 셀 데이터보다 앞에 있으므로 여기서 중단
+                break
+    return widths
+
+
+def _clean(value):
+    # pandas의 NaN은 빈 셀로 저장 (to_excel과 동일)
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def write_workbook(path, columns, rows, sheet_name='Sheet1', widths=None, max_rows=EXCEL_MAX_ROWS):
+    """
+    행을 쓰기 전용 모드로 엑셀 파일에 저장
+
+    저장 도중 중단되어도 기존 파일이 깨지지 않도록 임시 파일에 쓴 뒤 교체한다.
+
+    Args:
+        path (str): 저장할 엑셀 파일 경로
+        columns (list[str]): 열 이름 ('Unnamed: n' 형태는 원본처럼 빈 머리글로 저장)
+        rows (iterable): 행 값 목록 (열 순서와 같은 순서의 시퀀스)
+        sheet_name (str): 시트 이름 (나눠 쓰면 '이름_2', '이름_3' ...)
+        widths (dict[int, float]): 열 번호별 너비
+        max_rows (int): 시트 하나의 최대 행 수 (머리글 포함)
+
+    Returns:
+        int: 저장한 데이터 행 수
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    header_font = Font(bold=True)
+
+    def add_sheet(part):
+        sheet = workbook.create_sheet(sheet_name if part == 1 else f"{sheet_name}_{part}")
+        # 열 너비와 틀 고정은 첫 행을 쓰기 전에 지정해야 함
+        for column, width in (widths or {}).items():
+            sheet.column_dimensions[get_column_letter(column)].width = width
+        sheet.freeze_panes = 'A2'
+        header = []
+        for name in columns:
+            cell = WriteOnlyCell(sheet, value=None if str(name).startswith('Unnamed: ') else name)
+            cell.font = header_font
+            header.append(cell)
+        sheet.append(header)
+        return sheet
+
+    part = 1
+    sheet = add_sheet(part)
+    sheet_rows_count = 1
+    count = 0
+    for row in rows:
+        if sheet_rows_count >= max_rows:
+            part += 1
+            sheet = add_sheet(part)
+            sheet_rows_count = 1
+        sheet.append([_clean(value) for value in row])
+        sheet_rows_count += 1
+        count += 1
+
+    temp_path = f"{path}.{os.getpid()}.tmp.xlsx"
+    try:
+        workbook.save(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return count
+
+
+def write_dataframe(path, df, sheet_name='Sheet1', widths=None):
+    """DataFrame을 쓰기 전용 모드로 저장 (df.to_excel(index=False) 대체)"""
+    return write_workbook(path, list(df.columns), df.itertuples(index=False, name=None), sheet_name, widths)
+
+
+def export_workbook(source_path, output_path, sheet_name=None, max_rows=EXCEL_MAX_ROWS):
+    """
+    작업 파일을 최종 산출물 엑셀로 스트리밍 복사 (읽기 전용 → 쓰기 전용)
+
+    Returns:
+        int: 내보낸 데이터 행 수
+    """
+    widths = column_widths(source_path, sheet_name)
+    rows = sheet_rows(source_path, sheet_name=sheet_name)
+    first = next(rows, None)
+    if first is None:
+        return write_workbook(output_path, [], [], widths=widths)
+    columns = list(first[1])
+
+    def values():
+        yield list(first[1].values())
+        for _, record in rows:
+            yield list(record.values())
+
+    return write_workbook(output_path, columns, values(), widths=widths, max_rows=max_rows)
@@ -0,0 +1,111 @@
+"""
+연도별 환율표와 원화 환산
+
+프롬프트는 국내 시장 규모를 원화, 해외 시장 규모를 달러로 요구하므로 시트에는 두 통화가 섞여 있다.
+idnolab/data/fx_rates.csv(연평균 환율, 버전 표기 포함)를 읽어 idnolab.normalize의 정규화 결과에
+원화 환산 열을 한 번에 붙인다. 국내/해외 값을 같은 단위로 비교·합산할 수 있고 LLM 재호출이 필요 없다.
+
+    from idnolab.normalize import market_size_table
+    from idnolab.fx import to_krw, compare_regions
+
+    table = to_krw(market_size_table(df))
+    compare_regions(table)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from idnolab.normalize import REGION_CURRENCY
+
+# 기본 환율표 (연도, 통화, 외화 1단위당 원화)
+FX_RATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fx_rates.csv')
+
+
+def _read_version(path):
+    # 파일 앞쪽의 '# version: ...' 주석에서 버전을 읽음
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.startswith('#'):
+                break
+            key, _, value = line[1:].partition(':')
+            if key.strip() == 'version':
+                return value.strip()
+    return None
+
+
+def load_fx_rates(path=None):
+    """
+    환율표 읽기
+
+    Args:
+        path (str): 환율 CSV 경로 (기본값: 패키지에 포함된 fx_rates.csv)
+
+    Returns:
+        pd.DataFrame: year(int), currency, krw_per_unit (attrs['version']에 환율표 버전)
+    """
+    path = path or FX_RATES_PATH
+    rates = pd.read_csv(path, comment='#', dtype={'year': int, 'currency': str, 'krw_per_unit': float})
+    rates['currency'] = rates['currency'].str.strip().str.upper()
+    rates = rates.sort_values(['year', 'currency']).reset_index(drop=True)
+    rates.attrs['version'] = _read_version(path)
+    return rates
+
+
+def to_krw(table, rates=None):
+    """
+    정규화된 시장 규모 표에 원화 환산 열을 추가
+
+    환율표에 없는 연도는 같은 통화의 가장 가까운 연도 환율을 사용한다.
+    통화가 비어 있는 행은 region 열이 있으면 지역 통화(국내 KRW, 해외 USD)로 환산한다.
+
+    Args:
+        table (pd.DataFrame): year, value(천 단위), currency(, region) 열이 있는 표 (market_size_table 결과)
+        rates (pd.DataFrame): load_fx_rates 결과 (기본값: 패키지 환율표)
+
+    Returns:
+        pd.DataFrame: table에 fx_rate, krw_value(천원), fx_version 열을 추가한 표 (행 순서 유지)
+    """
+    rates = load_fx_rates() if rates is None else rates
+    result = table.copy()
+    if result.empty:
+        result['fx_rate'] = pd.Series(dtype=float)
+        result['krw_value'] = pd.Series(dtype=float)
+        result['fx_version'] = rates.attrs.get('version')
+        return result
+
+    currency = result['currency']
+    if 'region' in result.columns:
+        currency = currency.fillna(result['region'].map(REGION_CURRENCY))
+    keys = pd.DataFrame({
+        'position': np.arange(len(result)),
+        'year': pd.to_numeric(result['year'], errors='coerce').fillna(-1).astype(int).to_numpy(),
+        'currency': currency.fillna('').astype(str).str.upper().to_numpy(),
+    }).sort_values('year')
+    matched = pd.merge_asof(keys, rates[['year', 'currency', 'krw_per_unit']].sort_values('year'),
+                            on='year', by='currency', direction='nearest')
+    fx_rate = np.full(len(result), np.nan)
+    fx_rate[matched['position'].to_numpy()] = matched['krw_per_unit'].to_numpy(dtype=float)
+
+    result['fx_rate'] = fx_rate
+    result['krw_value'] = result['value'].to_numpy(dtype=float) * fx_rate
+    result['fx_version'] = rates.attrs.get('version')
+    return result
+
+
+def compare_regions(table):
+    """
+    품목·연도별 국내/해외 원화 환산 규모 비교표
+
+    Args:
+        table (pd.DataFrame): to_krw 결과
+
+    Returns:
+        pd.DataFrame: code, code_name, year, 국내, 해외(천원), domestic_share(국내 / 해외)
+    """
+    wide = (table.groupby(['code', 'code_name', 'year', 'region'], sort=False, dropna=False)['krw_value']
+            .first().unstack('region'))
+    wide = wide.reindex(columns=['국내', '해외']).reset_index()
+    wide.columns.name = None
+    wide['domestic_share'] = wide['국내'] / wide['해외'].replace(0, np.nan)
+    return wide
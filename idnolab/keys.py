@@ -0,0 +1,240 @@
+"""
+API 키 풀 (키별 속도 제한 / 상태 / 사용량 추적)
+
+여러 API 키(또는 프로젝트)를 등록해 두면 호출마다 여유가 가장 많은 키로 보내므로,
+대량 재조사 때 처리량이 키 수만큼 늘어난다.
+
+- 키 목록: GOOGLE_API_KEYS / PERPLEXITY_API_KEYS 환경변수 (쉼표 구분) 또는 키 파일 (한 줄에 하나),
+  없으면 기존 GOOGLE_API_KEY / PERPLEXITY_API_KEY 하나
+- 'project:key'처럼 프로젝트를 붙이면 같은 프로젝트의 키들은 속도 제한 버킷 하나를 나눠 쓴다
+  (Gemini 할당량은 프로젝트 단위)
+- 키마다 idnolab.ratelimit 제한기를 두고, 다음 호출까지 기다릴 시간이 가장 짧은 키를 고른다
+- 인증 오류가 난 키는 실행이 끝날 때까지, 할당량이 소진된 키는 QUOTA_QUARANTINE 초 동안 격리하고
+  다른 키로 바로 다시 보낸다. 쓸 수 있는 키가 없으면 실행을 중단 (QuotaExhausted)
+
+    from idnolab.keys import key_pool
+
+    pool = key_pool('gemini', 'gemini-2.5-pro', rpm=6)
+    text = pool.call(request_gemini, prompt)  # request_gemini(prompt, api_key=...)
+"""
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from logger_config import get_logger
+from idnolab import metrics
+from idnolab.pipeline import AbortRun
+from idnolab.ratelimit import estimate_tokens, key_id, limiter
+from idnolab.resilience import ABORT, QuotaExhausted, classify, status_code
+
+# 로거 설정
+logger = get_logger("keys")
+
+# 제공자별 키 환경변수 (여러 개, 하나)
+KEY_ENV = {
+    'gemini': ('GOOGLE_API_KEYS', 'GOOGLE_API_KEY'),
+    'perplexity': ('PERPLEXITY_API_KEYS', 'PERPLEXITY_API_KEY'),
+}
+# 할당량이 소진된 키를 다시 써 보기까지 격리하는 시간(초)
+QUOTA_QUARANTINE = 3600.0
+
+# 인증 실패로 보는 응답 문구 (그 밖의 실행 중단 오류는 할당량 소진으로 봄)
+_AUTH_MARKERS = ('api key not valid', 'permission_denied', 'unauthenticated', 'api_key_invalid')
+
+# 키 파일 경로 (--keys, 환경변수보다 우선)
+_key_files = {}
+
+
+def parse_keys(text):
+    """쉼표 또는 줄바꿈으로 구분한 'key' / 'project:key' 목록 (# 주석 무시)"""
+    keys = []
+    for line in text.replace(',', '\n').splitlines():
+        entry = line.split('#', 1)[0].strip()
+        if entry:
+            project, _, key = entry.rpartition(':')
+            keys.append((key.strip(), project.strip() or None))
+    return keys
+
+
+def load_keys(provider):
+    """
+    제공자의 API 키 목록
+
+    Returns:
+        list[tuple[str, str or None]]: [(키, 프로젝트), ...] (키가 하나도 없으면 [(None, None)])
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    pool_env, single_env = KEY_ENV.get(provider, (None, None))
+    if provider in _key_files:
+        with open(_key_files[provider], encoding='utf-8') as f:
+            keys = parse_keys(f.read())
+    elif pool_env and os.getenv(pool_env):
+        keys = parse_keys(os.getenv(pool_env))
+    else:
+        keys = [(os.getenv(single_env) if single_env else None, None)]
+    # 같은 키를 두 번 적은 경우 하나만 사용
+    return list(dict((key, (key, project)) for key, project in keys).values()) or [(None, None)]
+
+
+def configure(keys=None, provider='gemini'):
+    """키 파일 설정 (이후 처음 만드는 키 풀부터 적용)"""
+    if keys:
+        _key_files[provider] = os.path.abspath(os.path.expanduser(keys))
+
+
+def is_auth_error(error):
+    """인증 실패(잘못된 키, 권한 없음) 여부"""
+    return status_code(error) in (401, 403) or any(marker in str(error).lower() for marker in _AUTH_MARKERS)
+
+
+class ApiKey:
+    """풀에 등록된 키 하나의 상태"""
+
+    def __init__(self, key, project, rate):
+        self.key = key
+        self.project = project
+        self.id = key_id(key)
+        self.limiter = rate
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.tokens = 0
+        self.quarantined_until = 0.0
+        self.reason = None
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.quarantined_until
+
+    def describe(self):
+        return f"{self.id}" + (f" ({self.project})" if self.project else "")
+
+
+class KeyPool:
+    """
+    여러 API 키에 호출을 나눠 보내는 풀
+
+    Args:
+        provider (str): API 제공자
+        model (str): 모델 이름
+        keys (list[tuple[str, str]]): [(키, 프로젝트), ...] (기본값: load_keys(provider))
+        limit (bool): False면 속도 제한기 차례를 기다리지 않음 (키 분배·격리·사용량 집계만 함)
+        **options: 키별 속도 제한기 인자 (rpm, tpm, max_rpm 등)
+    """
+
+    def __init__(self, provider, model=None, keys=None, limit=True, **options):
+        self.provider = provider
+        self.model = model
+        self.limit = limit
+        self.keys = [
+            # 같은 프로젝트의 키는 속도 제한기(버킷) 하나를 나눠 씀
+            ApiKey(key, project, limiter(provider, model, api_key=project or key or '', **options))
+            for key, project in (keys or load_keys(provider))
+        ]
+        self._lock = threading.Lock()
+        if len(self.keys) > 1:
+            logger.info(f"[{provider}] API 키 {len(self.keys)}개 사용: {', '.join(k.describe() for k in self.keys)}")
+
+    def choose(self):
+        """다음 호출까지 기다릴 시간이 가장 짧은 정상 키 (없으면 QuotaExhausted)"""
+        with self._lock:
+            healthy = [entry for entry in self.keys if entry.healthy]
+            if not healthy:
+                reasons = '; '.join(f"{entry.describe()}: {entry.reason}" for entry in self.keys)
+                raise QuotaExhausted(f"[{self.provider}] 사용할 수 있는 API 키 없음 ({reasons})")
+            entry = min(healthy, key=lambda e: (e.limiter.ready_in(), e.in_flight, -e.limiter.rpm))
+            entry.in_flight += 1
+            return entry
+
+    def quarantine(self, entry, error):
+        """인증 실패 키는 실행 끝까지, 할당량 소진 키는 QUOTA_QUARANTINE 초 동안 제외"""
+        auth = is_auth_error(error)
+        with self._lock:
+            entry.quarantined_until = float('inf') if auth else time.monotonic() + QUOTA_QUARANTINE
+            entry.reason = '인증 실패' if auth else '할당량 소진'
+            remaining = sum(1 for other in self.keys if other.healthy)
+        metrics.API_KEY_REQUESTS.inc(key=entry.id, status='quarantined')
+        logger.error(f"[{self.provider}] API 키 {entry.describe()} 격리 ({entry.reason}, 남은 키 {remaining}개): {error}")
+
+    def call(self, func, *args, **kwargs):
+        """
+        고른 키로 func(*args, api_key=키, **kwargs)를 호출
+
+        실행 중단 오류(인증 실패·할당량 소진)는 그 키를 격리하고 다른 키로 바로 다시 보낸다.
+        """
+        while True:
+            entry = self.choose()
+            tokens = estimate_tokens(*args)
+            try:
+                with entry.limiter.slot(tokens if entry.limiter.tpm else 0) if self.limit else nullcontext():
+                    if entry.key is not None:
+                        kwargs['api_key'] = entry.key
+                    result = func(*args, **kwargs)
+            except Exception as e:
+                self._record(entry, tokens, e)
+                if classify(e) == ABORT and not isinstance(e, AbortRun):
+                    self.quarantine(entry, e)
+                    continue
+                raise
+            self._record(entry, tokens)
+            return result
+
+    def observe_headers(self, api_key, headers):
+        """응답 헤더의 할당량 정보를 그 키의 속도 제한기에 반영"""
+        for entry in self.keys:
+            if entry.key == api_key:
+                entry.limiter.observe_headers(headers)
+                return
+
+    def _record(self, entry, tokens, error=None):
+        with self._lock:
+            entry.in_flight -= 1
+            entry.requests += 1
+            entry.tokens += tokens
+            if error is not None:
+                entry.failures += 1
+        status = 'ok' if error is None else metrics.classify_error(error)
+        metrics.API_KEY_REQUESTS.inc(key=entry.id, status=status)
+        metrics.API_KEY_TOKENS.inc(tokens, key=entry.id)
+
+    def usage(self):
+        """키별 사용량 {키 식별자: {requests, failures, tokens, rpm, healthy}} (속도 제한이 없으면 rpm은 None)"""
+        with self._lock:
+            return {
+                entry.id: {'project': entry.project, 'requests': entry.requests, 'failures': entry.failures,
+                           'tokens': entry.tokens, 'rpm': round(entry.limiter.rpm, 1) if self.limit else None, 'healthy': entry.healthy}
+                for entry in self.keys
+            }
+
+
+# (제공자, 모델)별 키 풀
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pools():
+    """지금까지 만든 키 풀 목록"""
+    with _pools_lock:
+        return list(_pools.values())
+
+
+def key_pool(provider, model=None, **options):
+    """(제공자, 모델)별 키 풀 (처음 부를 때 options로 생성)"""
+    name = f"{provider}:{model}" if model else provider
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = KeyPool(provider, model, **options)
+        return _pools[name]
+
+
+def pooled(request, provider, model=None, **options):
+    """요청 함수를 키 풀을 거쳐 호출하도록 감쌈 (request는 api_key 키워드 인자를 받아야 함)"""
+    pool = key_pool(provider, model, **options)
+
+    def call(*args, **kwargs):
+        return pool.call(request, *args, **kwargs)
+
+    return call
@@ -0,0 +1,326 @@
+"""
+Prometheus 형식 실행 지표 (counter / gauge / histogram)
+
+오래 걸리는 조사 작업의 진행 상황을 로그 대신 지표로 확인하기 위한 모듈.
+지표는 두 가지 방법으로 내보낼 수 있다.
+
+- node-exporter textfile collector: write_textfile() / TextfileExporter가 .prom 파일을 주기적으로 갱신
+- HTTP: serve(port)로 http://127.0.0.1:port/metrics 제공
+
+    from idnolab import metrics
+
+    metrics.ITEMS.inc(pipeline='trend', stage='call', status='processed')
+    with metrics.STAGE_DURATION.time(pipeline='trend', stage='call'):
+        ...
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logger_config import get_logger
+
+# 로거 설정
+logger = get_logger("metrics")
+
+# 기본 히스토그램 구간(초): API 호출(수 초~수 분)과 엑셀 저장(수십 ms~수 초)을 함께 볼 수 있게 설정
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """지표 공통 부분 (이름, 설명, 라벨별 값)"""
+
+    kind = None
+
+    def __init__(self, name, documentation, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.extend(self._render_value(labels, value))
+        return lines
+
+    def _render_value(self, labels, value):
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    """증가만 하는 누적 값"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """현재 값 (증감 가능)"""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_to_current_time(self, **labels):
+        self.set(time.time(), **labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """구간별 관측 횟수와 합계 (지연 시간 분포용)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, registry)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """with 블록의 소요 시간을 관측"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state['count'] if state else 0
+
+    def _render_value(self, labels, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state['counts']):
+            cumulative += count
+            bucket_labels = labels + (('le', _format_value(bound)),)
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {state['count']}")
+        return lines
+
+
+class Registry:
+    """지표 모음"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"이미 등록된 지표입니다: {metric.name}")
+        self.metrics[metric.name] = metric
+
+    def render(self):
+        """Prometheus text exposition 형식 문자열"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# 파이프라인 지표
+ITEMS = Counter('idnolab_items_total', '단계별 처리 결과 (status: processed, failed)')
+STAGE_DURATION = Histogram('idnolab_stage_duration_seconds', '단계 함수 실행 시간 (stage=call이면 API 지연)')
+ERRORS = Counter('idnolab_errors_total', '단계 실패 유형 (kind: rate_limited, server_error, timeout, other)')
+QUEUE_DEPTH = Gauge('idnolab_queue_depth', '단계 입력 큐에 쌓인 작업 수')
+LAST_SUCCESS = Gauge('idnolab_last_success_timestamp_seconds', '마지막으로 항목 처리를 마친 시각 (정체 감지용)')
+RUN_STARTED = Gauge('idnolab_run_started_timestamp_seconds', '파이프라인 실행 시작 시각')
+
+# 외부 API 지표
+API_REQUESTS = Counter('idnolab_api_requests_total', 'API 요청 수 (status: ok, rate_limited, error)')
+API_LATENCY = Histogram('idnolab_api_latency_seconds', 'API 요청 지연 시간')
+API_RETRIES = Counter('idnolab_api_retries_total', 'API 재시도 횟수')
+CIRCUIT_OPEN = Counter('idnolab_circuit_open_total', '서킷 브레이커가 열린 횟수 (breaker: 제공자:모델)')
+API_KEY_REQUESTS = Counter('idnolab_api_key_requests_total', 'API 키별 요청 수 (key: 키 식별자, status: ok, rate_limited, quarantined 등)')
+API_KEY_TOKENS = Counter('idnolab_api_key_tokens_total', 'API 키별 사용 토큰 추정치 (key: 키 식별자)')
+RATE_LIMIT = Gauge('idnolab_rate_limit_rpm', '적응형 속도 제한기의 현재 분당 요청 수 (limiter: 제공자:모델:키)')
+
+# 캐시 / URL 검사 / 엑셀 저장 지표
+CACHE_REQUESTS = Counter('idnolab_cache_requests_total', '응답 캐시 조회 (result: hit, miss)')
+COALESCED = Counter('idnolab_coalesced_requests_total', '진행 중인 같은 요청의 결과를 공유한 횟수')
+URL_CHECKS = Counter('idnolab_url_checks_total', 'URL 검사 결과 (result: 검사 결과 문자열)')
+EXCEL_FLUSH = Histogram('idnolab_excel_flush_seconds', '엑셀 파일 저장 시간')
+
+
+def classify_error(error):
+    """
+    예외를 지표 라벨용 유형으로 분류
+
+    Returns:
+        str: 'rate_limited', 'server_error', 'timeout', 'other' 중 하나
+    """
+    status = getattr(error, 'code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    text = str(error)
+    if status == 429 or '429' in text or 'RESOURCE_EXHAUSTED' in text:
+        return 'rate_limited'
+    if isinstance(status, int) and status >= 500:
+        return 'server_error'
+    if isinstance(error, TimeoutError) or 'timeout' in text.lower() or 'timed out' in text.lower():
+        return 'timeout'
+    return 'other'
+
+
+@contextmanager
+def observe_api(api):
+    """
+    외부 API 요청 한 번의 지연 시간과 결과를 기록
+
+    Args:
+        api (str): API 이름 (예: 'gemini', 'perplexity')
+    """
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except Exception as e:
+        status = 'rate_limited' if classify_error(e) == 'rate_limited' else 'error'
+        raise
+    finally:
+        API_LATENCY.observe(time.perf_counter() - started, api=api)
+        API_REQUESTS.inc(api=api, status=status)
+
+
+def write_textfile(path, registry=None):
+    """
+    node-exporter textfile collector용 파일 저장
+
+    수집 도중 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체한다.
+    """
+    registry = registry or REGISTRY
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(temp_path, path)
+
+
+class TextfileExporter:
+    """
+    일정 간격으로 지표 파일을 갱신하는 백그라운드 스레드
+
+    Args:
+        path (str): .prom 파일 경로 (node-exporter --collector.textfile.directory 안)
+        interval (float): 갱신 간격(초)
+    """
+
+    def __init__(self, path, interval=15, registry=None):
+        self.path = path
+        self.interval = interval
+        self.registry = registry or REGISTRY
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        try:
+            write_textfile(self.path, self.registry)
+        except OSError as e:
+            logger.warning(f"지표 파일 저장 실패: {e}")
+
+    def stop(self):
+        """스레드 종료 후 마지막 값을 저장"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+
+
+def serve(port, host='127.0.0.1', registry=None):
+    """
+    /metrics 경로로 지표를 제공하는 HTTP 서버를 백그라운드 스레드로 시작
+
+    Returns:
+        ThreadingHTTPServer: 종료 시 shutdown() 호출
+    """
+    registry = registry or REGISTRY
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            payload = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"지표 서버 시작: http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,247 @@
+"""
+시장 규모 값 정규화 (한국어 금액 표기 → 천 단위 숫자)
+
+산업규모 셀에는 "4692억 원(약 3억 5천만 달러)", "USD 3.2 billion", "데이터없음", "420000000000" 같은
+자유 형식 문자열이 들어 있다. 여기서는 열 전체를 한 번에 처리한다.
+
+- 미리 컴파일한 정규식으로 첫 번째 금액 표현과 통화 표시를 pandas str 연산으로 추출
+- 조/억/만/천, thousand/million/billion 단위는 NumPy 배열 곱셈·합으로 계산
+- 결과는 천 단위 값(value), 통화(currency: KRW, USD), 처리 상태(status)
+- 단위 없이 숫자만 있는 셀은 프롬프트가 요구한 대로 이미 천 단위 값이며, 통화는 지역을 따른다
+  (국내: 천원, 해외: 천달러)
+
+    from idnolab.normalize import normalize_amounts, market_size_table
+
+    normalize_amounts(df['국내 산업규모 (2024)'])
+    market_size_table(df)  # 품목 × 지역 × 연도 long 형식 표
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# 처리 상태
+STATUS_OK = 'ok'
+STATUS_EMPTY = 'empty'          # 빈 셀
+STATUS_MISSING = 'missing'      # '데이터 없음' 같은 명시적 결측
+STATUS_UNPARSED = 'unparsed'    # 금액을 찾지 못함
+
+# '데이터 없음' 계열 결측 표기 (셀 전체가 일치해야 함)
+MISSING_PATTERN = re.compile(
+    r'\s*(?:-+|n/?a|none|null|nan|미상|해당\s*없음|확인\s*불가|알\s*수\s*없음'
+    r'|(?:관련|괸련)?\s*(?:데이터|자료|정보)?\s*없음)\s*\.?\s*',
+    re.IGNORECASE,
+)
+
+# 숫자 (예: '4692', '2,000', '3.2')
+_NUMBER = r'\d[\d,]*(?:\.\d+)?'
+# 숫자 뒤의 단위 (예: '억', '천만', '천', 'billion', 'k')
+_UNIT = r'(?:[십백천]?\s*[만억조]|[십백천]|(?:trillion|billion|million|thousand|tn|bn|[kmb])(?![a-z]))'
+# 연도, 비율, 개수처럼 금액이 아닌 숫자 뒤의 표기
+_NOT_AMOUNT = r'\s*(?:년|%|개|월|위|배|분기)'
+# 금액 표현의 한 항: 단위가 붙은 항 뒤에는 숫자가 바로 이어질 수 있고('1억2천만'),
+# 단위 중간('5천|만')이나 숫자 중간, 단위 앞에서는 끊기지 않게 함
+_TERM = (
+    rf'(?:{_NUMBER}\s*{_UNIT}(?!\s*[만억조]|{_NOT_AMOUNT})'
+    rf'|{_NUMBER}(?!\d|[.,]\d|\s*[십백천만억조]|{_NOT_AMOUNT}))'
+)
+
+# 문자열에서 첫 번째 금액 표현 (앞뒤 통화 표시 포함)
+AMOUNT_PATTERN = re.compile(
+    r'(?P<prefix>US\$|\$|₩|USD|KRW)?\s*'
+    rf'(?P<amount>{_TERM}(?:\s*{_TERM})*)'
+    r'\s*(?P<suffix>원|달러|불|USD|KRW|dollars?)?',
+    re.IGNORECASE,
+)
+
+# 금액 표현 안의 각 항 (숫자, 작은 단위, 큰 단위, 영어 단위)
+TERM_PATTERN = re.compile(
+    r'(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<small>[십백천])?\s*(?P<large>[만억조])?\s*'
+    r'(?P<scale>trillion|billion|million|thousand|tn|bn|[kmb](?![a-z]))?',
+    re.IGNORECASE,
+)
+
+SMALL_UNITS = {'십': 10, '백': 100, '천': 1_000}
+LARGE_UNITS = {'만': 10_000, '억': 100_000_000, '조': 1_000_000_000_000}
+SCALE_UNITS = {
+    'thousand': 1e3, 'k': 1e3,
+    'million': 1e6, 'm': 1e6,
+    'billion': 1e9, 'bn': 1e9, 'b': 1e9,
+    'trillion': 1e12, 'tn': 1e12,
+}
+CURRENCY_MARKERS = {
+    'us$': 'USD', '$': 'USD', 'usd': 'USD', '달러': 'USD', '불': 'USD', 'dollar': 'USD', 'dollars': 'USD',
+    '₩': 'KRW', 'krw': 'KRW', '원': 'KRW',
+}
+
+# 통화 표시가 없는 값의 지역별 통화 (프롬프트: 국내는 원화, 해외는 달러)
+REGION_CURRENCY = {'국내': 'KRW', '해외': 'USD'}
+
+# 산업규모 열 이름 (예: '국내 산업규모 (2024)')
+MARKET_SIZE_COLUMN = re.compile(r'^(?P<region>국내|해외) 산업규모 \((?P<year>\d{4})\)$')
+
+
+def is_missing(value):
+    """셀 값이 비어 있거나 '데이터 없음' 같은 결측 표기인지 확인"""
+    if value is None or (isinstance(value, float) and value != value):
+        return True
+    text = str(value)
+    return text.strip() == '' or MISSING_PATTERN.fullmatch(text) is not None
+
+
+def _lookup(series, table):
+    # 단위 문자열 → 배수 (없으면 1)
+    return series.str.lower().map(table).fillna(1).to_numpy(dtype=float)
+
+
+def normalize_amounts(values, default_currency='KRW'):
+    """
+    금액 문자열 열을 천 단위 숫자로 변환
+
+    Args:
+        values (pd.Series or list): 산업규모 셀 값
+        default_currency (str or array-like): 통화 표시가 없을 때 사용할 통화 (values와 같은 길이면 셀마다 지정)
+
+    Returns:
+        pd.DataFrame: values와 같은 인덱스, 열은 value(천 단위 float), currency, status
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    index = series.index
+    text = series.reset_index(drop=True).astype('string').str.strip()
+    size = len(text)
+
+    empty = (text.isna() | (text == '')).to_numpy(dtype=bool)
+    missing = text.str.fullmatch(MISSING_PATTERN).fillna(False).to_numpy(dtype=bool) & ~empty
+
+    value = np.full(size, np.nan)
+    currency = np.full(size, None, dtype=object)
+    if isinstance(default_currency, str) or default_currency is None:
+        defaults = np.full(size, default_currency, dtype=object)
+    else:
+        defaults = np.asarray(pd.Series(default_currency).to_numpy(), dtype=object)
+
+    # 1. 숫자만 있는 셀 (프롬프트가 '천원 단위의 숫자'로 요구하므로 이미 천 단위 값)
+    plain = pd.to_numeric(text.str.replace(',', '', regex=False), errors='coerce').to_numpy(dtype=float)
+    is_plain = ~np.isnan(plain)
+    value[is_plain] = plain[is_plain]
+    currency[is_plain] = defaults[is_plain]
+
+    # 2. 단위가 붙은 금액 표현
+    pending = ~(empty | missing | is_plain)
+    if pending.any():
+        matches = text[pending].str.extract(AMOUNT_PATTERN)
+        terms = matches['amount'].dropna().str.extractall(TERM_PATTERN)
+        if len(terms):
+            number = pd.to_numeric(terms['number'].str.replace(',', '', regex=False), errors='coerce').to_numpy(dtype=float)
+            amount = (number * _lookup(terms['small'], SMALL_UNITS) * _lookup(terms['large'], LARGE_UNITS)
+                      * _lookup(terms['scale'], SCALE_UNITS))
+            totals = pd.Series(amount, index=terms.index.get_level_values(0)).groupby(level=0).sum()
+            positions = totals.index.to_numpy()
+            value[positions] = totals.to_numpy() / 1_000
+
+            marker = matches['prefix'].fillna(matches['suffix']).str.lower().map(CURRENCY_MARKERS)
+            marker = marker.loc[positions].to_numpy(dtype=object)
+            currency[positions] = np.where(pd.isna(marker), defaults[positions], marker)
+
+    status = np.full(size, STATUS_UNPARSED, dtype=object)
+    status[~np.isnan(value)] = STATUS_OK
+    status[missing] = STATUS_MISSING
+    status[empty] = STATUS_EMPTY
+
+    return pd.DataFrame({'value': value, 'currency': currency, 'status': status}, index=index)
+
+
+def market_size_columns(columns):
+    """
+    산업규모 열 목록
+
+    Returns:
+        list[tuple[str, str, str]]: (열 이름, 지역, 연도)
+    """
+    found = []
+    for column in columns:
+        match = MARKET_SIZE_COLUMN.match(str(column))
+        if match:
+            found.append((column, match['region'], match['year']))
+    return found
+
+
+def market_columns(header):
+    """
+    시장 규모 분석에 필요한 열 (품목 코드, code_name, 산업규모 / 추정여부 / 추정근거 / 출처)
+
+    Args:
+        header (Iterable[str]): 시트 열 이름
+    """
+    from idnolab.source import CODE_COLUMN
+
+    header = list(header)
+    columns = [CODE_COLUMN, 'code_name']
+    for _, region, year in market_size_columns(header):
+        for column in (f'{region} 산업규모 ({year})', f'{region} 추정여부 ({year})',
+                       f'{region} 추정근거 ({year})', f'출처 ({region} {year})'):
+            if column in header:
+                columns.append(column)
+    return columns
+
+
+def load_market_sheet(path, sheet_name=None):
+    """
+    시장 규모 시트에서 분석에 필요한 열만 스트리밍으로 읽어 DataFrame으로 반환
+
+    Returns:
+        pd.DataFrame: 인덱스는 원본 DataFrame 인덱스 (엑셀 행 번호 - 2)
+    """
+    from idnolab.source import sheet_rows
+
+    first = next(sheet_rows(path, sheet_name=sheet_name), None)
+    if first is None:
+        return pd.DataFrame()
+    columns = market_columns(first[1])
+    numbers, records = [], []
+    for number, row in sheet_rows(path, columns, sheet_name):
+        numbers.append(number - 2)
+        records.append(row)
+    return pd.DataFrame.from_records(records, index=numbers, columns=columns)
+
+
+def market_size_table(df, default_currency=None):
+    """
+    시장 규모 시트를 품목 × 지역 × 연도 long 형식 표로 정규화
+
+    Args:
+        df (pd.DataFrame): 시장 규모 시트 (산업규모 열 포함)
+        default_currency (str): 통화 표시가 없는 값의 통화 (기본값: 지역별 REGION_CURRENCY)
+
+    Returns:
+        pd.DataFrame: code, code_name, region, year, raw, is_estimated, estimate_reason, reference,
+            value(천 단위), currency, status
+    """
+    from idnolab.source import CODE_COLUMN
+
+    columns = market_size_columns(df.columns)
+    if not columns:
+        return pd.DataFrame(columns=['code', 'code_name', 'region', 'year', 'raw', 'is_estimated', 'estimate_reason',
+                                     'reference', 'value', 'currency', 'status'])
+
+    keys = pd.DataFrame({
+        'code': df[CODE_COLUMN] if CODE_COLUMN in df.columns else pd.Series(df.index, index=df.index),
+        'code_name': df['code_name'] if 'code_name' in df.columns else None,
+    }, index=df.index)
+    frames = []
+    for column, region, year in columns:
+        frame = keys.copy()
+        frame['region'] = region
+        frame['year'] = year
+        frame['raw'] = df[column]
+        # 같은 지역·연도의 추정여부 / 추정근거 / 출처 (없는 열은 None)
+        for name, companion in (('is_estimated', f'{region} 추정여부 ({year})'),
+                                ('estimate_reason', f'{region} 추정근거 ({year})'),
+                                ('reference', f'출처 ({region} {year})')):
+            frame[name] = df[companion] if companion in df.columns else None
+        frames.append(frame)
+    table = pd.concat(frames, ignore_index=True)
+    # 모든 열을 한 번에 정규화 (통화 표시가 없는 값은 지역 통화)
+    defaults = default_currency or table['region'].map(REGION_CURRENCY)
+    table = table.join(normalize_amounts(table['raw'], defaults))
+    return table[table['code_name'] != 'code_name'].reset_index(drop=True)
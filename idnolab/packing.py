@@ -0,0 +1,107 @@
+"""
+다중 품목 묶음(packed) 요청 유틸리티
+
+같은 상위 분류(예: F0101)에 속한 형제 품목들을 한 번의 API 요청으로 묶어 보내고,
+응답을 품목별로 나눈 뒤 검증에 실패한 품목만 다시 쪼개서 재요청한다.
+검색(grounding) 비용을 여러 품목이 나눠 쓰게 하는 것이 목적이다.
+"""
+from logger_config import get_logger
+from idnolab.pipeline import AbortRun
+from idnolab.taxonomy import parent_code
+
+# 로거 설정
+logger = get_logger("packing")
+
+
+def group_by_parent(items, pack_size, key=lambda item: item['code']):
+    """
+    품목들을 상위 분류 기준으로 묶어 최대 pack_size 개씩 나누는 함수
+
+    입력 순서를 유지하며, 상위 분류가 바뀌거나 묶음이 가득 차면 새 묶음을 시작한다.
+
+    Args:
+        items (list): 품목 목록
+        pack_size (int): 한 묶음의 최대 품목 수
+        key (callable): 품목에서 코드를 꺼내는 함수
+
+    Returns:
+        list[list]: 품목 묶음 목록
+    """
+    pack_size = max(1, int(pack_size))
+    batches = []
+    current = []
+    current_parent = None
+
+    for item in items:
+        parent = parent_code(key(item))
+        if current and (parent != current_parent or parent is None or len(current) >= pack_size):
+            batches.append(current)
+            current = []
+        current.append(item)
+        current_parent = parent
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def run_packed(batch, call, validate, on_result, on_failure, key=lambda item: item['code']):
+    """
+    묶음 요청을 실행하고 실패한 품목만 반으로 나눠 재요청하는 함수
+
+    Args:
+        batch (list): 품목 묶음
+        call (callable): 품목 묶음을 받아 {코드: 파싱된 데이터} 딕셔너리를 반환하는 함수
+        validate (callable): 파싱된 데이터 하나의 유효 여부를 반환하는 함수
+        on_result (callable): 검증을 통과한 품목 처리 함수 (item, data)
+        on_failure (callable): 더 나눌 수 없는 품목이 실패했을 때 호출되는 함수 (item, 오류 메시지)
+        key (callable): 품목에서 코드를 꺼내는 함수
+
+    Returns:
+        int: API 요청 횟수
+
+    Raises:
+        AbortRun: call이 실행 중단 오류를 던지면 재요청 없이 그대로 전달
+    """
+    if not batch:
+        return 0
+
+    codes = [key(item) for item in batch]
+    logger.info(f"묶음 요청 시작: {len(batch)}개 {codes}")
+
+    try:
+        results = call(batch) or {}
+    except AbortRun:
+        # 할당량 소진·제공자 장애는 품목 실패가 아니므로 나눠서 재요청하지 않고 파이프라인까지 전달
+        raise
+    except Exception as e:
+        logger.error(f"묶음 요청 실패 {codes}: {e}")
+        results = {}
+        if len(batch) == 1:
+            on_failure(batch[0], str(e))
+            return 1
+
+    failed = []
+    for item in batch:
+        data = results.get(key(item))
+        if data is not None and validate(data):
+            on_result(item, data)
+        else:
+            failed.append(item)
+
+    request_count = 1
+    if not failed:
+        return request_count
+
+    logger.warning(f"검증 실패 {len(failed)}/{len(batch)}개: {[key(item) for item in failed]}")
+
+    # 단일 품목 요청이 실패한 경우 더 이상 나누지 않음
+    if len(batch) == 1:
+        on_failure(batch[0], "응답 누락 또는 검증 실패")
+        return request_count
+
+    # 실패한 품목만 반으로 나눠 재요청
+    middle = (len(failed) + 1) // 2
+    for part in (failed[:middle], failed[middle:]):
+        request_count += run_packed(part, call, validate, on_result, on_failure, key=key)
+    return request_count
@@ -0,0 +1,195 @@
+"""
+셀 단위 패치 저장
+
+pd.read_excel → df.to_excel 왕복은 원본 서식(글꼴, 색, 열 너비, 다른 시트)을 지우고
+항목마다 파일 전체를 다시 만든다. ExcelPatchWriter는 통합 문서를 openpyxl로 한 번만 열어 두고
+바뀐 셀만 모아 두었다가 flush 시점에 한꺼번에 반영해 저장한다.
+
+- 값이 실제로 바뀐 셀만 기록하므로 항목당 비용은 바뀐 셀 수에 비례한다
+- 셀 서식과 수정하지 않은 시트는 그대로 유지된다
+- 파일은 flush 때만 다시 쓰며, 임시 파일에 쓴 뒤 교체한다
+"""
+import os
+import threading
+
+from logger_config import get_logger
+from idnolab import metrics
+from idnolab.source import column_names
+from idnolab.tracing import span
+
+# 로거 설정
+logger = get_logger("patch")
+
+
+def _clean(value):
+    # pandas NaN은 빈 셀(None)로 취급
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+class ExcelPatchWriter:
+    """
+    바뀐 셀만 모아서 저장하는 엑셀 writer (ExcelRowSink와 같은 row / write / done / flush / close 인터페이스)
+
+    행 위치는 pandas DataFrame 인덱스 기준이다 (엑셀 행 번호 = 인덱스 + 2).
+
+    Args:
+        path (str): 엑셀 파일 경로
+        sheet_name (str): 수정할 시트 이름 (기본값: 첫 번째 시트)
+        flush_every (int): 몇 행을 수정할 때마다 파일로 저장할지
+        checkpoint (Checkpoint): done()으로 넘긴 작업 키를 파일에 저장한 뒤에 기록할 체크포인트
+    """
+
+    def __init__(self, path, sheet_name=None, flush_every=1, checkpoint=None):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.flush_every = max(1, int(flush_every))
+        self.pending = 0
+        self.checkpoint = checkpoint
+        self.keys = []  # 저장되면 체크포인트에 기록할 작업 키
+        self.changes = {}  # {(엑셀 행 번호, 열 번호): 값}
+        self.workbook = None
+        self.sheet = None
+        self.columns = {}  # {열 이름: 열 번호(1부터)}
+        self._lookup = {}  # {열 이름: {값: 인덱스}}
+        self._lock = threading.RLock()
+
+    def _open(self):
+        """통합 문서를 처음 필요할 때 한 번만 엶"""
+        if self.workbook is not None:
+            return
+        from openpyxl import load_workbook
+
+        with span('excel.open', path=self.path):
+            self.workbook = load_workbook(self.path)
+        self.sheet = self.workbook[self.sheet_name] if self.sheet_name else self.workbook.worksheets[0]
+        header = [cell.value for cell in next(self.sheet.iter_rows(min_row=1, max_row=1))]
+        self.columns = {name: position for position, name in enumerate(column_names(header), start=1)}
+
+    def _value(self, number, column):
+        if (number, column) in self.changes:
+            return self.changes[(number, column)]
+        return self.sheet.cell(row=number, column=column).value
+
+    def row(self, index):
+        """
+        한 행의 현재 값 (반영 대기 중인 변경 포함)
+
+        Returns:
+            pd.Series: name이 index인 행
+        """
+        import pandas as pd
+
+        with self._lock:
+            self._open()
+            number = index + 2
+            values = {name: self._value(number, column) for name, column in self.columns.items()}
+        return pd.Series(values, name=index, dtype=object)
+
+    def find_row(self, value, column_name='code_name'):
+        """
+        column_name 열에서 value가 처음 나오는 행의 인덱스
+
+        Returns:
+            int or None: DataFrame 기준 인덱스
+        """
+        with self._lock:
+            self._open()
+            if column_name not in self.columns:
+                logger.error(f"'{column_name}' 열이 존재하지 않습니다.")
+                return None
+            if column_name not in self._lookup:
+                lookup = {}
+                column = self.columns[column_name]
+                for number, (cell_value,) in enumerate(
+                    self.sheet.iter_rows(min_row=2, min_col=column, max_col=column, values_only=True), start=2
+                ):
+                    lookup.setdefault(cell_value, number - 2)
+                self._lookup[column_name] = lookup
+            return self._lookup[column_name].get(value)
+
+    def _column(self, name):
+        # 시트에 없는 열은 맨 뒤에 새 열로 추가 (머리글은 다음 flush 때 저장)
+        column = self.columns.get(name)
+        if column is None:
+            column = len(self.columns) + 1
+            self.columns[name] = column
+            self.changes[(1, column)] = name
+        return column
+
+    def add_columns(self, names):
+        """
+        시트에 없는 열을 맨 뒤에 추가
+
+        Returns:
+            list[str]: 새로 추가한 열 이름
+        """
+        with self._lock:
+            self._open()
+            added = [name for name in names if name not in self.columns]
+            for name in added:
+                self._column(name)
+            return added
+
+    def write(self, index, row):
+        """
+        행 값 중 바뀐 셀만 변경 목록에 추가하고 flush_every 행마다 저장
+
+        Args:
+            index (int): DataFrame 기준 인덱스
+            row (Mapping): {열 이름: 값} (pd.Series 포함), 시트에 없는 열은 맨 뒤에 새 열로 추가
+        """
+        with self._lock:
+            self._open()
+            number = index + 2
+            for name, value in row.items():
+                value = _clean(value)
+                column = self._column(name)
+                if self._value(number, column) != value:
+                    self.changes[(number, column)] = value
+            self.pending += 1
+            if self.pending >= self.flush_every:
+                self._flush()
+
+    def done(self, key):
+        """작업 키를 다음 저장이 끝난 뒤 체크포인트에 기록 (ExcelRowSink.done 참고)"""
+        if self.checkpoint is None or key is None:
+            return
+        with self._lock:
+            self.keys.append(key)
+
+    def _mark(self):
+        keys, self.keys = self.keys, []
+        for key in keys:
+            self.checkpoint.mark(key)
+
+    def _flush(self):
+        if not self.changes:
+            self.pending = 0
+            self._mark()
+            return
+        with span('excel.write', path=self.path, cells=len(self.changes)), metrics.EXCEL_FLUSH.time(sink='patch'):
+            for (number, column), value in self.changes.items():
+                self.sheet.cell(row=number, column=column).value = value
+            temp_path = f"{self.path}.{os.getpid()}.tmp.xlsx"
+            try:
+                self.workbook.save(temp_path)
+                os.replace(temp_path, self.path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        logger.debug(f"엑셀 셀 단위 저장: {self.path} ({self.pending}행, {len(self.changes)}개 셀)")
+        self.changes = {}
+        self.pending = 0
+        self._mark()
+
+    def flush(self):
+        with self._lock:
+            if self.workbook is not None:
+                self._flush()
+            else:
+                self._mark()
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,399 @@
+"""
+단계(stage) 기반 처리 파이프라인
+
+source → prompt → call → parse → validate → sink 처럼 단계를 이어 붙이면
+각 단계가 자기 작업자 수와 큐를 가지고 동시에 실행된다.
+
+- 큐 크기가 제한되어 있어 뒤 단계가 밀리면 앞 단계가 자동으로 기다린다 (backpressure)
+- 마지막 단계까지 끝난 항목은 체크포인트 파일에 기록되어 재실행 시 건너뛴다
+- 저장 단계는 밀린 행을 모아 한 번에 저장하고(on_idle), SIGINT/SIGTERM을 받으면 새 작업만 멈추고
+  이미 받은 결과는 끝까지 저장한 뒤 종료한다
+"""
+import json
+import os
+import queue
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+
+from logger_config import get_logger
+from idnolab import metrics
+from idnolab.tracing import span
+
+# 로거 설정
+logger = get_logger("pipeline")
+
+# 작업자 종료 신호
+STOP = object()
+
+
+class AbortRun(Exception):
+    """단계 함수가 던지면 남은 작업을 처리하지 않고 파이프라인을 멈춤 (할당량 소진 등)"""
+
+
+@dataclass
+class Task:
+    """파이프라인을 따라 이동하는 작업 단위"""
+    key: object  # 체크포인트 키 (품목 코드, 행 번호 등, None이면 체크포인트 미사용)
+    row: dict = field(default_factory=dict)  # 원본 행 데이터
+    value: object = None  # 직전 단계의 결과
+    started: float = 0.0  # 첫 단계 큐에 들어간 시각 (time.monotonic)
+
+
+class Stage:
+    """
+    파이프라인의 한 단계
+
+    Args:
+        name (str): 단계 이름
+        func (callable): Task를 받아 다음 단계로 넘길 값을 반환하는 함수 (실패 시 예외 발생)
+        workers (int): 작업자 스레드 수
+        queue_size (int): 입력 큐 최대 크기 (기본값: 작업자 수 × 2)
+        min_interval (float): 작업 시작 간 최소 간격(초), API 호출 간격 조절용
+        on_close (callable): 모든 작업자가 끝난 뒤 호출되는 함수 (예: 엑셀 최종 저장)
+        on_idle (callable): 입력 큐가 비어 다음 작업을 기다리기 전에 호출되는 함수 (예: 모아 둔 행 저장)
+        drain (bool): 중단 요청 뒤에도 큐에 남은 작업을 처리 (이미 받은 응답을 처리하는 단계, 마지막 단계는 항상 처리)
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=None, min_interval=0, on_close=None, on_idle=None,
+                 drain=False):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.queue = queue.Queue(maxsize=queue_size or self.workers * 2)
+        self.min_interval = min_interval
+        self.on_close = on_close
+        self.on_idle = on_idle
+        self.drain = drain
+        self.processed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._last_start = 0.0
+
+    def wait_interval(self):
+        """min_interval 만큼 작업 시작 간격을 유지"""
+        if not self.min_interval:
+            return
+        with self._lock:
+            wait_time = self._last_start + self.min_interval - time.monotonic()
+            if wait_time > 0:
+                time.sleep(wait_time)
+            self._last_start = time.monotonic()
+
+
+class Checkpoint:
+    """
+    완료된 작업 키를 JSONL 파일에 기록하는 체크포인트
+
+    Args:
+        path (str): 체크포인트 파일 경로 (None이면 기록하지 않음)
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self.done.add(json.loads(line)['key'])
+            logger.info(f"체크포인트 로드: {len(self.done)}개 완료 항목 ({path})")
+
+    def __contains__(self, key):
+        return str(key) in self.done
+
+    def mark(self, key):
+        """작업 완료 기록"""
+        key = str(key)
+        with self._lock:
+            self.done.add(key)
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'key': key, 'time': time.time()}, ensure_ascii=False) + '\n')
+
+
+class Pipeline:
+    """
+    단계들을 연결해 실행하는 파이프라인
+
+    Args:
+        name (str): 파이프라인 이름
+        source (iterable): Task를 생성하는 반복자
+        stages (list[Stage]): 순서대로 실행할 단계 목록
+        checkpoint (Checkpoint): 완료 항목 기록용 체크포인트
+        on_failure (callable): 단계에서 실패한 작업마다 (task, 예외)로 호출 (예: 작업 큐에 실패 기록)
+        mark (bool): False면 마지막 단계가 끝나도 체크포인트에 기록하지 않음
+            (sink가 파일에 저장한 뒤 직접 기록하는 경우, ExcelRowSink.done 참고)
+    """
+
+    def __init__(self, name, source, stages, checkpoint=None, on_failure=None, mark=True):
+        self.name = name
+        self.source = source
+        self.stages = stages
+        self.checkpoint = checkpoint or Checkpoint()
+        self.on_failure = on_failure
+        self.mark = mark
+        self.skipped = 0
+        self.latencies = []  # 마지막 단계까지 끝난 작업의 소요 시간(초)
+        self.stop_event = threading.Event()
+        self.interrupted = False
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        # 중단 요청 뒤에도 남은 작업을 처리할지 (받은 결과를 버리지 않도록 마지막 단계는 항상 처리)
+        drain = stage.drain or next_stage is None
+
+        while True:
+            if stage.on_idle is not None and stage.queue.empty():
+                try:
+                    stage.on_idle()
+                except Exception as e:
+                    logger.error(f"[{self.name}:{stage.name}] 대기 중 처리 실패: {e}")
+            task = stage.queue.get()
+            if task is STOP:
+                break
+            if self.stop_event.is_set() and not drain:
+                continue
+            try:
+                if stage.min_interval:
+                    with span(f"{stage.name}.wait", self.name):
+                        stage.wait_interval()
+                with span(stage.name, self.name, key=task.key), \
+                        metrics.STAGE_DURATION.time(pipeline=self.name, stage=stage.name):
+                    task.value = stage.func(task)
+            except Exception as e:
+                with stage._lock:
+                    stage.failed += 1
+                metrics.ITEMS.inc(pipeline=self.name, stage=stage.name, status='failed')
+                metrics.ERRORS.inc(pipeline=self.name, stage=stage.name, kind=metrics.classify_error(e))
+                logger.error(f"[{self.name}:{stage.name}] {task.key} 처리 실패: {e}")
+                if self.on_failure is not None:
+                    try:
+                        self.on_failure(task, e)
+                    except Exception as callback_error:
+                        logger.error(f"[{self.name}] 실패 기록 중 오류: {callback_error}")
+                if isinstance(e, AbortRun) and not self.stop_event.is_set():
+                    logger.error(f"[{self.name}] 실행 중단: 남은 작업을 처리하지 않습니다.")
+                    self.stop_event.set()
+                continue
+
+            with stage._lock:
+                stage.processed += 1
+            metrics.ITEMS.inc(pipeline=self.name, stage=stage.name, status='processed')
+            if next_stage is not None:
+                next_stage.queue.put(task)
+                metrics.QUEUE_DEPTH.set(next_stage.queue.qsize(), pipeline=self.name, stage=next_stage.name)
+                continue
+            self.latencies.append(time.monotonic() - task.started)
+            metrics.LAST_SUCCESS.set_to_current_time(pipeline=self.name)
+            if self.mark and task.key is not None:
+                self.checkpoint.mark(task.key)
+
+    def _feed(self):
+        """source의 작업을 첫 단계 큐에 넣음 (큐가 가득 차면 대기)"""
+        first = self.stages[0]
+        for task in self.source:
+            if self.stop_event.is_set():
+                break
+            if task.key is not None and task.key in self.checkpoint:
+                self.skipped += 1
+                continue
+            task.started = time.monotonic()
+            first.queue.put(task)
+            metrics.QUEUE_DEPTH.set(first.queue.qsize(), pipeline=self.name, stage=first.name)
+
+    def _on_signal(self, signum, frame):
+        """첫 신호는 새 작업만 멈추고 받은 결과를 저장, 두 번째 신호는 바로 종료"""
+        if self.interrupted:
+            raise KeyboardInterrupt
+        self.interrupted = True
+        self.stop_event.set()
+        logger.warning(f"[{self.name}] 종료 신호({signal.Signals(signum).name}) 수신: 새 작업을 멈추고 "
+                       f"받은 결과만 저장한 뒤 종료합니다. (한 번 더 보내면 바로 종료)")
+
+    def _install_signal_handlers(self):
+        """SIGINT / SIGTERM 처리기 설치 (메인 스레드에서만 가능, 이전 처리기 반환)"""
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        previous = {}
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous[signum] = signal.signal(signum, self._on_signal)
+        return previous
+
+    def run(self):
+        """
+        파이프라인 실행
+
+        SIGINT(Ctrl-C) / SIGTERM을 받으면 source에서 새 작업을 꺼내지 않고, 호출 전 작업은 버리며,
+        이미 받은 응답은 drain 단계와 마지막 단계가 끝까지 처리해 저장한다.
+
+        Returns:
+            dict: 단계별 처리/실패 건수
+        """
+        logger.info(f"[{self.name}] 파이프라인 시작: {' → '.join(stage.name for stage in self.stages)}")
+        started = time.monotonic()
+        metrics.RUN_STARTED.set_to_current_time(pipeline=self.name)
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            stage_threads = [
+                threading.Thread(target=self._worker, args=(index,), name=f"{self.name}-{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            ]
+            for thread in stage_threads:
+                thread.start()
+            threads.append(stage_threads)
+
+        previous_handlers = self._install_signal_handlers()
+        try:
+            self._feed()
+        except KeyboardInterrupt:
+            logger.warning(f"[{self.name}] 중단 요청, 진행 중인 작업만 마무리합니다.")
+            self.interrupted = True
+            self.stop_event.set()
+        finally:
+            try:
+                # 앞 단계부터 순서대로 종료 신호를 보내고 끝날 때까지 대기
+                for stage, stage_threads in zip(self.stages, threads):
+                    for _ in stage_threads:
+                        stage.queue.put(STOP)
+                    for thread in stage_threads:
+                        thread.join()
+                    if stage.on_close:
+                        stage.on_close()
+            finally:
+                for signum, handler in previous_handlers.items():
+                    signal.signal(signum, handler)
+
+        stats = {stage.name: {'processed': stage.processed, 'failed': stage.failed} for stage in self.stages}
+        stats['skipped'] = self.skipped
+        logger.info(f"[{self.name}] 파이프라인 완료 ({time.monotonic() - started:.1f}초): {stats}")
+        return stats
+
+
+class ExcelRowSink:
+    """
+    DataFrame 한 장을 메모리에 두고 행 단위 결과를 반영한 뒤 주기적으로 엑셀에 저장하는 sink
+
+    Args:
+        path (str): 엑셀 파일 경로
+        sheet_name (str): 시트 이름
+        flush_every (int): 몇 행마다 파일로 저장할지
+        checkpoint (Checkpoint): done()으로 넘긴 작업 키를 파일에 저장한 뒤에 기록할 체크포인트
+    """
+
+    def __init__(self, path, sheet_name="Sheet1", flush_every=1, checkpoint=None):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.flush_every = max(1, int(flush_every))
+        self.pending = 0
+        self.checkpoint = checkpoint
+        self.keys = []  # 저장되면 체크포인트에 기록할 작업 키
+        self._df = None
+        self.widths = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def df(self):
+        """시트 전체 DataFrame (첫 저장 시점에 읽어 첫 API 호출이 시트 로딩을 기다리지 않게 함)"""
+        if self._df is None:
+            with self._load_lock:
+                if self._df is None:
+                    import pandas as pd
+
+                    from idnolab.export import column_widths
+
+                    # 비어 있는 결과 열이 float64로 읽히면 문자열을 넣을 수 없으므로 object로 읽음
+                    self._df = pd.read_excel(self.path, sheet_name=self.sheet_name, dtype=object)
+                    self.widths = column_widths(self.path, self.sheet_name)
+        return self._df
+
+    def row(self, index):
+        """한 행의 현재 값 (복사본)"""
+        return self.df.loc[index].copy()
+
+    def find_row(self, value, column_name='code_name'):
+        """
+        column_name 열에서 value가 처음 나오는 행의 인덱스
+
+        Returns:
+            int or None: DataFrame 기준 인덱스
+        """
+        if column_name not in self.df.columns:
+            logger.error(f"'{column_name}' 열이 존재하지 않습니다.")
+            return None
+        matches = self.df.index[self.df[column_name] == value]
+        return matches[0] if len(matches) else None
+
+    def write(self, index, row):
+        """행 반영 후 flush_every 행마다 저장"""
+        with self._lock:
+            self.df.loc[index] = row
+            self.pending += 1
+            if self.pending >= self.flush_every:
+                self._flush()
+
+    def done(self, key):
+        """
+        작업 키를 다음 저장이 끝난 뒤 체크포인트에 기록
+
+        행을 반영한 작업을 바로 체크포인트에 기록하면 저장 전에 멈췄을 때 그 행이 다시 처리되지 않으므로,
+        write 뒤에 호출해 파일에 저장된 뒤에 기록한다 (Pipeline(mark=False)와 함께 사용).
+        """
+        if self.checkpoint is None or key is None:
+            return
+        with self._lock:
+            self.keys.append(key)
+
+    def flush(self):
+        """반영했지만 아직 저장하지 않은 행을 저장 (저장 단계의 on_idle)"""
+        with self._lock:
+            if self.pending:
+                self._flush()
+            else:
+                self._mark()
+
+    def _mark(self):
+        keys, self.keys = self.keys, []
+        for key in keys:
+            self.checkpoint.mark(key)
+
+    def _flush(self):
+        from idnolab.export import write_dataframe
+
+        # 쓰기 전용 모드로 저장 (원본 열 너비 유지, 통합 문서 전체를 셀 객체로 만들지 않음)
+        with span('excel.write', rows=len(self.df)), metrics.EXCEL_FLUSH.time(sink='row'):
+            write_dataframe(self.path, self.df, self.sheet_name, self.widths)
+        logger.debug(f"엑셀 저장: {self.path} ({self.pending}행 반영)")
+        self.pending = 0
+        self._mark()
+
+    def close(self):
+        self.flush()
+
+
+def parse_rows(text):
+    """
+    '3,11,20-25' 형태의 행 번호 문자열을 집합으로 변환
+
+    Returns:
+        set[int] or None: 행 번호 집합 (text가 비어 있으면 None)
+    """
+    if not text:
+        return None
+    rows = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            rows.update(range(int(start), int(end) + 1))
+        else:
+            rows.add(int(part))
+    return rows
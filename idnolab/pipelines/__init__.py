@@ -0,0 +1,7 @@
+"""
+파이프라인 정의 모음
+
+각 모듈은 build(options) 함수로 idnolab.pipeline.Pipeline 객체를 만든다.
+모듈마다 해당 작업 디렉토리의 gemini_api 등을 import 하므로
+idnolab.cli가 import 경로를 맞춘 뒤 실행할 파이프라인 하나만 불러온다.
+"""
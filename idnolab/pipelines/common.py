@@ -0,0 +1,217 @@
+"""
+파이프라인 공용 source/sink 구성 함수
+"""
+from logger_config import get_logger
+from idnolab.pipeline import Pipeline, Stage, Checkpoint, ExcelRowSink, Task
+from idnolab.packing import group_by_parent, run_packed
+from idnolab.patch import ExcelPatchWriter
+from idnolab.ratelimit import OUTPUT_TOKENS
+from idnolab.schedule import FailureLog, Scheduler, attach, scheduled
+from idnolab.source import sheet_tasks
+
+# 로거 설정
+logger = get_logger("pipelines")
+
+def build_row_pipeline(name, options, workbook, progress_column, prompt, request, parse, validate, save_row,
+                       packed_prompt=None, packed_parse=None, output_tokens=OUTPUT_TOKENS):
+    """
+    품목 한 행을 조회해 같은 행에 저장하는 파이프라인 구성 (트렌드 기업, 키워드 등)
+
+    Args:
+        name (str): 파이프라인 이름
+        options: 실행 옵션 (workbook, rows, codes, workers, interval, flush_every, checkpoint, pack, patch,
+            dedup, dedup_exclude, cache, max_retries, retry_budget, rpm, tpm, max_rpm, queue, merge, lease,
+            order, weights, flagged, failures, deadline, budget)
+        workbook (str): 기본 작업 엑셀 파일
+        progress_column (str): 채워져 있으면 처리 완료로 보는 열
+        prompt (callable): (품목명, 개념설명) → 프롬프트
+        request (callable): (프롬프트, packed=False) → 응답 텍스트
+        parse (callable): 응답 텍스트 → 파싱된 데이터
+        validate (callable): 파싱된 데이터 → 유효 여부
+        save_row (callable): (행, 파싱된 데이터) → 갱신된 행
+        packed_prompt (callable): 품목 목록 → 묶음 프롬프트 (묶음 모드용)
+        packed_parse (callable): 묶음 응답 → {품목 코드: 데이터} (묶음 모드용)
+        output_tokens (int): 품목 하나의 예상 응답 토큰 수 (--budget 비용 추정용)
+    """
+    workbook = options.workbook or workbook
+    checkpoint = Checkpoint(options.checkpoint)
+    # 체크포인트는 행이 파일에 저장된 뒤에 sink가 기록 (저장 전에 멈추면 다음 실행에서 다시 처리)
+    if options.patch:
+        # 바뀐 셀만 기록 (원본 서식과 다른 시트 유지)
+        sink = ExcelPatchWriter(workbook, flush_every=options.flush_every, checkpoint=checkpoint)
+    else:
+        sink = ExcelRowSink(workbook, flush_every=options.flush_every, checkpoint=checkpoint)
+    if options.queue and options.merge:
+        return _build_merge_pipeline(name, options, sink, save_row)
+    request = api_request(name, request, options)
+    # 프롬프트에 필요한 열만 스트리밍으로 읽음 (sink의 전체 시트는 첫 저장 때 읽음)
+    tasks = sheet_tasks(workbook, ['개념설명'], rows=options.rows, skip_filled=progress_column,
+                        code_prefixes=options.codes)
+    if options.dedup:
+        tasks = shared_tasks(workbook, tasks, options, checkpoint)
+    failures = FailureLog(options.failures)
+    tasks = scheduled(workbook, tasks, options, failures,
+                      prompt=lambda task: prompt(task.row['code_name'], task.row['개념설명']), output_tokens=output_tokens)
+
+    def write_row(index, parsed_data, key):
+        update_row = save_row(sink.row(index), parsed_data)
+        if update_row is None:
+            raise ValueError("저장할 행 생성 실패")
+        sink.write(index, update_row)
+        sink.done(key)
+
+    def write_shared(task, index, parsed_data):
+        # 대표 행과 같은 결과를 유사 품목 행에도 기록 (--dedup)
+        for member in task.row.get('members', ()):
+            write_row(member.row['index'], parsed_data, member.key)
+        write_row(index, parsed_data, task.key)
+
+    def check(task):
+        if not validate(task.value):
+            raise ValueError("응답 필드 누락 또는 형식 오류")
+        return task.value
+
+    if options.queue:
+        return _build_queue_pipeline(name, options, request, prompt, parse, check)
+
+    if options.pack > 1 and packed_prompt is not None:
+        return _build_packed_pipeline(name, options, tasks, checkpoint, sink, request, validate, write_shared,
+                                      packed_prompt, packed_parse, failures)
+
+    stages = [
+        Stage('prompt', lambda task: prompt(task.row['code_name'], task.row['개념설명'])),
+        Stage('call', lambda task: request(task.value), workers=options.workers, min_interval=options.interval),
+        Stage('parse', lambda task: parse(task.value), drain=True),
+        Stage('validate', check, drain=True),
+        Stage('sink', lambda task: write_shared(task, task.row['index'], task.value), on_close=sink.close,
+              on_idle=sink.flush),
+    ]
+    return attach(Pipeline(name, tasks, stages, checkpoint, on_failure=failures.record, mark=False), tasks)
+
+
+def _build_queue_pipeline(name, options, request, prompt, parse, check):
+    """
+    작업 큐에서 품목을 빌려 조회하고 결과를 큐에 기록하는 작업자 파이프라인 (--queue)
+
+    작업 파일은 읽거나 쓰지 않으며(병합은 --merge), 묶음 요청과 유사 품목 묶기는 사용하지 않는다.
+    """
+    from idnolab.workqueue import LeaseSource, open_queue
+
+    source = LeaseSource(open_queue(options.queue, lease_seconds=options.lease), lease_seconds=options.lease)
+    stages = [
+        Stage('prompt', lambda task: prompt(task.row['code_name'], task.row['개념설명'])),
+        Stage('call', lambda task: request(task.value), workers=options.workers, min_interval=options.interval),
+        Stage('parse', lambda task: parse(task.value), drain=True),
+        Stage('validate', check, drain=True),
+        Stage('sink', lambda task: source.complete(task.key, task.value), on_close=source.close),
+    ]
+    pipeline = Pipeline(name, source, stages, on_failure=lambda task, error: source.fail(task.key, error))
+    source.stop_event = pipeline.stop_event
+    return pipeline
+
+
+def _build_merge_pipeline(name, options, sink, save_row):
+    """작업 큐에 모인 결과를 작업 파일에 기록하는 파이프라인 (--queue 큐 파일 --merge)"""
+    from idnolab.workqueue import WorkQueue
+
+    queue = WorkQueue(options.queue)
+    merged = []
+
+    def results():
+        for item in queue.results():
+            yield Task(key=item['key'], row=item['row'], value=item['result'])
+
+    def write(task):
+        update_row = save_row(sink.row(task.row['index']), task.value)
+        if update_row is None:
+            raise ValueError("저장할 행 생성 실패")
+        sink.write(task.row['index'], update_row)
+        merged.append(task.key)
+
+    def close():
+        # 파일에 저장한 뒤에 병합 완료로 표시 (저장 전에 멈추면 다음 병합 때 다시 기록)
+        sink.close()
+        queue.mark_merged(merged)
+        logger.info(f"[{name}] 작업 큐 결과 {len(merged)}개 병합 ({queue.stats()})")
+
+    return Pipeline(f"{name}-merge", results(), [Stage('sink', write, on_close=close)])
+
+
+def api_request(name, request, options, provider='gemini', model='gemini-2.5-pro'):
+    """
+    API 요청 함수에 공통 규칙 적용
+
+    - API 키 풀과 키별 적응형 속도 제한 (idnolab.keys, --keys, --rpm, --tpm, --max-rpm):
+      재시도를 포함한 모든 시도가 여유가 가장 많은 키로 나감 (request는 api_key 키워드 인자를 받아야 함).
+      --rpm이 없으면 속도 제한만 빼고 키 풀(키 분배, 할당량 소진 키 격리)은 그대로 사용
+    - 재시도 / 서킷 브레이커 / 실행 전체 재시도 예산 (idnolab.resilience, --max-retries, --retry-budget)
+    - 동시에 들어온 같은 요청은 한 번만 호출 (--cache를 주면 응답 캐시도 사용)
+    """
+    from idnolab.cache import ResponseCache
+    from idnolab.keys import pooled
+    from idnolab.resilience import configure, resilient
+    from idnolab.singleflight import coalesce
+
+    configure(options.retry_budget)
+    if options.rpm:
+        request = pooled(request, provider, model, rpm=options.rpm, tpm=options.tpm, max_rpm=options.max_rpm)
+    else:
+        request = pooled(request, provider, model, limit=False)
+    cache = ResponseCache(options.cache, name=name) if options.cache else None
+    return coalesce(resilient(request, provider, model, max_attempts=options.max_retries), name, cache=cache)
+
+
+def shared_tasks(workbook, tasks, options, checkpoint):
+    """
+    유사 품목을 묶어 대표 작업만 남김 (--dedup)
+
+    체크포인트에 있는 품목은 묶기 전에 제외한다 (대표가 건너뛰어지면 나머지 행도 처리되지 않으므로).
+    """
+    from idnolab.dedup import code_names, share_tasks
+
+    pending = (task for task in tasks if task.key is None or task.key not in checkpoint)
+    return share_tasks(pending, code_names(workbook), options.dedup, exclude_rows=options.dedup_exclude)
+
+
+def _build_packed_pipeline(name, options, tasks, checkpoint, sink, request, validate, write_shared,
+                           packed_prompt, packed_parse, failures):
+    """같은 상위 분류 품목을 묶어 요청하는 파이프라인 구성 (체크포인트는 품목 단위로 기록)"""
+
+    def batches():
+        items = [
+            {'index': task.row['index'], 'code': str(task.key), 'task': task,
+             'code_name': task.row['code_name'], 'description': task.row['개념설명']}
+            for task in tasks if task.key not in checkpoint
+        ]
+        for batch in group_by_parent(items, options.pack):
+            # 묶음은 품목을 모두 읽은 뒤 만들므로 마감 시간은 묶음마다 다시 확인
+            if isinstance(tasks, Scheduler) and not tasks.time_left():
+                logger.warning(f"[{name}] 마감 시간 도달: 남은 묶음은 다음 실행에서 처리합니다.")
+                return
+            yield Task(key=None, row={'items': batch})
+
+    def failed(item, error):
+        logger.error(f"[{name}] {item['code']} 처리 실패: {error}")
+        failures.record(item['task'], error)
+
+    def call(task):
+        results = []
+        run_packed(
+            task.row['items'],
+            lambda batch: packed_parse(request(packed_prompt(batch), packed=True)),
+            validate,
+            on_result=lambda item, data: results.append((item, data)),
+            on_failure=failed,
+        )
+        return results
+
+    def write(task):
+        # 품목 체크포인트는 write_shared가 sink 저장 뒤에 기록
+        for item, parsed_data in task.value:
+            write_shared(item['task'], item['index'], parsed_data)
+
+    stages = [
+        Stage('call', call, workers=options.workers, min_interval=options.interval),
+        Stage('sink', write, on_close=sink.close, on_idle=sink.flush),
+    ]
+    return attach(Pipeline(name, batches(), stages, checkpoint), tasks)
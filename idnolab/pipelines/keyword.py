@@ -0,0 +1,29 @@
+"""
+품목 키워드 조사 파이프라인 (search_item_keyword)
+"""
+from gemini_api import (
+    get_prompt, get_packed_prompt, request_gemini,
+    parse_item_keyword_with_gemini, parse_item_keyword_packed_with_gemini,
+    is_valid_item_keyword
+)
+from save_to_excel import save_to_excel
+from idnolab.pipelines.common import build_row_pipeline
+
+WORKBOOK = 'item_info_keyword.xlsx'
+PROGRESS_COLUMN = 'item_keyword_1'
+# 품목 하나의 예상 응답 토큰 수 (키워드 3개의 설명·출처 URL, --budget 비용 추정용)
+OUTPUT_TOKENS = 400
+
+
+def build(options):
+    return build_row_pipeline(
+        'keyword', options, WORKBOOK, PROGRESS_COLUMN,
+        prompt=get_prompt,
+        request=request_gemini,
+        parse=parse_item_keyword_with_gemini,
+        validate=is_valid_item_keyword,
+        save_row=save_to_excel,
+        packed_prompt=get_packed_prompt,
+        packed_parse=parse_item_keyword_packed_with_gemini,
+        output_tokens=OUTPUT_TOKENS,
+    )
@@ -0,0 +1,341 @@
+"""
+시장 규모 조사 파이프라인 (main2.py)
+"""
+import re
+import threading
+
+from gemini_api import (
+    get_prompt, get_config, get_gap_prompt, get_gap_config, request_gemini, parse_industry_data_with_gemini,
+)
+from save_excel_gemini import save_to_excel_gemini, save_gap_data_gemini, missing_cells
+from idnolab.normalize import is_missing
+from idnolab.pipeline import Pipeline, Stage, Checkpoint, ExcelRowSink
+from idnolab.pipelines.common import api_request, shared_tasks
+from idnolab.patch import ExcelPatchWriter
+from idnolab.schedule import FailureLog, Scheduler, attach, scheduled
+from idnolab.schema import REGIONS, column_name, market_columns, sheet_years
+from idnolab.source import sheet_rows, sheet_tasks
+from idnolab.taxonomy import code_level, nearest_ancestor
+
+# 상위 분류 참고 자료로 넘길 최대 출처 수
+MAX_PARENT_REFERENCES = 5
+# (지역, 연도) 셀 하나의 예상 응답 토큰 수 (시장 규모·추정 여부·추정 근거·출처 URL, --budget 비용 추정용)
+OUTPUT_TOKENS_PER_CELL = 200
+
+_URL = re.compile(r'https?://[^\s,;\'"\]\)]+')
+
+WORKBOOK = 'item_info_3.xlsx'
+
+
+def validate(task):
+    parsed_data = task.value
+    if not isinstance(parsed_data, dict) or not isinstance(parsed_data.get('market_size'), dict):
+        raise ValueError("market_size 필드 누락")
+    return parsed_data
+
+
+def workbook_years(workbook):
+    """작업 파일에 산업규모 열이 있는 조사 연도"""
+    first = next(sheet_rows(workbook), None)
+    return sheet_years(first[1] if first else [])
+
+
+def gap_tasks(workbook, options, years, target_years=None):
+    """
+    빈 셀(또는 재조회 계획에 있는 셀)이 있는 품목만 작업으로 변환
+
+    task.row['cells']에 조회할 (지역, 연도) 목록, task.row['known']에 이미 채워진 산업규모를 담는다.
+
+    Args:
+        years (tuple[str, ...]): 시트의 조사 연도
+        target_years (tuple[str, ...]): 지정하면 이 연도의 빈 셀만 조회 (--extend)
+    """
+    plan = None
+    if options.plan:
+        from idnolab.consistency import load_plan
+
+        plan = load_plan(options.plan)
+    size_columns = market_columns(years, fields=['market_size'])
+    for task in sheet_tasks(workbook, ['개념설명'] + size_columns, rows=options.rows, code_prefixes=options.codes):
+        row = task.row
+        cells = plan.get(str(task.key), []) if plan is not None else missing_cells(row, target_years or years)
+        if not cells:
+            continue
+        row['cells'] = tuple(sorted(set(cells)))
+        row['known'] = {
+            (region, year): row[column_name('market_size', region, year)]
+            for region in REGIONS for year in years
+            if (region, year) not in row['cells'] and not is_missing(row[column_name('market_size', region, year)])
+        }
+        yield task
+
+
+def build_gap_pipeline(options, workbook, writer, checkpoint, years, target_years=None, request=request_gemini):
+    """필요한 셀만 묻는 좁은 프롬프트로 빈 셀을 채우는 파이프라인 (--gaps, --plan, --extend)"""
+
+    def save(task):
+        filled = save_gap_data_gemini(workbook, task.row['code_name'], task.value, task.row['cells'], writer=writer,
+                                      index=task.row['index'])
+        if filled is None:
+            raise ValueError("엑셀 저장 실패")
+        if not filled:
+            raise ValueError("새로 채운 셀 없음")
+        writer.done(task.key)
+
+    stages = [
+        Stage('prompt', lambda task: get_gap_prompt(task.row['code_name'], task.row['개념설명'],
+                                                    task.row['cells'], task.row['known'])),
+        Stage('call', lambda task: request(task.value, config=get_gap_config(task.row['cells'])),
+              workers=options.workers, min_interval=options.interval),
+        Stage('parse', lambda task: parse_industry_data_with_gemini(task.value), drain=True),
+        Stage('validate', validate, drain=True),
+        Stage('sink', save, on_close=writer.close, on_idle=writer.flush),
+    ]
+    failures = FailureLog(options.failures)
+    tasks = scheduled(workbook, gap_tasks(workbook, options, years, target_years), options, failures,
+                      prompt=lambda task: get_gap_prompt(task.row['code_name'], task.row['개념설명'],
+                                                         task.row['cells'], task.row['known']),
+                      output_tokens=lambda task: len(task.row['cells']) * OUTPUT_TOKENS_PER_CELL)
+    return attach(Pipeline('market', tasks, stages, checkpoint, on_failure=failures.record, mark=False), tasks)
+
+
+def extend_year(workbook, year, writer=None):
+    """
+    새 조사 연도의 열을 시트 맨 뒤에 추가 (이미 있으면 그대로 둠)
+
+    Returns:
+        tuple[str, ...]: 추가 후 시트의 조사 연도
+    """
+    columns = market_columns([year])
+    target = writer or ExcelPatchWriter(workbook)
+    added = target.add_columns(columns)
+    # 저장 단계가 파일을 다시 읽으므로 열은 작업 시작 전에 파일에 반영
+    target.flush()
+    if added:
+        print(f"[market] {year}년 열 {len(added)}개 추가: {workbook}")
+    return tuple(sorted(set(workbook_years(workbook)) | {year}))
+
+
+def _parent_context(code_name, values, years):
+    """
+    상위 분류 조사 결과 정리 (하위 품목 프롬프트 참고 자료)
+
+    Args:
+        values (Callable[[str, str, str], object]): (필드, 지역, 연도) → 값
+    """
+    market_size = {
+        (region, year): values('market_size', region, year)
+        for region in REGIONS for year in years if not is_missing(values('market_size', region, year))
+    }
+    references = []
+    for region in REGIONS:
+        for year in years:
+            for url in _URL.findall(str(values('references', region, year) or '')):
+                if url not in references:
+                    references.append(url)
+    if not market_size and not references:
+        return None
+    return {'code_name': code_name, 'market_size': market_size, 'references': references[:MAX_PARENT_REFERENCES]}
+
+
+def row_context(row, years):
+    """시트 행 값에서 상위 분류 참고 자료 생성 (이미 조사된 상위 분류)"""
+    return _parent_context(row['code_name'], lambda field, region, year: row.get(column_name(field, region, year)), years)
+
+
+def data_context(code_name, parsed_data, years):
+    """응답 JSON에서 상위 분류 참고 자료 생성 (이번 실행에서 조사한 상위 분류)"""
+    def values(field, region, year):
+        return ((parsed_data.get(field) or {}).get(REGIONS[region]) or {}).get(f'year_{year}')
+    return _parent_context(code_name, values, years)
+
+
+class ParentContexts:
+    """
+    품목 코드별 상위 분류 조사 결과
+
+    이번 실행에서 조사할 상위 분류는 expect()로 등록해 두고, 저장(set) 또는 실패(release) 시 대기 중인
+    하위 품목을 깨운다. 실패한 상위 분류의 하위 품목은 참고 자료 없이 조사한다.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._events = {}
+        self._lock = threading.Lock()
+        # 파이프라인이 멈추면(AbortRun, 중단 요청) 버려진 상위 분류를 더 기다리지 않음
+        self.stop_event = None
+
+    def expect(self, code):
+        with self._lock:
+            self._events.setdefault(code, threading.Event())
+
+    def set(self, code, context):
+        with self._lock:
+            if context:
+                self._values[code] = context
+            event = self._events.setdefault(code, threading.Event())
+        event.set()
+
+    def release(self, code):
+        self.set(code, None)
+
+    def wait(self, code):
+        """상위 분류 결과가 준비될 때까지 대기 (조사 대상이 아니면 바로 반환)"""
+        with self._lock:
+            event = self._events.get(code)
+        if event is not None:
+            while not event.wait(1.0):
+                if self.stop_event is not None and self.stop_event.is_set():
+                    return None
+        with self._lock:
+            return self._values.get(code)
+
+
+def hierarchical_tasks(workbook, options, years, contexts, checkpoint):
+    """
+    상위 분류 → 하위 분류 순서로 작업을 내보내는 생성기
+
+    하위 품목은 가장 가까운 상위 분류의 결과가 준비된 뒤에 내보내며 task.row['parent']에 참고 자료를 담는다.
+    상위 분류가 이미 조사되어 있으면 시트 값을 그대로 참고 자료로 사용한다.
+    """
+    columns = ['개념설명'] + market_columns(years, fields=['market_size', 'references'])
+    done_column = column_name('market_size', '국내', years[-1])
+    rows = {task.key: task.row for task in sheet_tasks(workbook, columns) if isinstance(task.key, str)}
+    pending = list(sheet_tasks(workbook, columns, rows=options.rows, skip_filled=done_column, code_prefixes=options.codes))
+    pending_keys = {task.key for task in pending}
+
+    for code, row in rows.items():
+        if code in pending_keys and code not in checkpoint:
+            contexts.expect(code)
+        else:
+            contexts.set(code, row_context(row, years))
+
+    # 단계가 없는 코드(형식이 다른 코드)는 상위 분류가 없으므로 맨 앞에서 처리
+    pending.sort(key=lambda task: code_level(task.key) or 0)
+    for task in pending:
+        parent = nearest_ancestor(task.key, rows)
+        task.row['parent'] = contexts.wait(parent) if parent is not None else None
+        yield task
+
+
+def build_hierarchical_pipeline(options, workbook, writer, checkpoint, years, request=request_gemini):
+    """상위 분류를 먼저 조사하고 그 결과를 하위 품목 프롬프트에 전달하는 파이프라인 (--hierarchical)"""
+    contexts = ParentContexts()
+
+    def guarded(func):
+        # 어느 단계에서든 실패하면 하위 품목이 기다리지 않도록 상위 분류 대기를 해제
+        def run(task):
+            try:
+                return func(task)
+            except Exception:
+                contexts.release(task.key)
+                raise
+        return run
+
+    def prompt(task):
+        return get_prompt(task.row['code_name'], task.row['개념설명'], years, parent=task.row['parent'])
+
+    def call(task):
+        # 상위 분류 출처가 있으면 검색 없이 해당 URL만 읽게 해 검색(grounding) 호출을 줄임
+        parent = task.row['parent']
+        return request(task.value, config=get_config(years, search=not (parent and parent['references'])))
+
+    def save(task):
+        if save_to_excel_gemini(workbook, task.row['code_name'], task.value, writer=writer, years=years,
+                                index=task.row['index']) is None:
+            raise ValueError("엑셀 저장 실패")
+        writer.done(task.key)
+        contexts.set(task.key, data_context(task.row['code_name'], task.value, years))
+
+    def close():
+        writer.close()
+        report_rollup(workbook)
+
+    stages = [
+        Stage('prompt', guarded(prompt)),
+        Stage('call', guarded(call), workers=options.workers, min_interval=options.interval),
+        Stage('parse', guarded(lambda task: parse_industry_data_with_gemini(task.value)), drain=True),
+        Stage('validate', guarded(validate), drain=True),
+        Stage('sink', guarded(save), on_close=close, on_idle=writer.flush),
+    ]
+    tasks = hierarchical_tasks(workbook, options, years, contexts, checkpoint)
+    if options.deadline or options.budget:
+        # 상위 분류가 먼저 끝나야 하므로 순서는 바꾸지 않고 마감 시간·예산만 적용
+        # (상위 분류 참고 자료는 투입 시점에 아직 없을 수 있으므로 비용은 참고 자료를 뺀 프롬프트로 추정)
+        tasks = Scheduler(tasks, deadline=options.deadline, budget=options.budget, order=False,
+                          prompt=lambda task: get_prompt(task.row['code_name'], task.row['개념설명'], years),
+                          output_tokens=len(REGIONS) * len(years) * OUTPUT_TOKENS_PER_CELL)
+    failures = FailureLog(options.failures)
+    pipeline = attach(Pipeline('market', tasks, stages, checkpoint, on_failure=failures.record, mark=False), tasks)
+    contexts.stop_event = pipeline.stop_event
+    return pipeline
+
+
+def report_rollup(workbook, tolerance=0.3):
+    """하위 분류 합계가 상위 분류 값과 크게 다른 셀 수 출력"""
+    from idnolab.consistency import rollup_table
+    from idnolab.fx import to_krw
+    from idnolab.normalize import load_market_sheet, market_size_table
+
+    rollup = rollup_table(to_krw(market_size_table(load_market_sheet(workbook))))
+    complete = rollup[rollup['children_ok'] == rollup['children']]
+    off = complete[(complete['ratio'] - 1).abs() > tolerance]
+    print(f"[market] 하위 분류 합계 검사: {len(complete)}개 셀 중 {len(off)}개가 상위 분류 값과 "
+          f"{tolerance:.0%} 이상 차이 (idnolab check로 재조회 계획 생성)")
+
+
+def build(options):
+    workbook = options.workbook or WORKBOOK
+    # --patch: 통합 문서를 한 번만 열고 바뀐 셀만 flush_every 행마다 저장
+    checkpoint = Checkpoint(options.checkpoint)
+    # 결과는 writer에 모아 flush_every 행마다(저장 단계가 한가하면 바로) 저장하고,
+    # 체크포인트는 파일에 저장된 뒤에 writer가 기록 (--patch면 바뀐 셀만 저장)
+    if options.patch:
+        writer = ExcelPatchWriter(workbook, flush_every=options.flush_every, checkpoint=checkpoint)
+    else:
+        writer = ExcelRowSink(workbook, flush_every=options.flush_every, checkpoint=checkpoint)
+    request = api_request('market', request_gemini, options)
+
+    if options.extend:
+        # 새 연도만 조회하고 기존 연도 값은 프롬프트 참고 자료로 전달
+        # (열 추가는 셀 단위 writer로 바로 저장하므로 --patch가 아니면 별도 writer 사용)
+        year = str(options.extend)
+        years = extend_year(workbook, year, writer if options.patch else None)
+        return build_gap_pipeline(options, workbook, writer, checkpoint, years, target_years=(year,), request=request)
+
+    years = workbook_years(workbook)
+    if options.gaps or options.plan:
+        return build_gap_pipeline(options, workbook, writer, checkpoint, years, request=request)
+    if options.hierarchical:
+        return build_hierarchical_pipeline(options, workbook, writer, checkpoint, years, request=request)
+
+    def save(task):
+        # writer가 행을 모아 두므로 sink 작업자는 1개로 유지
+        if save_to_excel_gemini(workbook, task.row['code_name'], task.value, writer=writer, years=years,
+                                index=task.row['index']) is None:
+            raise ValueError("엑셀 저장 실패")
+        writer.done(task.key)
+        # 유사 품목 행에도 같은 결과 기록 (--dedup, 이름이 같을 수 있으므로 행 위치로 저장)
+        for member in task.row.get('members', ()):
+            if save_to_excel_gemini(workbook, member.row['code_name'], task.value, writer=writer, years=years,
+                                    index=member.row['index']) is not None:
+                writer.done(member.key)
+
+    stages = [
+        Stage('prompt', lambda task: get_prompt(task.row['code_name'], task.row['개념설명'], years)),
+        Stage('call', lambda task: request(task.value, config=get_config(years)),
+              workers=options.workers, min_interval=options.interval),
+        Stage('parse', lambda task: parse_industry_data_with_gemini(task.value), drain=True),
+        Stage('validate', validate, drain=True),
+        Stage('sink', save, on_close=writer.close, on_idle=writer.flush),
+    ]
+    # 마지막 조사 연도의 국내 산업규모가 채워져 있으면 처리 완료로 봄
+    tasks = sheet_tasks(workbook, ['개념설명'], rows=options.rows, skip_filled=column_name('market_size', '국내', years[-1]),
+                        code_prefixes=options.codes)
+    if options.dedup:
+        tasks = shared_tasks(workbook, tasks, options, checkpoint)
+    failures = FailureLog(options.failures)
+    tasks = scheduled(workbook, tasks, options, failures,
+                      prompt=lambda task: get_prompt(task.row['code_name'], task.row['개념설명'], years),
+                      output_tokens=len(REGIONS) * len(years) * OUTPUT_TOKENS_PER_CELL)
+    return attach(Pipeline('market', tasks, stages, checkpoint, on_failure=failures.record, mark=False), tasks)
@@ -0,0 +1,29 @@
+"""
+트렌드 기업 조사 파이프라인 (search_trend_company)
+"""
+from gemini_api import (
+    get_prompt, get_packed_prompt, request_gemini,
+    parse_trend_companies_with_gemini, parse_trend_companies_packed_with_gemini,
+    is_valid_trend_companies
+)
+from save_to_excel import save_to_excel
+from idnolab.pipelines.common import build_row_pipeline
+
+WORKBOOK = 'item_info_trend.xlsx'
+PROGRESS_COLUMN = '회사명'
+# 품목 하나의 예상 응답 토큰 수 (국내·해외 기업 2곳의 기업·주력 제품 정보, --budget 비용 추정용)
+OUTPUT_TOKENS = 500
+
+
+def build(options):
+    return build_row_pipeline(
+        'trend', options, WORKBOOK, PROGRESS_COLUMN,
+        prompt=get_prompt,
+        request=request_gemini,
+        parse=parse_trend_companies_with_gemini,
+        validate=is_valid_trend_companies,
+        save_row=save_to_excel,
+        packed_prompt=get_packed_prompt,
+        packed_parse=parse_trend_companies_packed_with_gemini,
+        output_tokens=OUTPUT_TOKENS,
+    )
@@ -0,0 +1,88 @@
+"""
+시장 규모 출처 URL 검사 파이프라인 (check_market_data_url/main.py)
+"""
+import asyncio
+import threading
+
+import aiohttp
+import pandas as pd
+
+from main import check_url, collect_url_tasks, save_result_json
+from idnolab import metrics
+from idnolab.cache import ResponseCache
+from idnolab.pipeline import Pipeline, Stage, Task
+from idnolab.singleflight import SingleFlight, cached_call
+
+WORKBOOK = 'item_info_v0.xlsx'
+COLUMNS_TO_CHECK = [6, 10, 14, 18, 22, 26]
+
+
+class AsyncSessionRunner:
+    """
+    별도 스레드의 이벤트 루프에서 aiohttp 세션을 공유하며 코루틴을 실행
+    (스레드 작업자들이 비동기 check_url을 그대로 사용할 수 있게 함)
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="urlcheck-loop", daemon=True)
+        self.thread.start()
+        self.session = self.run(self._open_session())
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(
+            limit=30,  # 전체 연결 풀 크기
+            limit_per_host=5,  # 호스트당 연결 수 제한
+            ttl_dns_cache=300,  # DNS 캐시 TTL
+            use_dns_cache=True,
+            keepalive_timeout=30,  # Keep-alive 타임아웃
+            enable_cleanup_closed=True
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=20, connect=10)
+        )
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def close(self):
+        self.run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+def build(options):
+    workbook = options.workbook or WORKBOOK
+    df = pd.read_excel(workbook)
+    url_dict, all_url_tasks = collect_url_tasks(df, COLUMNS_TO_CHECK)
+    runner = AsyncSessionRunner()
+    invalid_urls_with_info = []
+    lock = threading.Lock()
+    # 같은 URL은 여러 행에 반복되므로 실행 중 한 번만 검사하고 (동시 요청도 하나로 합침) 결과를 재사용
+    flight = SingleFlight('url')
+    checked = ResponseCache(name='url')
+
+    def check(task):
+        url, source_info = task.row['url'], task.row['source_info']
+        invalid_url, status, _ = cached_call(
+            url.strip(), lambda: runner.run(check_url(runner.session, url, source_info)), flight, checked
+        )
+        return invalid_url, status, source_info
+
+    def collect(task):
+        metrics.URL_CHECKS.inc(result=task.value[1])
+        if task.value[0] is not None:
+            with lock:
+                invalid_urls_with_info.append(task.value)
+
+    def close():
+        runner.close()
+        save_result_json(workbook, df, COLUMNS_TO_CHECK, url_dict, all_url_tasks, invalid_urls_with_info)
+
+    tasks = (Task(key=None, row={'url': url, 'source_info': source_info}) for url, source_info in all_url_tasks)
+    stages = [
+        Stage('check', check, workers=options.workers, min_interval=options.interval),
+        Stage('sink', collect, on_close=close),
+    ]
+    return Pipeline('urlcheck', tasks, stages)
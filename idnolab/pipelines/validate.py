@@ -0,0 +1,56 @@
+"""
+키워드 데이터 유효성 검증 파이프라인 (search_item_keyword/vaild_data.py)
+"""
+import threading
+
+from vaild_data import validate_keyword_with_gemini, save_validation_results, KeywordValidationResult
+from idnolab.pipeline import Pipeline, Stage, Task
+from idnolab.ratelimit import limiter
+from idnolab.source import sheet_tasks, is_filled
+
+WORKBOOK = 'item_info_keyword_v1.0.xlsx'
+OUTPUT = 'validation_results.xlsx'
+
+
+def keyword_tasks(path, rows=None, code_prefixes=None):
+    """행마다 item_keyword_1~3을 검증 작업으로 변환 (필요한 열만 스트리밍으로 읽음)"""
+    columns = [f'{field}_{i}' for i in range(1, 4) for field in ('item_keyword', 'item_description', 'item_url')]
+    for row_task in sheet_tasks(path, columns, rows=rows, code_prefixes=code_prefixes):
+        row = row_task.row
+        for i in range(1, 4):
+            keyword = row.get(f'item_keyword_{i}')
+            description = row.get(f'item_description_{i}')
+            url = row.get(f'item_url_{i}')
+            if is_filled(keyword) and is_filled(description) and is_filled(url):
+                yield Task(key=f"{row['index']}:{i}", row={
+                    'item_name': row['code_name'],
+                    'item_keyword': keyword,
+                    'item_description': description,
+                    'item_url': url,
+                })
+
+
+def build(options):
+    results = []
+    lock = threading.Lock()
+    # 호출 간격은 적응형 속도 제한기가 조절 (--rpm, --tpm, --max-rpm)
+    rate = limiter('gemini', 'gemini-2.5-pro', rpm=options.rpm, tpm=options.tpm,
+                   max_rpm=options.max_rpm) if options.rpm else None
+
+    def collect(task):
+        validation_score = task.value
+        result = KeywordValidationResult(
+            validation_score=validation_score,
+            is_valid=validation_score.total_score >= 17,  # 70% 이상이면 유효
+            **task.row
+        )
+        with lock:
+            results.append(result.model_dump())
+
+    stages = [
+        Stage('call', lambda task: validate_keyword_with_gemini(**task.row, rate_limiter=rate),
+              workers=options.workers, min_interval=options.interval),
+        Stage('sink', collect, on_close=lambda: save_validation_results(results, options.output or OUTPUT)),
+    ]
+    # 결과를 종료 시점에 한 번에 저장하므로 체크포인트는 사용하지 않음
+    return Pipeline('validate', keyword_tasks(options.workbook or WORKBOOK, options.rows, options.codes), stages)
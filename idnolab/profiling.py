@@ -0,0 +1,112 @@
+"""
+샘플링 프로파일러
+
+별도 스레드가 일정 간격으로 모든 스레드의 호출 스택을 수집해
+flamegraph.pl / speedscope / inferno에서 바로 열 수 있는 collapsed stack 형식으로 저장한다.
+
+    profiler = SamplingProfiler(interval=0.005)
+    profiler.start()
+    ...
+    profiler.stop()
+    profiler.write('profile.folded')
+
+파이프라인 작업자는 대부분 API 응답을 기다리며 멈춰 있으므로 CPU 시간이 아닌
+벽시계 시간 기준으로 샘플링한다. 큐에서 다음 작업을 기다리는 유휴 스택은 기본적으로 제외한다.
+"""
+import os
+import sys
+import threading
+from collections import Counter
+
+# 유휴 상태로 보는 프레임 (큐 대기, 스레드 종료 대기)
+IDLE_FRAMES = ('get (queue.py', 'join (threading.py', '_wait_for_tstate_lock (threading.py')
+
+
+class SamplingProfiler:
+    """
+    호출 스택 샘플링 프로파일러
+
+    Args:
+        interval (float): 샘플링 간격(초)
+        include_idle (bool): 큐 대기, 스레드 종료 대기 같은 유휴 스택도 기록할지 여부
+    """
+
+    def __init__(self, interval=0.005, include_idle=False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self._collapse(frame)
+                if not self.include_idle and self._is_idle(stack):
+                    continue
+                self.stacks[f"{names.get(thread_id, thread_id)};{stack}"] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _collapse(frame):
+        """프레임을 바깥쪽 호출부터 'a;b;c' 형태 문자열로 변환"""
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(parts))
+
+    @staticmethod
+    def _is_idle(stack):
+        # 작업자가 큐에서 다음 작업을 기다리거나 메인 스레드가 작업자 종료를 기다리는 스택
+        tail = stack.rsplit(';', 3)[-3:]
+        return any(part.startswith(IDLE_FRAMES) for part in tail)
+
+    def write(self, path):
+        """
+        collapsed stack 형식으로 저장 (한 줄에 '스택 샘플수')
+
+        Returns:
+            str: 저장 경로
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def top(self, limit=10):
+        """
+        가장 많이 샘플링된 함수 (스택의 맨 안쪽 함수 기준)
+
+        Returns:
+            list[tuple[str, float]]: (함수, 비율)
+        """
+        leaves = Counter()
+        total = sum(self.stacks.values()) or 1
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return [(name, count / total) for name, count in leaves.most_common(limit)]
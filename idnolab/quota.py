@@ -0,0 +1,199 @@
+"""
+프로세스 간 공유 호출 할당량 (SQLite 파일 기반 토큰 버킷)
+
+market / trend / keyword 파이프라인을 같은 API 키로 동시에 돌리면 각자 속도를 조절해도
+합친 속도가 할당량을 넘어 서로 429를 일으킨다. 같은 할당량 파일을 쓰는 모든 프로세스가
+(제공자, 모델, API 키)별 버킷 하나에서 호출 차례와 토큰을 받아 가도록 해 합친 속도를 맞춘다.
+
+- 버킷 상태(RPM, 다음 호출 시각, 토큰, 멈춤 시각)는 파일에 있으므로 AIMD 조절(idnolab.ratelimit)도
+  모든 프로세스가 함께 따른다 (한 프로세스가 429를 받으면 모두 느려짐)
+- 기다리는 호출은 waiters 표에 등록하고, 우선순위가 높은 호출부터 (같으면 먼저 온 순서로) 차례를 받는다
+- 프로세스가 죽어 남은 대기 기록은 STALE_AFTER 초 뒤 지운다
+
+    from idnolab.ratelimit import configure, limiter
+
+    configure(quota='~/.idnolab/quota.db', priority=10)
+    rate = limiter('gemini', 'gemini-2.5-pro', rpm=6)  # SharedRateLimiter
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from logger_config import get_logger
+from idnolab import metrics
+from idnolab.ratelimit import AdaptiveRateLimiter, DEFAULT_RPM, MIN_RPM, INCREASE, DECREASE, quota_headers
+
+# 로거 설정
+logger = get_logger("quota")
+
+# 대기 중 상태를 다시 확인하는 간격(초)
+POLL_INTERVAL = 0.2
+# 이 시간 동안 갱신되지 않은 대기 기록은 종료된 프로세스의 것으로 보고 지움
+STALE_AFTER = 10.0
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS buckets (
+        name TEXT PRIMARY KEY, rpm REAL NOT NULL, tpm REAL, max_rpm REAL,
+        next_at REAL NOT NULL DEFAULT 0, paused_until REAL NOT NULL DEFAULT 0, last_cut REAL NOT NULL DEFAULT 0,
+        tokens REAL NOT NULL DEFAULT 0, tokens_at REAL NOT NULL DEFAULT 0)""",
+    """CREATE TABLE IF NOT EXISTS waiters (
+        id TEXT PRIMARY KEY, name TEXT NOT NULL, priority INTEGER NOT NULL, since REAL NOT NULL,
+        updated_at REAL NOT NULL, pid INTEGER)""",
+)
+
+
+class SharedRateLimiter(AdaptiveRateLimiter):
+    """
+    여러 프로세스가 공유하는 적응형 속도 제한기
+
+    AdaptiveRateLimiter와 같은 방식(acquire / slot / call / on_success / on_throttle)으로 쓰며,
+    상태는 path의 SQLite 파일에 둔다. 버킷을 처음 만든 프로세스의 rpm / tpm / max_rpm 설정을 따른다.
+
+    Args:
+        path (str): 할당량 파일 경로
+        name (str): 버킷 이름 (제공자:모델:키)
+        priority (int): 차례를 기다릴 때 우선순위 (클수록 먼저)
+        나머지 인자는 AdaptiveRateLimiter와 같음
+    """
+
+    def __init__(self, path, name, rpm=DEFAULT_RPM, tpm=None, min_rpm=MIN_RPM, max_rpm=None, increase=INCREASE,
+                 decrease=DECREASE, priority=0):
+        super().__init__(name, rpm, tpm, min_rpm, max_rpm, increase, decrease)
+        self.path = path
+        self.priority = priority
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db_lock = threading.Lock()
+        with self._transaction() as db:
+            for statement in _SCHEMA:
+                db.execute(statement)
+            db.execute('INSERT OR IGNORE INTO buckets (name, rpm, tpm, max_rpm, tokens, tokens_at) '
+                       'VALUES (?, ?, ?, ?, ?, ?)', (name, self.rpm, tpm, max_rpm, tpm or 0, time.time()))
+            self._load(db)
+        logger.info(f"[{name}] 공유 할당량 사용: {path} (현재 {self.rpm:.1f} RPM, 우선순위 {priority})")
+
+    @contextmanager
+    def _transaction(self):
+        """쓰기 잠금을 잡은 트랜잭션 (다른 프로세스는 끝날 때까지 대기)"""
+        with self._db_lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    def _load(self, db):
+        """버킷 행을 읽어 이 프로세스의 설정값도 맞춤"""
+        row = db.execute('SELECT rpm, tpm, max_rpm, next_at, paused_until, last_cut, tokens, tokens_at '
+                         'FROM buckets WHERE name = ?', (self.name,)).fetchone()
+        self.rpm, self.tpm, self.max_rpm = row[0], row[1], row[2]
+        return dict(zip(('next_at', 'paused_until', 'last_cut', 'tokens', 'tokens_at'), row[3:]))
+
+    def _update(self, db, **values):
+        columns = ', '.join(f'{column} = ?' for column in values)
+        db.execute(f'UPDATE buckets SET {columns} WHERE name = ?', (*values.values(), self.name))
+
+    def acquire(self, tokens=0):
+        """
+        공유 버킷에서 호출 차례를 받을 때까지 대기
+
+        Returns:
+            float: 실제 호출 시각 (time.time 기준)
+        """
+        waiter = uuid.uuid4().hex
+        since = time.time()
+        with self._transaction() as db:
+            db.execute('INSERT INTO waiters (id, name, priority, since, updated_at, pid) VALUES (?, ?, ?, ?, ?, ?)',
+                       (waiter, self.name, self.priority, since, since, os.getpid()))
+        try:
+            while True:
+                with self._transaction() as db:
+                    now = time.time()
+                    db.execute('DELETE FROM waiters WHERE updated_at < ?', (now - STALE_AFTER,))
+                    db.execute('UPDATE waiters SET updated_at = ? WHERE id = ?', (now, waiter))
+                    ahead = db.execute(
+                        'SELECT COUNT(*) FROM waiters WHERE name = ? AND id != ? '
+                        'AND (priority > ? OR (priority = ? AND since < ?))',
+                        (self.name, waiter, self.priority, self.priority, since)).fetchone()[0]
+                    state = self._load(db)
+                    start = max(now, state['next_at'], state['paused_until'])
+                    if self.tpm and tokens:
+                        start, remaining = self._shared_tokens(state, start, tokens)
+                    if not ahead and start <= now:
+                        values = {'next_at': now + 60.0 / self.rpm}
+                        if self.tpm and tokens:
+                            values.update(tokens=remaining, tokens_at=now)
+                        self._update(db, **values)
+                        db.execute('DELETE FROM waiters WHERE id = ?', (waiter,))
+                        waiter = None
+                        return now
+                wait = POLL_INTERVAL if ahead else start - now
+                time.sleep(min(max(wait, 0.01), POLL_INTERVAL))
+        finally:
+            if waiter is not None:
+                with self._transaction() as db:
+                    db.execute('DELETE FROM waiters WHERE id = ?', (waiter,))
+
+    def ready_in(self):
+        with self._db_lock:
+            next_at, paused_until = self._db.execute('SELECT next_at, paused_until FROM buckets WHERE name = ?',
+                                                     (self.name,)).fetchone()
+        return max(0.0, next_at - time.time(), paused_until - time.time())
+
+    def _shared_tokens(self, state, start, tokens):
+        """공유 토큰 버킷에서 tokens를 쓸 수 있는 시각과 쓴 뒤 남는 토큰"""
+        rate = self.tpm / 60.0
+        tokens = min(tokens, self.tpm)
+        available = min(self.tpm, state['tokens'] + (start - state['tokens_at']) * rate)
+        if tokens > available:
+            return start + (tokens - available) / rate, 0.0
+        return start, available - tokens
+
+    def on_success(self):
+        with self._transaction() as db:
+            self._load(db)
+            self.rpm = self._clamp(self.rpm + self.increase / self.rpm)
+            self._update(db, rpm=self.rpm)
+        metrics.RATE_LIMIT.set(self.rpm, limiter=self.name)
+
+    def on_throttle(self, delay=None, issued_at=None):
+        with self._transaction() as db:
+            state = self._load(db)
+            now = time.time()
+            cut = issued_at is None or issued_at >= state['last_cut']
+            if cut:
+                self.rpm = self._clamp(self.rpm * self.decrease)
+                state['last_cut'] = now
+            if delay:
+                state['paused_until'] = max(state['paused_until'], now + delay)
+            next_at = max(state['next_at'], state['paused_until'], now + 60.0 / self.rpm)
+            self._update(db, rpm=self.rpm, last_cut=state['last_cut'], paused_until=state['paused_until'],
+                         next_at=next_at)
+        metrics.RATE_LIMIT.set(self.rpm, limiter=self.name)
+        if cut:
+            logger.warning(f"[{self.name}] 429 응답, 공유 호출 속도 {self.rpm:.1f} RPM으로 낮춤"
+                           + (f" ({delay:.1f}초 대기)" if delay else ""))
+
+    def observe_headers(self, headers):
+        if not headers:
+            return
+        limit, remaining, reset = quota_headers(headers)
+        if not limit and not (remaining == 0 and reset):
+            return
+        with self._transaction() as db:
+            state = self._load(db)
+            if limit:
+                self.max_rpm = limit if self.max_rpm is None else min(self.max_rpm, limit)
+                self.rpm = self._clamp(self.rpm)
+                self._update(db, rpm=self.rpm, max_rpm=self.max_rpm)
+            if remaining == 0 and reset:
+                paused_until = max(state['paused_until'], time.time() + reset)
+                self._update(db, paused_until=paused_until, next_at=max(state['next_at'], paused_until))
@@ -0,0 +1,316 @@
+"""
+적응형 호출 속도 제한 (AIMD)
+
+(제공자, 모델, API 키)마다 제한기 하나를 두고 모든 호출이 이를 거쳐 나간다.
+
+- 시작 속도: 설정한 RPM (분당 요청 수) / TPM (분당 토큰 수)
+- 성공하면 조금씩 올림: 성공 한 번마다 increase / RPM 만큼 (1분 동안 계속 성공하면 약 +increase RPM)
+- 429 / RESOURCE_EXHAUSTED 응답을 받으면 RPM에 decrease를 곱해 낮추고, Retry-After(또는 retryDelay)가
+  있으면 그 시간 동안 모든 호출을 멈춤
+- 응답 헤더에 남은 요청 수(x-ratelimit-remaining-requests)가 0이면 초기화 시각까지 멈춤
+
+그래서 고정 간격(time.sleep) 대신 실제 할당량에 맞춰 처리 속도가 따라간다.
+
+    from idnolab.ratelimit import limiter
+
+    rate = limiter('gemini', 'gemini-2.5-pro', rpm=6)
+    with rate.slot(tokens=estimate_tokens(prompt)):
+        text = request_gemini(prompt)
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from logger_config import get_logger
+from idnolab import metrics
+
+# 로거 설정
+logger = get_logger("ratelimit")
+
+# 기본값
+DEFAULT_RPM = 6.0
+MIN_RPM = 0.5
+INCREASE = 1.0
+DECREASE = 0.5
+# 응답 토큰 추정치 (요청 전에는 응답 길이를 알 수 없으므로 고정값으로 더함)
+OUTPUT_TOKENS = 1000
+
+# 429 응답 본문의 RetryInfo (예: 'retryDelay': '27s')
+_RETRY_DELAY = re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s")
+# 헤더의 기간 표기 (예: '6m0s', '1.5s', '20ms')
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNITS = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+
+
+def is_throttled(error):
+    """429 / RESOURCE_EXHAUSTED 응답 여부"""
+    return metrics.classify_error(error) == 'rate_limited'
+
+
+def _seconds(value):
+    """'30', '6m0s', 'Wed, 21 Oct 2026 07:28:00 GMT' 같은 헤더 값을 초로 변환 (해석할 수 없으면 None)"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if parts and ''.join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * _UNITS[unit] for number, unit in parts)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def retry_after(error):
+    """
+    429 예외에서 다시 호출해도 되는 시간(초) 추출
+
+    응답 헤더의 Retry-After를 먼저 보고, 없으면 오류 본문의 retryDelay를 본다.
+
+    Returns:
+        float or None: 대기 시간(초), 알 수 없으면 None
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if headers is not None:
+        delay = _seconds(headers.get('Retry-After') or headers.get('retry-after'))
+        if delay is not None:
+            return delay
+    match = _RETRY_DELAY.search(str(getattr(error, 'details', None) or error))
+    return float(match.group(1)) if match else None
+
+
+def quota_headers(headers):
+    """
+    응답 헤더의 요청 할당량 정보
+
+    Returns:
+        tuple: (분당 요청 한도, 남은 요청 수, 초기화까지 남은 시간(초)), 없는 값은 None
+    """
+    return tuple(_seconds(headers.get(f'x-ratelimit-{field}-requests')) for field in ('limit', 'remaining', 'reset'))
+
+
+def estimate_tokens(*texts, output_tokens=OUTPUT_TOKENS):
+    """프롬프트 길이로 추정한 요청 토큰 수 (한글이 섞인 문장은 대략 2자당 1토큰)"""
+    return sum(len(text) for text in texts if isinstance(text, str)) // 2 + output_tokens
+
+
+class AdaptiveRateLimiter:
+    """
+    분당 요청 수 / 토큰 수 제한기
+
+    호출마다 다음 호출 시각을 미리 예약해 여러 작업자가 동시에 써도 간격이 지켜진다.
+
+    Args:
+        name (str): 이름 (로그·지표 라벨)
+        rpm (float): 시작 RPM
+        tpm (float): 분당 토큰 수 제한 (None이면 제한하지 않음)
+        min_rpm (float): RPM 하한
+        max_rpm (float): RPM 상한 (None이면 429가 날 때까지 올림)
+        increase (float): 1분 동안 계속 성공할 때 올리는 RPM
+        decrease (float): 429를 받을 때 RPM에 곱하는 비율
+    """
+
+    def __init__(self, name, rpm=DEFAULT_RPM, tpm=None, min_rpm=MIN_RPM, max_rpm=None, increase=INCREASE,
+                 decrease=DECREASE):
+        self.name = name
+        self.min_rpm = min_rpm
+        self.max_rpm = max_rpm
+        self.rpm = self._clamp(rpm)
+        self.tpm = tpm
+        self.increase = increase
+        self.decrease = decrease
+        self._next = 0.0
+        self._paused_until = 0.0
+        self._last_cut = float('-inf')
+        self._tokens = float(tpm or 0)
+        self._tokens_at = time.monotonic()
+        self._lock = threading.Lock()
+        metrics.RATE_LIMIT.set(self.rpm, limiter=name)
+
+    def _clamp(self, rpm):
+        rpm = max(self.min_rpm, rpm)
+        return min(self.max_rpm, rpm) if self.max_rpm else rpm
+
+    def _reserve_tokens(self, start, tokens):
+        """start 시각까지 토큰 버킷을 채우고 tokens를 쓸 수 있는 시각을 반환"""
+        rate = self.tpm / 60.0
+        tokens = min(tokens, self.tpm)
+        available = min(self.tpm, self._tokens + (start - self._tokens_at) * rate)
+        if tokens > available:
+            start += (tokens - available) / rate
+            available = tokens
+        self._tokens = available - tokens
+        self._tokens_at = start
+        return start
+
+    def acquire(self, tokens=0):
+        """
+        호출 차례가 올 때까지 대기
+
+        Args:
+            tokens (int): 이번 호출에 쓸 토큰 추정치 (tpm을 설정했을 때만 사용)
+
+        Returns:
+            float: 실제 호출 시각 (time.monotonic 기준, on_throttle의 issued_at으로 넘김)
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next, self._paused_until)
+            if self.tpm and tokens:
+                start = self._reserve_tokens(start, tokens)
+            self._next = start + 60.0 / self.rpm
+        if start > now:
+            time.sleep(start - now)
+        # 기다리는 동안 429로 멈춤이 걸렸으면 풀릴 때까지 더 기다림
+        while True:
+            with self._lock:
+                pause = self._paused_until - time.monotonic()
+            if pause <= 0:
+                return time.monotonic()
+            time.sleep(pause)
+
+    def ready_in(self):
+        """다음 호출 차례까지 남은 시간(초, 키 풀에서 여유가 많은 키를 고를 때 사용)"""
+        with self._lock:
+            return max(0.0, self._next - time.monotonic(), self._paused_until - time.monotonic())
+
+    def on_success(self):
+        """성공 응답: RPM을 조금 올림"""
+        with self._lock:
+            self.rpm = self._clamp(self.rpm + self.increase / self.rpm)
+            rpm = self.rpm
+        metrics.RATE_LIMIT.set(rpm, limiter=self.name)
+
+    def on_throttle(self, delay=None, issued_at=None):
+        """
+        429 응답: RPM을 낮추고 delay(초) 동안 호출을 멈춤
+
+        마지막으로 낮춘 뒤에 보낸 요청의 429만 다시 낮춘다 (동시에 보낸 요청들이 한꺼번에 429를 받아도
+        한 번만 낮추도록).
+
+        Args:
+            delay (float): Retry-After 등으로 알려진 대기 시간(초)
+            issued_at (float): 429를 받은 요청을 보낸 시각 (acquire 반환값)
+        """
+        with self._lock:
+            now = time.monotonic()
+            cut = issued_at is None or issued_at >= self._last_cut
+            if cut:
+                self.rpm = self._clamp(self.rpm * self.decrease)
+                self._last_cut = now
+            if delay:
+                self._paused_until = max(self._paused_until, now + delay)
+            # 이미 예약된 다음 호출도 낮춘 속도에 맞춰 미룸
+            self._next = max(self._next, self._paused_until, now + 60.0 / self.rpm)
+            rpm = self.rpm
+        metrics.RATE_LIMIT.set(rpm, limiter=self.name)
+        if cut:
+            logger.warning(f"[{self.name}] 429 응답, 호출 속도 {rpm:.1f} RPM으로 낮춤"
+                           + (f" ({delay:.1f}초 대기)" if delay else ""))
+
+    def observe_headers(self, headers):
+        """
+        응답 헤더의 할당량 정보 반영
+
+        - x-ratelimit-limit-requests: 분당 요청 한도 → RPM 상한
+        - x-ratelimit-remaining-requests가 0이면 x-ratelimit-reset-requests까지 멈춤
+        """
+        if not headers:
+            return
+        limit, remaining, reset = quota_headers(headers)
+        with self._lock:
+            if limit:
+                self.max_rpm = limit if self.max_rpm is None else min(self.max_rpm, limit)
+                self.rpm = self._clamp(self.rpm)
+            if remaining == 0 and reset:
+                self._paused_until = max(self._paused_until, time.monotonic() + reset)
+                self._next = max(self._next, self._paused_until)
+
+    @contextmanager
+    def slot(self, tokens=0):
+        """acquire 후 블록 안의 호출 결과(성공 / 429)를 속도에 반영"""
+        issued_at = self.acquire(tokens)
+        try:
+            yield
+        except Exception as e:
+            if is_throttled(e):
+                self.on_throttle(retry_after(e), issued_at)
+            raise
+        self.on_success()
+
+    def call(self, func, *args, **kwargs):
+        """func(*args, **kwargs)를 속도 제한 아래에서 호출 (토큰 수는 문자열 인자 길이로 추정)"""
+        tokens = estimate_tokens(*args) if self.tpm else 0
+        with self.slot(tokens):
+            return func(*args, **kwargs)
+
+
+# (제공자, 모델, API 키)별 제한기
+_limiters = {}
+_limiters_lock = threading.Lock()
+# 프로세스 간 공유 할당량 파일과 이 프로세스의 우선순위 (idnolab.quota, 환경변수로도 지정 가능)
+_shared = {'quota': os.getenv('IDNOLAB_QUOTA'), 'priority': int(os.getenv('IDNOLAB_PRIORITY', 0))}
+
+
+def key_id(api_key):
+    """로그·지표에 남겨도 되는 API 키 식별자 (해시 앞 8자리)"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:8] if api_key else 'default'
+
+
+def configure(quota=None, priority=None):
+    """
+    공유 할당량 파일과 우선순위 설정 (이후 처음 만드는 제한기부터 적용)
+
+    Args:
+        quota (str): 할당량 파일 경로 (같은 파일을 쓰는 프로세스끼리 호출 속도를 나눠 씀)
+        priority (int): 차례를 기다릴 때 우선순위 (클수록 먼저)
+    """
+    if quota is not None:
+        _shared['quota'] = os.path.abspath(os.path.expanduser(quota))
+    if priority is not None:
+        _shared['priority'] = priority
+
+
+def limiter(provider, model=None, api_key=None, **options):
+    """
+    (제공자, 모델, API 키)별 제한기 (처음 부를 때 options로 생성)
+
+    공유 할당량 파일을 설정했으면(configure, IDNOLAB_QUOTA) 다른 프로세스와 상태를 나누는
+    SharedRateLimiter를 만든다.
+
+    Args:
+        provider (str): API 제공자
+        model (str): 모델 이름
+        api_key (str): API 키 (기본값: 제공자의 API 키 환경변수)
+        **options: AdaptiveRateLimiter 인자 (rpm, tpm, max_rpm 등)
+    """
+    if api_key is None:
+        api_key = os.getenv({'gemini': 'GOOGLE_API_KEY', 'perplexity': 'PERPLEXITY_API_KEY'}.get(provider, ''), '')
+    name = ':'.join(part for part in (provider, model, key_id(api_key)) if part)
+    with _limiters_lock:
+        if name not in _limiters:
+            if _shared['quota']:
+                from idnolab.quota import SharedRateLimiter
+
+                _limiters[name] = SharedRateLimiter(_shared['quota'], name, priority=_shared['priority'], **options)
+            else:
+                _limiters[name] = AdaptiveRateLimiter(name, **options)
+        return _limiters[name]
+
+
+def limited(request, provider, model=None, **options):
+    """요청 함수를 (제공자, 모델, API 키)별 제한기 아래에서 호출하도록 감쌈"""
+    rate = limiter(provider, model, **options)
+
+    def call(*args, **kwargs):
+        return rate.call(request, *args, **kwargs)
+
+    return call
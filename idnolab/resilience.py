@@ -0,0 +1,297 @@
+"""
+API 호출 재시도 / 서킷 브레이커 / 실행 전체 재시도 예산
+
+모든 API 클라이언트가 같은 규칙으로 재시도하도록 한곳에 모은다.
+
+- 오류 분류: rate_limited·server_error·timeout·연결 오류는 재시도, 할당량 소진·인증 오류는 실행 중단,
+  그 밖의 오류(잘못된 요청 등)는 재시도하지 않음
+- 재시도 간격: 지수 백오프 + full jitter (작업자들이 같은 순간에 다시 몰리지 않게 함)
+- 서킷 브레이커: (제공자, 모델)마다 연속 실패가 쌓이면 일정 시간 호출을 막고 시험 호출 시각까지 기다리게 함.
+  성공 없이 여러 번 연달아 열리면 장애로 보고 실행을 중단
+- 재시도 예산: 실행 전체의 재시도 횟수를 요청 수의 일정 비율로 제한 (장애 때 재시도가 요청을 몇 배로 불리지 않게 함)
+
+    from idnolab.resilience import RetryPolicy
+
+    policy = RetryPolicy('gemini', 'gemini-2.5-pro', max_attempts=3)
+    text = policy.call(request_gemini, prompt)
+"""
+import random
+import threading
+import time
+
+from logger_config import get_logger
+from idnolab import metrics
+from idnolab.pipeline import AbortRun
+
+# 로거 설정
+logger = get_logger("resilience")
+
+# 오류 분류
+RETRYABLE = 'retryable'
+FATAL = 'fatal'
+ABORT = 'abort'
+
+# 서킷 브레이커 기본값
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 60.0
+# 성공 없이 이 횟수만큼 연달아 열리면 실행 중단
+MAX_OPENINGS = 3
+# 다른 작업자의 시험 호출 결과를 기다릴 때 확인 간격(초)
+PROBE_POLL = 0.5
+
+# 할당량 소진 / 인증 오류로 보는 응답 문구
+# (일반 429 응답도 'check quota'를 포함하므로 'quota'만으로는 판단하지 않음)
+_ABORT_MARKERS = ('exceeded your current quota', 'perday', 'per day', 'billing', 'api key not valid',
+                  'permission_denied', 'unauthenticated')
+
+
+class QuotaExhausted(AbortRun):
+    """할당량 소진 또는 인증 오류 (재시도해도 성공할 수 없으므로 실행을 중단)"""
+
+
+class ProviderDown(AbortRun):
+    """서킷 브레이커가 성공 없이 여러 번 열림 (제공자 장애로 보고 실행을 중단)"""
+
+
+def status_code(error):
+    """예외에서 HTTP 상태 코드 추출 (google.genai, requests, aiohttp 예외)"""
+    status = getattr(error, 'code', None) or getattr(error, 'status', None)
+    if not isinstance(status, int):
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def classify(error):
+    """
+    예외를 재시도 규칙으로 분류
+
+    Returns:
+        str: RETRYABLE, FATAL(이 요청만 실패), ABORT(실행 중단) 중 하나
+    """
+    if isinstance(error, AbortRun):
+        return ABORT
+    status = status_code(error)
+    text = str(error).lower()
+    if status in (401, 403) or any(marker in text for marker in _ABORT_MARKERS):
+        return ABORT
+    if metrics.classify_error(error) != 'other':
+        return RETRYABLE
+    if isinstance(error, (ConnectionError, OSError)) or 'connection' in text:
+        return RETRYABLE
+    return FATAL
+
+
+def backoff(attempt, base=2.0, cap=60.0):
+    """재시도 대기 시간 (full jitter: 0 ~ min(cap, base * 2^attempt) 균등 분포)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 threshold에 이르면 reset_timeout 동안 열려(호출 대기) 있다가,
+    이후 한 번의 시험 호출이 성공하면 닫히고 실패하면 다시 열린다.
+
+    Args:
+        name (str): 이름 (예: 'gemini:gemini-2.5-pro')
+        threshold (int): 열리는 연속 실패 수
+        reset_timeout (float): 열린 상태 유지 시간(초)
+        max_openings (int): 성공 없이 이 횟수만큼 열리면 ProviderDown
+    """
+
+    def __init__(self, name, threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, max_openings=MAX_OPENINGS):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.max_openings = max_openings
+        self.failures = 0
+        self.openings = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def before(self):
+        """
+        호출 전 확인
+
+        열려 있으면 시험 호출 시각(half_open)까지 기다리고, 다른 작업자가 시험 호출 중이면 그 결과를 기다린다.
+        이미 ProviderDown으로 판정된 브레이커면 바로 ProviderDown을 던져 파이프라인이 멈추게 한다.
+
+        Returns:
+            bool: 이번 호출이 시험 호출이면 True (success / failure / release_probe 중 하나로 끝내야 함)
+        """
+        while True:
+            with self._lock:
+                if self.openings >= self.max_openings:
+                    raise ProviderDown(f"{self.name} 서킷 브레이커가 성공 없이 {self.openings}회 열림")
+                state = self._state()
+                if state == 'closed':
+                    return False
+                if state == 'half_open' and not self._probing:
+                    self._probing = True
+                    return True
+                wait = self.reset_timeout - (time.monotonic() - self.opened_at)
+            time.sleep(min(max(wait, PROBE_POLL), self.reset_timeout))
+
+    def success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"[{self.name}] 서킷 브레이커 닫힘")
+            self.failures = 0
+            self.openings = 0
+            self.opened_at = None
+            self._probing = False
+
+    def release_probe(self):
+        """
+        제공자 상태와 무관하게 끝난 시험 호출(잘못된 요청, 실행 중단, 인터럽트)의 자리를 돌려줌
+
+        브레이커 상태는 바꾸지 않으므로 다음 호출자가 다시 시험 호출을 한다.
+        """
+        with self._lock:
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            probing, self._probing = self._probing, False
+            if not probing and (self.opened_at is not None or self.failures < self.threshold):
+                return
+            self.opened_at = time.monotonic()
+            self.openings += 1
+            openings = self.openings
+        metrics.CIRCUIT_OPEN.inc(breaker=self.name)
+        logger.warning(f"[{self.name}] 서킷 브레이커 열림 ({self.reset_timeout:.0f}초, {openings}/{self.max_openings}회)")
+        if openings >= self.max_openings:
+            raise ProviderDown(f"{self.name} 서킷 브레이커가 성공 없이 {openings}회 열림")
+
+
+class RetryBudget:
+    """
+    실행 전체 재시도 예산: 재시도 수 <= minimum + ratio * 요청 수
+
+    Args:
+        ratio (float): 요청 대비 허용 재시도 비율
+        minimum (int): 요청 수와 관계없이 허용하는 재시도 수
+    """
+
+    def __init__(self, ratio=0.2, minimum=10):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def allow(self):
+        """재시도 한 번을 예산에서 차감 (예산이 없으면 False)"""
+        with self._lock:
+            if self.retries >= self.minimum + self.ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+
+# 실행 전체에서 공유하는 예산과 (제공자, 모델)별 서킷 브레이커
+BUDGET = RetryBudget()
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(provider, model=None):
+    """(제공자, 모델)별 서킷 브레이커"""
+    name = f"{provider}:{model}" if model else provider
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def configure(retry_budget=None):
+    """실행 옵션으로 전역 재시도 예산 비율 설정"""
+    if retry_budget is not None:
+        BUDGET.ratio = retry_budget
+
+
+class RetryPolicy:
+    """
+    재시도 규칙을 적용해 함수를 호출
+
+    Args:
+        provider (str): API 제공자 (지표 라벨, 서킷 브레이커 키)
+        model (str): 모델 이름 (서킷 브레이커 키)
+        max_attempts (int): 최대 시도 횟수 (첫 호출 포함)
+        base_delay (float): 백오프 기준 대기 시간(초)
+        max_delay (float): 백오프 최대 대기 시간(초)
+        budget (RetryBudget): 재시도 예산 (기본값: 실행 전체 예산)
+    """
+
+    def __init__(self, provider, model=None, max_attempts=3, base_delay=2.0, max_delay=60.0, budget=None):
+        self.provider = provider
+        self.breaker = breaker(provider, model)
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or BUDGET
+
+    def call(self, func, *args, **kwargs):
+        for attempt in range(self.max_attempts):
+            probe = self.breaker.before()
+            self.budget.record_request()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                kind = classify(e)
+                if kind != RETRYABLE and probe:
+                    # 시험 호출이 제공자 상태와 무관하게 끝나면 자리만 돌려줌 (다른 작업자가 계속 기다리지 않게)
+                    self.breaker.release_probe()
+                if kind == ABORT:
+                    logger.error(f"[{self.provider}] 실행 중단 오류: {e}")
+                    if isinstance(e, AbortRun):
+                        raise
+                    raise QuotaExhausted(str(e)) from e
+                if kind == FATAL:
+                    # 요청 자체의 문제(잘못된 요청 등)는 제공자 상태와 무관하므로 브레이커에 반영하지 않음
+                    raise
+                self.breaker.failure()
+                if attempt == self.max_attempts - 1:
+                    raise
+                if not self.budget.allow():
+                    logger.warning(f"[{self.provider}] 재시도 예산 소진, 재시도하지 않음: {e}")
+                    raise
+                delay = backoff(attempt, self.base_delay, self.max_delay)
+                metrics.API_RETRIES.inc(api=self.provider)
+                logger.warning(f"[{self.provider}] 호출 실패, {delay:.1f}초 후 재시도 "
+                               f"({attempt + 1}/{self.max_attempts}): {e}")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                if probe:
+                    self.breaker.release_probe()
+                raise
+            self.breaker.success()
+            return result
+
+
+def resilient(request, provider, model=None, max_attempts=3):
+    """요청 함수를 RetryPolicy로 감쌈"""
+    policy = RetryPolicy(provider, model, max_attempts=max_attempts)
+
+    def call(*args, **kwargs):
+        return policy.call(request, *args, **kwargs)
+
+    return call
@@ -0,0 +1,269 @@
+"""
+우선순위·마감 시간 기반 작업 순서 조정
+
+시트 순서대로 처리하면 고객이 요청한 품목이나 통째로 비어 있는 행이 긴 실행의 맨 끝에 갈 수 있다.
+처리 대상을 모두 읽어 점수가 높은 품목부터 내보내고, 마감 시간이나 예산이 다하면 새 작업을 더 넣지 않고
+진행 중인 작업만 마무리한다 (남은 품목은 다음 실행에서 이어서 처리).
+
+점수 = Σ 가중치 × 항목 (기본 가중치는 DEFAULT_WEIGHTS, --weights로 변경)
+- missing: 행의 빈 셀 수 (market 빈 셀 조회는 조회할 셀 수)
+- flagged: 고객 요청 품목 코드(접두어)면 1
+- failures: 실패 기록 파일에 남은 이전 실패 횟수
+- cost: 추정 토큰 수 (1000 토큰 단위, 파이프라인이 실제로 보낼 프롬프트 길이 + 예상 응답 토큰)
+
+    from idnolab.schedule import Scheduler
+
+    tasks = Scheduler(tasks, flagged=['F01'], deadline=parse_deadline('6h'), budget=2_000_000)
+"""
+import datetime
+import json
+import os
+import re
+import statistics
+import threading
+import time
+
+from logger_config import get_logger
+from idnolab.pipeline import AbortRun
+from idnolab.ratelimit import OUTPUT_TOKENS, estimate_tokens
+from idnolab.source import CODE_COLUMN, is_filled, parse_codes, sheet_rows
+
+# 로거 설정
+logger = get_logger("schedule")
+
+# 기본 가중치 (고객 요청 품목 > 빈 셀이 많은 품목, 자주 실패했거나 비싼 품목은 뒤로)
+DEFAULT_WEIGHTS = {'missing': 1.0, 'flagged': 100.0, 'failures': -5.0, 'cost': -1.0}
+# 마감 전에 새 작업을 넣을지 판단할 때 참고하는 최근 작업 소요 시간 개수
+RECENT_LATENCIES = 20
+
+# 빈 셀 수를 셀 때 제외하는 입력 열
+_INPUT_COLUMNS = (CODE_COLUMN, 'code_name', '개념설명')
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)\s*(h|m|s)')
+_UNITS = {'h': 3600.0, 'm': 60.0, 's': 1.0}
+
+
+def parse_weights(text):
+    """
+    'missing=1,flagged=100,failures=-5,cost=-1' 형태의 가중치 문자열 (지정하지 않은 항목은 기본값)
+
+    Returns:
+        dict: 항목별 가중치
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (text or '').split(','):
+        if not part.strip():
+            continue
+        name, _, value = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_WEIGHTS:
+            raise ValueError(f"알 수 없는 가중치 항목: {name} ({', '.join(DEFAULT_WEIGHTS)} 중 하나)")
+        weights[name] = float(value)
+    return weights
+
+
+def parse_deadline(text, now=None):
+    """
+    마감 시간 문자열을 시각(time.time 기준)으로 변환
+
+    '6h', '1h30m', '90m', '3600'(초)은 지금부터의 기간, '18:30'은 오늘(지났으면 내일) 그 시각,
+    '2026-10-20T06:00'은 그 시각으로 본다.
+    """
+    if not text:
+        return None
+    now = time.time() if now is None else now
+    text = str(text).strip()
+    try:
+        return now + float(text)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(text)
+    if parts and _DURATION.sub('', text).strip() == '':
+        return now + sum(float(value) * _UNITS[unit] for value, unit in parts)
+    current = datetime.datetime.fromtimestamp(now)
+    try:
+        clock = datetime.datetime.strptime(text, '%H:%M').time()
+    except ValueError:
+        return datetime.datetime.fromisoformat(text).timestamp()
+    moment = datetime.datetime.combine(current.date(), clock)
+    if moment <= current:
+        moment += datetime.timedelta(days=1)
+    return moment.timestamp()
+
+
+def load_flagged(value):
+    """고객 요청 품목 코드 접두어 ('F01,F0203' 또는 한 줄에 하나씩 적은 파일 경로)"""
+    if not value:
+        return ()
+    if os.path.isfile(value):
+        with open(value, encoding='utf-8') as f:
+            value = ','.join(line.split('#', 1)[0].strip() for line in f)
+    return tuple(parse_codes(value) or ())
+
+
+def missing_counts(path):
+    """
+    행별 빈 셀 수 (품목 코드·품목명·개념설명 열 제외)
+
+    Returns:
+        dict[int, int]: {DataFrame 인덱스: 빈 셀 수}
+    """
+    counts = {}
+    for number, row in sheet_rows(path):
+        counts[number - 2] = sum(1 for name, value in row.items()
+                                 if name not in _INPUT_COLUMNS and not is_filled(value))
+    return counts
+
+
+class FailureLog:
+    """
+    품목별 실패 기록 (JSON Lines, 한 줄에 실패 한 번)
+
+    Pipeline(on_failure=failures.record)로 실패를 쌓아 두면 다음 실행의 스케줄러가
+    자주 실패한 품목을 뒤로 미룬다.
+
+    Args:
+        path (str): 실패 기록 파일 경로 (None이면 기록하지 않음)
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.counts = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        key = json.loads(line)['key']
+                        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def count(self, key):
+        return self.counts.get(str(key), 0)
+
+    def record(self, task, error):
+        """실패한 작업 기록 (키가 없는 묶음 작업과 할당량 소진 같은 실행 중단은 건너뜀)"""
+        if task.key is None or isinstance(error, AbortRun):
+            return
+        key = str(task.key)
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'key': key, 'time': time.time(), 'error': str(error)[:500]},
+                                       ensure_ascii=False) + '\n')
+
+
+class Scheduler:
+    """
+    처리 대상을 점수 순으로 내보내고 마감 시간·예산이 다하면 멈추는 source
+
+    마감 시간이 있으면 최근 작업 소요 시간(latencies, 보통 Pipeline.latencies를 연결)의 중앙값만큼
+    여유를 두고 새 작업 투입을 멈춘다. 예산은 내보낸 작업의 추정 토큰 합계로 센다.
+
+    Args:
+        tasks (iterable[Task]): 처리 대상 작업
+        weights (dict): 항목별 가중치 (기본값: DEFAULT_WEIGHTS)
+        flagged (tuple[str]): 고객 요청 품목 코드 접두어
+        failures (FailureLog): 이전 실패 기록
+        missing (dict[int, int]): 행별 빈 셀 수 (missing_counts)
+        deadline (float): 새 작업 투입을 멈출 시각 (time.time 기준)
+        budget (float): 최대 추정 토큰 수
+        order (bool): False면 시트 순서를 유지하고 마감 시간·예산만 적용
+        prompt (callable): 작업 → 파이프라인이 보낼 프롬프트 (없으면 품목명·개념설명 길이로 추정)
+        output_tokens (int | callable): 예상 응답 토큰 수 (작업마다 다르면 작업 → 토큰 수 함수)
+    """
+
+    def __init__(self, tasks, weights=None, flagged=(), failures=None, missing=None, deadline=None, budget=None,
+                 order=True, prompt=None, output_tokens=OUTPUT_TOKENS):
+        self.tasks = tasks
+        self.weights = weights or DEFAULT_WEIGHTS
+        self.flagged = tuple(flagged)
+        self.failures = failures or FailureLog()
+        self.missing = missing or {}
+        self.deadline = deadline
+        self.budget = budget
+        self.order = order
+        self.prompt = prompt
+        self.output_tokens = output_tokens
+        self.spent = 0
+        self.latencies = []
+
+    def features(self, task):
+        """점수 항목 {missing, flagged, failures, cost}"""
+        row = task.row
+        code = str(task.key) if task.key is not None else ''
+        if 'cells' in row:
+            missing = len(row['cells'])
+        else:
+            missing = self.missing.get(row.get('index'), 0)
+        return {
+            'missing': missing,
+            'flagged': 1 if self.flagged and code.startswith(self.flagged) else 0,
+            'failures': self.failures.count(code),
+            'cost': self.cost(task) / 1000,
+        }
+
+    def cost(self, task):
+        """작업 하나의 추정 토큰 수 (프롬프트 + 예상 응답)"""
+        output = self.output_tokens(task) if callable(self.output_tokens) else self.output_tokens
+        if self.prompt is None:
+            return estimate_tokens(task.row.get('code_name'), task.row.get('개념설명'), output_tokens=output)
+        return estimate_tokens(self.prompt(task), output_tokens=output)
+
+    def score(self, task):
+        return sum(self.weights.get(name, 0) * value for name, value in self.features(task).items())
+
+    def time_left(self):
+        """마감 전에 작업 하나를 더 끝낼 시간이 있는지"""
+        if self.deadline is None:
+            return True
+        recent = self.latencies[-RECENT_LATENCIES:]
+        margin = statistics.median(recent) if recent else 0.0
+        return time.time() + margin < self.deadline
+
+    def __iter__(self):
+        tasks = self.tasks
+        if self.order:
+            # 점수가 같으면 시트 순서 유지 (sorted는 안정 정렬)
+            tasks = sorted(tasks, key=self.score, reverse=True)
+            flagged = sum(1 for task in tasks if self.features(task)['flagged'])
+            logger.info(f"우선순위 순서로 {len(tasks)}개 작업 처리 (고객 요청 {flagged}개)")
+
+        for position, task in enumerate(tasks):
+            reason = None
+            cost = self.cost(task)
+            if not self.time_left():
+                reason = '마감 시간'
+            elif self.budget is not None and self.spent + cost > self.budget:
+                reason = f'예산 (추정 {self.spent:,} / {self.budget:,.0f} 토큰)'
+            if reason:
+                remaining = f" {len(tasks) - position}개" if self.order else ""
+                logger.warning(f"{reason} 도달: 남은{remaining} 작업은 다음 실행에서 처리합니다.")
+                return
+            self.spent += cost
+            yield task
+
+
+def scheduled(workbook, tasks, options, failures=None, prompt=None, output_tokens=OUTPUT_TOKENS):
+    """
+    실행 옵션에 우선순위 순서·마감 시간·예산이 있으면 Scheduler로 감쌈 (없으면 tasks 그대로)
+
+    options: order, weights, flagged, deadline(time.time 기준 시각), budget
+    prompt, output_tokens: 비용 추정용 (Scheduler 참고)
+    """
+    ordered = options.order == 'priority'
+    if not (ordered or options.deadline or options.budget):
+        return tasks
+    weights = parse_weights(options.weights)
+    return Scheduler(
+        tasks, weights=weights, flagged=load_flagged(options.flagged), failures=failures,
+        missing=missing_counts(workbook) if ordered and weights['missing'] else None,
+        deadline=options.deadline, budget=options.budget, order=ordered, prompt=prompt, output_tokens=output_tokens,
+    )
+
+
+def attach(pipeline, tasks):
+    """스케줄러가 마감 여유를 계산할 수 있도록 파이프라인의 작업 소요 시간을 연결"""
+    if isinstance(tasks, Scheduler):
+        tasks.latencies = pipeline.latencies
+    return pipeline
@@ -0,0 +1,57 @@
+"""
+시장 규모 시트의 연도별 열 구성
+
+조사 연도를 YEARS 한 곳에서 관리하고, 응답 JSON 키와 시트 열 이름을 연도·지역·필드로부터 만든다.
+새 연도를 추가할 때(예: 2025) 열 이름을 손으로 적지 않고 market_columns(['2025'])로 생성한다.
+
+    from idnolab.schema import YEARS, REGIONS, column_name, market_columns
+
+    column_name('market_size', '국내', '2024')  # '국내 산업규모 (2024)'
+"""
+import re
+
+# 기본 조사 연도
+YEARS = ('2022', '2023', '2024')
+
+# 시트 열 이름의 지역 → 응답 JSON 키
+REGIONS = {'국내': 'domestic', '해외': 'overseas'}
+
+# 응답 필드 → 시트 열 이름 형식
+FIELD_COLUMNS = {
+    'market_size': '{region} 산업규모 ({year})',
+    'is_estimated': '{region} 추정여부 ({year})',
+    'estimate_reason': '{region} 추정근거 ({year})',
+    'references': '출처 ({region} {year})',
+}
+
+_YEAR_COLUMN = re.compile(r'^(?:국내|해외) 산업규모 \((?P<year>\d{4})\)$')
+
+
+def column_name(field, region, year):
+    """응답 필드·지역·연도에 해당하는 시트 열 이름"""
+    return FIELD_COLUMNS[field].format(region=region, year=year)
+
+
+def market_columns(years=YEARS, fields=None):
+    """
+    연도별 시장 규모 열 이름 목록 (필드 → 지역 → 연도 순서)
+
+    Args:
+        years (Iterable[str]): 연도 목록
+        fields (Iterable[str]): 응답 필드 (기본값: 전체)
+    """
+    return [
+        column_name(field, region, year)
+        for field in (fields or FIELD_COLUMNS) for region in REGIONS for year in years
+    ]
+
+
+def sheet_years(columns):
+    """
+    시트 열 이름에 들어 있는 조사 연도 (산업규모 열 기준, 오름차순)
+
+    Returns:
+        tuple[str, ...]: 연도 목록 (산업규모 열이 없으면 YEARS)
+    """
+    years = {match['year'] for match in map(_YEAR_COLUMN.match, map(str, columns)) if match}
+    return tuple(sorted(years)) or YEARS
@@ -0,0 +1,128 @@
+"""
+진행 중인 같은 요청 합치기 (singleflight)
+
+여러 작업자가 같은 프롬프트나 같은 URL을 동시에 요청하면 처음 요청한 작업자만 실제로 호출하고
+나머지는 그 호출이 끝나기를 기다렸다가 결과(또는 예외)를 함께 받는다.
+ResponseCache와 함께 쓰면 캐시 → 진행 중 호출 → 실제 호출 순서로 결과를 찾는다.
+
+    from idnolab.singleflight import coalesce
+
+    request = coalesce(request_gemini, 'market', cache=ResponseCache('cache.jsonl'))
+"""
+import hashlib
+import threading
+
+from logger_config import get_logger
+from idnolab import metrics
+
+# 로거 설정
+logger = get_logger("singleflight")
+
+
+def fingerprint(*parts, **options):
+    """요청 내용(프롬프트, 설정 등)의 SHA-256 지문"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    for name in sorted(options):
+        digest.update(f"{name}={options[name]!r}".encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class _Call:
+    """진행 중인 호출 하나"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    키별로 진행 중인 호출을 하나로 합침
+
+    Args:
+        name (str): 지표 라벨용 이름 (예: 'market', 'url')
+    """
+
+    def __init__(self, name='gemini'):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """
+        key에 대한 호출이 진행 중이면 그 결과를 기다리고, 없으면 func()를 호출
+
+        Returns:
+            tuple: (결과, 다른 호출의 결과를 공유했는지 여부)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            metrics.COALESCED.inc(kind=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                logger.debug(f"[{self.name}] 진행 중 요청 {call.waiters}건 공유: {key[:12]}")
+        return call.result, False
+
+
+def cached_call(key, func, flight, cache=None):
+    """
+    캐시 → 진행 중 호출 → 실제 호출 순서로 결과를 얻음 (실제로 호출한 작업자만 캐시에 저장)
+    """
+    if cache is not None:
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    def call():
+        value = func()
+        if cache is not None:
+            cache.put(key, value)
+        return value
+
+    return flight.do(key, call)[0]
+
+
+def coalesce(request, name, cache=None, flight=None):
+    """
+    요청 함수를 같은 인자의 동시 호출을 합치는(그리고 캐시를 쓰는) 함수로 감쌈
+
+    Args:
+        request (callable): (프롬프트, **설정) → 응답 텍스트
+        name (str): 요청 종류 (지문과 지표 라벨에 사용)
+        cache (ResponseCache): 응답 캐시 (None이면 합치기만 함)
+        flight (SingleFlight): 공유할 SingleFlight (기본값: 새로 생성)
+    """
+    flight = flight or SingleFlight(name)
+
+    def call(contents, **options):
+        key = fingerprint(name, contents, **options)
+        return cached_call(key, lambda: request(contents, **options), flight, cache)
+
+    return call
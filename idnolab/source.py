@@ -0,0 +1,132 @@
+"""
+엑셀 작업 파일 스트리밍 읽기
+
+pd.read_excel로 시트 전체(긴 텍스트 열 28개 이상)를 DataFrame으로 올리는 대신
+openpyxl 읽기 전용 모드로 한 행씩 읽으면서 필요한 열만 꺼낸다.
+행 범위 / 이미 채워진 행 / 품목 코드 접두어 필터도 읽는 도중에 적용하므로
+첫 작업이 바로 시작되고 시트 크기와 관계없이 메모리 사용량이 일정하다.
+"""
+
+# 품목 코드가 들어 있는 열 (A열, 머리글이 비어 있음)
+CODE_COLUMN = 'Unnamed: 0'
+
+
+def is_filled(value):
+    """셀 값이 채워져 있는지 확인 (None, NaN, 빈 문자열은 비어 있음)"""
+    if value is None or value != value:
+        return False
+    return str(value).strip() != ''
+
+
+def column_names(header):
+    """
+    머리글 행을 pandas.read_excel과 같은 열 이름으로 변환
+
+    빈 머리글은 'Unnamed: 열번호', 중복 머리글은 '이름.1', '이름.2' 형태가 된다.
+    """
+    names = []
+    seen = {}
+    for position, name in enumerate(header):
+        name = f"Unnamed: {position}" if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def sheet_rows(path, columns=None, sheet_name=None):
+    """
+    시트의 데이터 행을 (엑셀 행 번호, {열 이름: 값})으로 하나씩 반환
+
+    Args:
+        path (str): 엑셀 파일 경로
+        columns (list[str]): 꺼낼 열 이름 (None이면 전체, 시트에 없는 열은 None으로 채움)
+        sheet_name (str): 시트 이름 (기본값: 첫 번째 시트)
+
+    Yields:
+        tuple[int, dict]: 엑셀 행 번호(머리글이 1행)와 행 값
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        header = next(sheet.iter_rows(max_row=1, values_only=True), None)
+        if header is None:
+            return
+        names = column_names(header)
+
+        if columns is None:
+            selected = list(enumerate(names))
+            missing = []
+        else:
+            positions = {name: position for position, name in enumerate(names)}
+            selected = [(positions[name], name) for name in columns if name in positions]
+            missing = [name for name in columns if name not in positions]
+        # 필요한 열까지만 읽음 (뒤쪽의 긴 텍스트 열은 셀 객체를 만들지 않음)
+        max_col = max((position for position, _ in selected), default=0) + 1
+
+        for number, values in enumerate(sheet.iter_rows(min_row=2, max_col=max_col, values_only=True), start=2):
+            record = {name: values[position] if position < len(values) else None for position, name in selected}
+            for name in missing:
+                record[name] = None
+            yield number, record
+    finally:
+        workbook.close()
+
+
+def sheet_tasks(path, columns, rows=None, skip_filled=None, code_prefixes=None, sheet_name=None):
+    """
+    작업 시트 행을 파이프라인 Task로 변환 (스트리밍)
+
+    Args:
+        path (str): 엑셀 파일 경로
+        columns (list[str]): 작업에 필요한 열 (품목 코드와 code_name은 항상 포함)
+        rows (set[int]): 처리할 엑셀 행 번호 (None이면 전체)
+        skip_filled (str): rows가 없을 때 이 열이 채워진 행은 건너뜀
+        code_prefixes (list[str]): 이 접두어로 시작하는 품목 코드만 처리 (예: ['F01', 'F0203'])
+        sheet_name (str): 시트 이름
+
+    Yields:
+        Task: key는 품목 코드(없으면 행 인덱스), row에는 열 값과 'index'(DataFrame 인덱스)가 들어 있음
+    """
+    from idnolab.pipeline import Task
+
+    needed = [CODE_COLUMN, 'code_name'] + [name for name in columns if name not in (CODE_COLUMN, 'code_name')]
+    if skip_filled and skip_filled not in needed:
+        needed.append(skip_filled)
+    prefixes = tuple(code_prefixes) if code_prefixes else None
+
+    for number, row in sheet_rows(path, needed, sheet_name):
+        code_name = row.get('code_name')
+        if not is_filled(code_name) or code_name == 'code_name':
+            continue
+        if rows is not None and number not in rows:
+            continue
+        if rows is None and skip_filled and is_filled(row.get(skip_filled)):
+            continue
+
+        code = row.get(CODE_COLUMN)
+        code = code.strip() if isinstance(code, str) else code
+        if prefixes and not (isinstance(code, str) and code.startswith(prefixes)):
+            continue
+
+        # DataFrame 인덱스 = 엑셀 행 번호 - 2 (머리글 행 보정)
+        index = number - 2
+        row['index'] = index
+        yield Task(key=code if code else index, row=row)
+
+
+def parse_codes(text):
+    """
+    'F01,F0203' 형태의 품목 코드 접두어 문자열을 목록으로 변환
+
+    Returns:
+        list[str] or None: 접두어 목록 (text가 비어 있으면 None)
+    """
+    if not text:
+        return None
+    return [part.strip() for part in text.split(',') if part.strip()] or None
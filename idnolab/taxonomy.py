@@ -0,0 +1,86 @@
+"""
+품목 코드 체계 유틸리티
+
+품목 코드는 대분류(F01) → 중분류(F0101) → 소분류(F010101)처럼
+앞 글자 1자리 + 단계별 2자리 숫자로 구성된다.
+"""
+
+# 코드 한 단계의 자릿수
+LEVEL_WIDTH = 2
+# 최상위 코드 길이 (예: F01)
+ROOT_LENGTH = 3
+
+
+def parent_code(code):
+    """
+    상위 분류 코드를 반환하는 함수
+
+    Args:
+        code (str): 품목 코드 (예: 'F010101')
+
+    Returns:
+        str or None: 상위 코드 (예: 'F0101'), 최상위이거나 형식이 다르면 None
+    """
+    if not isinstance(code, str):
+        return None
+    code = code.strip()
+    if len(code) <= ROOT_LENGTH or (len(code) - ROOT_LENGTH) % LEVEL_WIDTH != 0:
+        return None
+    return code[:-LEVEL_WIDTH]
+
+
+def code_level(code):
+    """
+    분류 단계를 반환하는 함수
+
+    Args:
+        code (str): 품목 코드
+
+    Returns:
+        int or None: 대분류 0, 중분류 1, 소분류 2 ... (형식이 다르면 None)
+    """
+    if not isinstance(code, str):
+        return None
+    code = code.strip()
+    if len(code) < ROOT_LENGTH or (len(code) - ROOT_LENGTH) % LEVEL_WIDTH != 0:
+        return None
+    return (len(code) - ROOT_LENGTH) // LEVEL_WIDTH
+
+
+def nearest_ancestor(code, known):
+    """
+    known 안에 있는 가장 가까운 상위 분류 코드
+
+    시트에 중분류 행이 빠져 있으면 대분류까지 올라간다.
+
+    Args:
+        code (str): 품목 코드
+        known (Container[str]): 존재하는 코드 집합
+
+    Returns:
+        str or None: 상위 코드 (없으면 None)
+    """
+    parent = parent_code(code)
+    while parent is not None and parent not in known:
+        parent = parent_code(parent)
+    return parent
+
+
+def children_map(codes):
+    """
+    코드 목록의 상위 → 하위 관계
+
+    Args:
+        codes (Iterable[str]): 품목 코드 목록
+
+    Returns:
+        dict[str, list[str]]: {상위 코드: [바로 아래 단계로 연결된 하위 코드, ...]} (입력 순서 유지)
+    """
+    codes = [code.strip() for code in codes if isinstance(code, str)]
+    known = set(codes)
+    children = {}
+    for code in codes:
+        parent = nearest_ancestor(code, known)
+        if parent is not None:
+            children.setdefault(parent, []).append(code)
+    return children
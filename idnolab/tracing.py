@@ -0,0 +1,194 @@
+"""
+단계별 소요 시간 측정(span)과 추적 파일 내보내기
+
+    from idnolab.tracing import span, tracer
+
+    tracer.enable()
+    with span('call', key='F010101'):
+        ...
+    tracer.export('trace.json')                 # Chrome trace (chrome://tracing, Perfetto)
+    tracer.export('trace.otel.json', 'otel')    # OpenTelemetry OTLP/JSON
+
+기본값은 비활성 상태이며, 비활성일 때 span()은 아무것도 기록하지 않는다.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """
+    스레드별로 span을 기록하는 추적기
+
+    span은 (이름, 분류, 시작 시각, 소요 시간, 스레드, 부모 span, 속성)으로 저장되며
+    같은 스레드 안에서 중첩된 span은 부모-자식 관계가 된다.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 1
+        # time.time()과 perf_counter의 차이 (절대 시각 변환용)
+        self._epoch_offset = time.time() - time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, category='idnolab', **attributes):
+        """
+        구간 소요 시간 기록
+
+        Args:
+            name (str): span 이름 (예: 'call', 'excel.write')
+            category (str): 분류 (파이프라인 이름 등)
+            **attributes: span에 함께 기록할 값 (품목 코드 등)
+        """
+        if not self.enabled:
+            yield
+            return
+
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+        stack = self._stack()
+        parent_id = stack[-1] if stack else None
+        stack.append(span_id)
+        error = None
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            ended = time.perf_counter()
+            stack.pop()
+            thread = threading.current_thread()
+            record = {
+                'id': span_id,
+                'parent': parent_id,
+                'name': name,
+                'category': category,
+                'start': started,
+                'end': ended,
+                'thread_id': thread.ident,
+                'thread_name': thread.name,
+                'attributes': attributes,
+                'error': error,
+            }
+            with self._lock:
+                self.spans.append(record)
+
+    def to_chrome(self):
+        """Chrome trace event 형식 (chrome://tracing, Perfetto에서 열기)"""
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for record in self.spans:
+            threads[record['thread_id']] = record['thread_name']
+            args = {key: str(value) for key, value in record['attributes'].items()}
+            if record['error']:
+                args['error'] = record['error']
+            events.append({
+                'name': record['name'],
+                'cat': record['category'],
+                'ph': 'X',
+                'ts': (record['start'] + self._epoch_offset) * 1e6,
+                'dur': (record['end'] - record['start']) * 1e6,
+                'pid': pid,
+                'tid': record['thread_id'],
+                'args': args,
+            })
+        for thread_id, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+                           'args': {'name': thread_name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_otel(self, service_name='idnolab'):
+        """OpenTelemetry OTLP/JSON 형식 (한 번의 실행을 하나의 trace로 기록)"""
+        trace_id = os.urandom(16).hex()
+
+        def span_id(value):
+            return f"{value:016x}"
+
+        spans = []
+        for record in self.spans:
+            attributes = [
+                {'key': key, 'value': {'stringValue': str(value)}}
+                for key, value in record['attributes'].items()
+            ]
+            attributes.append({'key': 'thread.name', 'value': {'stringValue': record['thread_name']}})
+            spans.append({
+                'traceId': trace_id,
+                'spanId': span_id(record['id']),
+                'parentSpanId': span_id(record['parent']) if record['parent'] else '',
+                'name': record['name'],
+                'kind': 1,  # SPAN_KIND_INTERNAL
+                'startTimeUnixNano': str(int((record['start'] + self._epoch_offset) * 1e9)),
+                'endTimeUnixNano': str(int((record['end'] + self._epoch_offset) * 1e9)),
+                'attributes': attributes,
+                'status': {'code': 2, 'message': record['error']} if record['error'] else {'code': 1},
+            })
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+                'scopeSpans': [{'scope': {'name': 'idnolab.tracing'}, 'spans': spans}],
+            }]
+        }
+
+    def summary(self):
+        """
+        span 이름별 합계
+
+        Returns:
+            dict: {이름: {'count', 'total', 'max'}} (시간 단위: 초)
+        """
+        result = {}
+        for record in self.spans:
+            duration = record['end'] - record['start']
+            stats = result.setdefault(record['name'], {'count': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += duration
+            stats['max'] = max(stats['max'], duration)
+        return result
+
+    def export(self, path, format='chrome'):
+        """
+        기록된 span을 JSON 파일로 저장
+
+        Args:
+            path (str): 저장 경로
+            format (str): 'chrome' 또는 'otel'
+        """
+        with self._lock:
+            data = self.to_otel() if format == 'otel' else self.to_chrome()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        return path
+
+
+# 프로세스 전역 추적기
+tracer = Tracer()
+
+
+def span(name, category='idnolab', **attributes):
+    """전역 추적기의 span (tracer.span과 동일)"""
+    return tracer.span(name, category, **attributes)
@@ -0,0 +1,420 @@
+"""
+여러 컴퓨터가 작업 파일 하나를 나눠 처리하는 임대(lease) 기반 작업 큐
+
+    중앙:   python -m idnolab queue add trend --queue trend_queue.db
+            IDNOLAB_QUEUE_TOKEN=비밀값 python -m idnolab queue serve --queue trend_queue.db --host 0.0.0.0 --port 8800
+    작업자: IDNOLAB_QUEUE_TOKEN=비밀값 python -m idnolab run trend --queue http://중앙주소:8800 --workers 4
+            (컴퓨터마다 실행)
+    병합:   python -m idnolab run trend --queue trend_queue.db --merge   (결과를 작업 파일에 기록)
+
+- 작업 단위는 품목 한 행이며 큐 파일(SQLite)에 행 데이터와 상태(pending / leased / done / failed)를 둔다
+- 작업자는 lease_seconds 동안 작업을 빌려 가고, 처리 중에는 heartbeat로 임대를 연장한다
+- 작업자가 죽어 heartbeat가 끊기면 임대가 만료되어 다른 작업자가 다시 가져간다
+- 빌려 간 횟수가 max_attempts를 넘은 작업은 failed로 남긴다
+- 결과(파싱된 응답)는 큐 파일에 모으고, 병합 단계에서 한 번에 작업 파일에 기록한다
+  (작업자들이 같은 엑셀 파일을 동시에 쓰지 않음)
+
+큐 파일 경로를 주면 SQLite를 직접 쓰고(같은 컴퓨터의 여러 프로세스), http:// 주소를 주면 중앙 서버에 요청한다.
+큐 서버는 행 데이터와 결과를 그대로 주고받으므로, 다른 컴퓨터에서 접속할 수 있는 주소(127.0.0.1 이외)로 열 때는
+공유 토큰(IDNOLAB_QUEUE_TOKEN 또는 --token)이 있어야 하며 작업자는 같은 토큰을 Authorization 헤더로 보낸다.
+"""
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logger_config import get_logger
+from idnolab.pipeline import Task
+
+# 로거 설정
+logger = get_logger("workqueue")
+
+# 기본 임대 시간(초) / 작업당 최대 임대 횟수
+LEASE_SECONDS = 600.0
+MAX_ATTEMPTS = 3
+# 남은 작업이 다른 작업자에게 임대 중일 때 다시 확인하는 간격(초)
+POLL_INTERVAL = 5.0
+# 큐 서버 공유 토큰 환경변수
+TOKEN_ENV = 'IDNOLAB_QUEUE_TOKEN'
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS items (
+    key TEXT PRIMARY KEY, position INTEGER NOT NULL, row TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_expires REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0, error TEXT, result TEXT, merged INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL)"""
+
+
+def worker_id():
+    """작업자 식별자 (호스트 이름:프로세스 번호)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    SQLite 파일에 작업 상태를 두는 작업 큐
+
+    Args:
+        path (str): 큐 파일 경로
+        lease_seconds (float): 임대 시간(초)
+        max_attempts (int): 작업당 최대 임대 횟수
+    """
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._lock = threading.Lock()
+        with self._transaction() as db:
+            db.execute(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    def add(self, tasks):
+        """
+        작업 추가 (이미 있는 키는 건너뜀)
+
+        Returns:
+            int: 새로 추가한 작업 수
+        """
+        now = time.time()
+        with self._transaction() as db:
+            start = db.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM items').fetchone()[0]
+            before = db.total_changes
+            db.executemany(
+                'INSERT OR IGNORE INTO items (key, position, row, updated_at) VALUES (?, ?, ?, ?)',
+                ((str(task.key), start + i, json.dumps(task.row, ensure_ascii=False, default=str), now)
+                 for i, task in enumerate(tasks)))
+            return db.total_changes - before
+
+    def lease(self, worker, limit=1, lease_seconds=None):
+        """
+        대기 중이거나 임대가 만료된 작업을 빌려 감 (등록 순서대로)
+
+        Returns:
+            list[dict]: [{'key', 'row', 'attempts'}, ...]
+        """
+        now = time.time()
+        expires = now + (lease_seconds or self.lease_seconds)
+        leased = []
+        with self._transaction() as db:
+            # 임대가 만료된 작업 중 횟수를 다 쓴 작업은 실패로 정리
+            db.execute("UPDATE items SET state = 'failed', error = COALESCE(error, '임대 만료'), updated_at = ? "
+                       "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                       (now, now, self.max_attempts))
+            rows = db.execute(
+                "SELECT key, row, attempts FROM items WHERE state = 'pending' "
+                "OR (state = 'leased' AND lease_expires < ?) ORDER BY position LIMIT ?", (now, limit)).fetchall()
+            for key, row, attempts in rows:
+                db.execute("UPDATE items SET state = 'leased', worker = ?, lease_expires = ?, attempts = ?, "
+                           "updated_at = ? WHERE key = ?", (worker, expires, attempts + 1, now, key))
+                leased.append({'key': key, 'row': json.loads(row), 'attempts': attempts + 1})
+        return leased
+
+    def heartbeat(self, worker, keys, lease_seconds=None):
+        """
+        worker가 빌려 간 작업의 임대 연장
+
+        Returns:
+            list[str]: 아직 worker가 임대 중인 키 (만료되어 다른 작업자에게 넘어간 키는 빠짐)
+        """
+        now = time.time()
+        expires = now + (lease_seconds or self.lease_seconds)
+        held = []
+        with self._transaction() as db:
+            for key in keys:
+                cursor = db.execute("UPDATE items SET lease_expires = ?, updated_at = ? "
+                                    "WHERE key = ? AND state = 'leased' AND worker = ?", (expires, now, key, worker))
+                if cursor.rowcount:
+                    held.append(key)
+        return held
+
+    def complete(self, worker, key, result):
+        """
+        작업 완료와 결과 기록 (임대가 만료되어 다른 작업자가 가져갔더라도 먼저 끝낸 결과를 사용)
+
+        Returns:
+            bool: 기록 여부 (이미 완료된 작업이면 False)
+        """
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE items SET state = 'done', worker = ?, result = ?, error = NULL, updated_at = ? "
+                "WHERE key = ? AND state != 'done'",
+                (worker, json.dumps(result, ensure_ascii=False, default=str), time.time(), key))
+            return cursor.rowcount > 0
+
+    def fail(self, worker, key, error):
+        """작업 실패 기록 (임대 횟수가 남았으면 다시 대기열로, 아니면 failed)"""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE items SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, lease_expires = 0, error = ?, updated_at = ? "
+                "WHERE key = ? AND state = 'leased' AND worker = ?",
+                (self.max_attempts, str(error)[:1000], time.time(), key, worker))
+
+    def release(self, worker, keys):
+        """처리하지 않은 임대 작업 반납 (임대 횟수도 되돌림)"""
+        with self._transaction() as db:
+            for key in keys:
+                db.execute("UPDATE items SET state = 'pending', worker = NULL, lease_expires = 0, "
+                           "attempts = MAX(attempts - 1, 0), updated_at = ? "
+                           "WHERE key = ? AND state = 'leased' AND worker = ?", (time.time(), key, worker))
+
+    def results(self, merged=False):
+        """완료된 작업 [{'key', 'row', 'result'}, ...] (merged=False면 아직 병합하지 않은 것만)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, row, result FROM items WHERE state = 'done' AND (? OR merged = 0) ORDER BY position",
+                (merged,)).fetchall()
+        return [{'key': key, 'row': json.loads(row), 'result': json.loads(result)} for key, row, result in rows]
+
+    def mark_merged(self, keys):
+        with self._transaction() as db:
+            db.executemany("UPDATE items SET merged = 1 WHERE key = ?", ((key,) for key in keys))
+
+    def reset_failed(self):
+        """실패한 작업을 다시 대기열로 (임대 횟수 초기화)"""
+        with self._transaction() as db:
+            return db.execute("UPDATE items SET state = 'pending', attempts = 0, worker = NULL, lease_expires = 0 "
+                              "WHERE state = 'failed'").rowcount
+
+    def stats(self):
+        """상태별 작업 수 {'pending', 'leased', 'done', 'failed', 'merged', 'workers'}"""
+        now = time.time()
+        with self._lock:
+            counts = dict(self._db.execute('SELECT state, COUNT(*) FROM items GROUP BY state').fetchall())
+            merged = self._db.execute('SELECT COUNT(*) FROM items WHERE merged = 1').fetchone()[0]
+            workers = self._db.execute("SELECT COUNT(DISTINCT worker) FROM items WHERE state = 'leased' "
+                                       "AND lease_expires >= ?", (now,)).fetchone()[0]
+        stats = {state: counts.get(state, 0) for state in ('pending', 'leased', 'done', 'failed')}
+        stats.update(merged=merged, workers=workers)
+        return stats
+
+
+class RemoteQueue:
+    """
+    중앙 큐 서버(serve)에 요청하는 WorkQueue 대리 객체 (작업자용)
+
+    Args:
+        url (str): 큐 서버 주소 (예: http://10.0.0.5:8800)
+        timeout (float): 요청 제한 시간(초)
+        token (str): 큐 서버 공유 토큰 (기본값: IDNOLAB_QUEUE_TOKEN 환경변수)
+    """
+
+    def __init__(self, url, timeout=30, token=None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.token = token or os.getenv(TOKEN_ENV)
+
+    def _post(self, method, **params):
+        import requests
+
+        headers = {'Authorization': f"Bearer {self.token}"} if self.token else None
+        response = requests.post(f"{self.url}/{method}", json=params, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['result']
+
+    def lease(self, worker, limit=1, lease_seconds=None):
+        return self._post('lease', worker=worker, limit=limit, lease_seconds=lease_seconds)
+
+    def heartbeat(self, worker, keys, lease_seconds=None):
+        return self._post('heartbeat', worker=worker, keys=list(keys), lease_seconds=lease_seconds)
+
+    def complete(self, worker, key, result):
+        return self._post('complete', worker=worker, key=key, result=result)
+
+    def fail(self, worker, key, error):
+        return self._post('fail', worker=worker, key=key, error=str(error))
+
+    def release(self, worker, keys):
+        return self._post('release', worker=worker, keys=list(keys))
+
+    def stats(self):
+        return self._post('stats')
+
+
+def open_queue(target, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    """큐 파일 경로면 WorkQueue, http(s):// 주소면 RemoteQueue"""
+    if str(target).startswith(('http://', 'https://')):
+        return RemoteQueue(target)
+    return WorkQueue(target, lease_seconds=lease_seconds, max_attempts=max_attempts)
+
+
+def is_loopback(host):
+    """이 컴퓨터에서만 접속할 수 있는 주소인지"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve(queue, port, host='127.0.0.1', token=None):
+    """
+    작업자가 HTTP(JSON)로 lease / heartbeat / complete / fail / release / stats를 호출하는 큐 서버 시작
+
+    Args:
+        queue (WorkQueue): 작업 큐
+        port (int): 포트
+        host (str): 주소 (127.0.0.1 이외의 주소는 token이 있어야 열 수 있음)
+        token (str): 공유 토큰 (기본값: IDNOLAB_QUEUE_TOKEN 환경변수, 있으면 모든 요청에
+            'Authorization: Bearer 토큰' 헤더를 요구하고 없으면 401)
+
+    Returns:
+        ThreadingHTTPServer: 종료 시 shutdown() 호출
+    """
+    token = token or os.getenv(TOKEN_ENV)
+    if not token and not is_loopback(host):
+        raise ValueError(f"{host}에서 큐 서버를 열려면 공유 토큰이 필요합니다 (--token 또는 {TOKEN_ENV})")
+    expected = f"Bearer {token}".encode('utf-8') if token else None
+    methods = {
+        'lease': queue.lease, 'heartbeat': queue.heartbeat, 'complete': queue.complete,
+        'fail': queue.fail, 'release': queue.release, 'stats': queue.stats,
+    }
+
+    class QueueHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False, default=str).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _authorized(self):
+            if expected is None:
+                return True
+            if hmac.compare_digest(self.headers.get('Authorization', '').encode('utf-8'), expected):
+                return True
+            self._send(401, {'error': '인증 실패: 큐 서버 토큰이 없거나 다릅니다.'})
+            return False
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            method = methods.get(self.path.strip('/'))
+            if method is None:
+                self._send(404, {'error': f"알 수 없는 요청: {self.path}"})
+                return
+            try:
+                params = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                self._send(200, {'result': method(**params)})
+            except Exception as e:
+                logger.error(f"큐 요청 처리 실패 {self.path}: {e}")
+                self._send(400, {'error': str(e)})
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path.strip('/') == 'stats':
+                self._send(200, {'result': queue.stats()})
+            else:
+                self._send(404, {'error': f"알 수 없는 요청: {self.path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), QueueHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="workqueue-http", daemon=True).start()
+    logger.info(f"작업 큐 서버 시작: http://{host}:{server.server_address[1]} ({getattr(queue, 'path', '')}"
+                f"{', 토큰 인증' if token else ''})")
+    return server
+
+
+class LeaseSource:
+    """
+    큐에서 작업을 빌려 파이프라인 Task로 내보내는 source (작업자용)
+
+    빌려 간 작업은 heartbeat 스레드가 주기적으로 임대를 연장하고, 파이프라인이 끝나면 처리하지 못한
+    작업을 반납한다. 남은 작업이 다른 작업자에게 임대 중이면 만료되어 돌아올 수 있으므로 모두 끝날 때까지
+    POLL_INTERVAL 간격으로 다시 확인한다.
+
+    Args:
+        queue (WorkQueue | RemoteQueue): 작업 큐
+        lease_seconds (float): 임대 시간(초, heartbeat는 그 1/3 간격)
+        worker (str): 작업자 식별자 (기본값: 호스트 이름:프로세스 번호)
+    """
+
+    def __init__(self, queue, lease_seconds=LEASE_SECONDS, worker=None):
+        self.queue = queue
+        self.lease_seconds = lease_seconds
+        self.worker = worker or worker_id()
+        self.held = set()
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._heartbeat = None
+
+    def __iter__(self):
+        self._heartbeat = threading.Thread(target=self._beat, name="workqueue-heartbeat", daemon=True)
+        self._heartbeat.start()
+        logger.info(f"[{self.worker}] 작업 큐에서 작업을 빌려 처리 시작")
+        while not self.stop_event.is_set():
+            items = self.queue.lease(self.worker, 1, self.lease_seconds)
+            if not items:
+                stats = self.queue.stats()
+                if not stats['pending'] and not stats['leased']:
+                    break
+                # 다른 작업자(또는 이 작업자)가 처리 중인 작업이 실패·만료되어 돌아올 수 있음
+                self.stop_event.wait(POLL_INTERVAL)
+                continue
+            for item in items:
+                with self._lock:
+                    self.held.add(item['key'])
+                row = item['row']
+                yield Task(key=item['key'], row=row)
+
+    def _beat(self):
+        while not self.stop_event.wait(self.lease_seconds / 3):
+            with self._lock:
+                keys = list(self.held)
+            if not keys:
+                continue
+            try:
+                held = set(self.queue.heartbeat(self.worker, keys, self.lease_seconds))
+            except Exception as e:
+                logger.warning(f"[{self.worker}] heartbeat 실패: {e}")
+                continue
+            lost = set(keys) - held
+            if lost:
+                logger.warning(f"[{self.worker}] 임대가 만료된 작업: {sorted(lost)}")
+
+    def complete(self, key, result):
+        """처리 결과를 큐에 기록"""
+        self.queue.complete(self.worker, key, result)
+        with self._lock:
+            self.held.discard(key)
+
+    def fail(self, key, error):
+        """처리 실패를 큐에 기록 (다시 대기열로 가거나 failed)"""
+        with self._lock:
+            if key not in self.held:
+                return
+            self.held.discard(key)
+        self.queue.fail(self.worker, key, error)
+
+    def close(self):
+        """heartbeat를 멈추고 처리하지 못한 작업을 반납"""
+        self.stop_event.set()
+        with self._lock:
+            keys, self.held = list(self.held), set()
+        if keys:
+            self.queue.release(self.worker, keys)
+            logger.info(f"[{self.worker}] 처리하지 못한 작업 {len(keys)}개 반납")
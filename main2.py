@@ -1,15 +1,12 @@
 import pandas as pd
-import time
 import os
 import json
-from google import genai
-from google.genai import types
-from pydantic import BaseModel
 from dotenv import load_dotenv
 from logger_config import get_logger
 from gemini_api import get_industry_data_with_gemini, parse_industry_data_with_gemini
 from save_excel_gemini import save_to_excel_gemini
-from perpleity_api import PerplexityMarketResearch
+from idnolab.patch import ExcelPatchWriter
+from idnolab.pipeline import AbortRun
 # .env 파일에서 환경변수 로드
 load_dotenv()
 
@@ -29,6 +26,8 @@ if __name__ == "__main__":
         # 엑셀 파일 읽기
         logger.info(f"엑셀 파일 읽기: {excel_file_path}")
         df = pd.read_excel(excel_file_path)
+        # 통합 문서를 한 번만 열고 품목마다 바뀐 셀만 저장 (원본 서식 유지)
+        writer = ExcelPatchWriter(excel_file_path)
 
     
         processed_count = 0
@@ -50,6 +49,7 @@ if __name__ == "__main__":
 
         numbers = [i - 2 for i in numbers]
 
+        # API 호출 간격은 get_industry_data_with_gemini의 적응형 속도 제한기가 조절 (분당 6회에서 시작)
         for index, row in df.iterrows():
             if index not in numbers:
                 continue
@@ -59,13 +59,15 @@ if __name__ == "__main__":
                 item_description = row['개념설명']
                 result = get_industry_data_with_gemini(item, item_description)
                 data = parse_industry_data_with_gemini(result)
-                save_to_excel_gemini("item_info_3.xlsx", item, data)
+                save_to_excel_gemini(excel_file_path, item, data, writer=writer)
+                # from perpleity_api import PerplexityMarketResearch
                 # data = PerplexityMarketResearch().research_parse(item, excel_file_path)
                 # save_to_excel_v2(excel_file_path, item, data)
                 logger.info(f"{item}, {index} 엑셀 저장 완료")
-                
-                # API 호출 간격 조절 (요청 제한 방지)
-                time.sleep(10)
+            except AbortRun as e:
+                # 할당량 소진 등 재시도해도 소용없는 오류는 남은 행을 처리하지 않고 바로 종료
+                logger.error(f"실행 중단: {e}")
+                break
             except Exception as e:
                 logger.error(f"오류 발생: {e}")
                 continue
@@ -4,16 +4,20 @@ import time
 import os
 from dotenv import load_dotenv
 from logger_config import get_logger
-from save_excel2 import save_to_excel_v2, find_item_row
+from idnolab import metrics
+from idnolab.normalize import is_missing
+from idnolab.pipeline import AbortRun
+from idnolab.keys import key_pool
+from idnolab.resilience import RetryPolicy
 from pydantic import BaseModel
 from typing import Dict, Optional
 
-# 환경변수 로드
-load_dotenv()
-
 # 로거 설정
 logger = get_logger("perplexity_api")
 
+# 요청 한 번의 제한 시간(초)
+REQUEST_TIMEOUT = 300
+
 class YearlyData(BaseModel):
     """연도별 데이터 모델"""
     year_2022: str
@@ -52,12 +56,17 @@ class PerplexityMarketResearch:
         """
         퍼플렉시티 API를 사용한 시장 규모 조사 클래스
         """
-        self.api_key = os.getenv('PERPLEXITY_API_KEY')
+        # 환경변수 로드 (import 시점이 아닌 클라이언트 생성 시점에 로드)
+        load_dotenv()
+        # PERPLEXITY_API_KEYS에 여러 키를 주면 호출마다 여유가 가장 많은 키를 사용
+        self.pool = key_pool('perplexity', 'sonar', rpm=60)
+        self.api_key = self.pool.keys[0].key
         print("self.api_key: ", self.api_key)
-        self.base_url = "https://api.perplexity.ai/chat/completions"
+        # PERPLEXITY_BASE_URL이 있으면 해당 주소로 요청 (로컬 가짜 서버 벤치마크용)
+        self.base_url = os.getenv('PERPLEXITY_BASE_URL', "https://api.perplexity.ai").rstrip('/') + "/chat/completions"
         print("self.api_key: ", self.api_key)
         if not self.api_key:
-            logger.error("PERPLEXITY_API_KEY 환경변수가 설정되지 않았습니다.")
+            logger.error("PERPLEXITY_API_KEY(S) 환경변수가 설정되지 않았습니다.")
             raise ValueError("PERPLEXITY_API_KEY가 필요합니다.")
         
         logger.info("퍼플렉시티 API 클라이언트 초기화 완료")
@@ -76,11 +85,6 @@ class PerplexityMarketResearch:
         
         logger.info(f"'{item_name}' 항목에 대한 퍼플렉시티 API 호출 시작")
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         # 한국어와 영어로 상세한 프롬프트 작성
         prompt = f"""
         당신은 시장 분석 전문가입니다. '{item_name}' 제품/서비스의 시장 규모에 대한 정확한 데이터를 제공해주세요.
@@ -191,67 +195,53 @@ class PerplexityMarketResearch:
             }
         }
         
-        for attempt in range(max_retries):
-            try:
-                logger.debug(f"API 호출 시도 {attempt + 1}/{max_retries}")
-                
+        def post(api_key):
+            # 호출 간격은 키 풀의 키별 속도 제한기가 조절 (429와 x-ratelimit-* 응답 헤더를 반영)
+            headers = {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            }
+            with metrics.observe_api('perplexity'):
                 response = requests.post(
                     self.base_url,
                     headers=headers,
-                    json=payload
+                    json=payload,
+                    timeout=REQUEST_TIMEOUT
                 )
-                
+                self.pool.observe_headers(api_key, response.headers)
                 response.raise_for_status()
-                
-                result = response.json()
-                
-                if 'choices' in result and len(result['choices']) > 0:
-                    content = result['choices'][0]['message']['content']
-                    logger.info(f"'{item_name}' API 호출 성공")
-                    logger.debug(f"응답 길이: {len(content)} 문자")
-                    
-                    return {
-                        'content': content,
-                        'citations': result.get('citations', []),
-                        'usage': result.get('usage', {}),
-                        'success': True
-                    }
-                else:
-                    logger.error("API 응답에 choices가 없습니다.")
-                    return {'success': False, 'error': 'Invalid response format'}
-                    
-            except requests.exceptions.Timeout:
-                logger.warning(f"API 호출 타임아웃 (시도 {attempt + 1}/{max_retries})")
-                if attempt < max_retries - 1:
-                    time.sleep(5)
-                    continue
-                else:
-                    return {'success': False, 'error': 'Request timeout'}
-                    
-            except requests.exceptions.HTTPError as e:
-                status_code = e.response.status_code
-                logger.error(f"HTTP 오류 {status_code}: {e}")
-                
-                if status_code == 429:  # Rate limit
-                    if attempt < max_retries - 1:
-                        wait_time = (2 ** attempt) * 5  # Exponential backoff
-                        logger.info(f"Rate limit 도달. {wait_time}초 대기 후 재시도...")
-                        time.sleep(wait_time)
-                        continue
-                
-                return {'success': False, 'error': f'HTTP {status_code}: {str(e)}'}
-                
-            except Exception as e:
-                logger.error(f"예상치 못한 오류: {str(e)}")
-                if attempt < max_retries - 1:
-                    logger.info(f"재시도 중... (시도 {attempt + 1}/{max_retries})")
-                    time.sleep(5)
-                    continue
-                else:
-                    return {'success': False, 'error': str(e)}
-        
-        logger.error("최대 재시도 횟수 초과")
-        return {'success': False, 'error': '최대 재시도 횟수 초과'}
+            return response.json()
+
+        # 재시도 / 백오프 / 서킷 브레이커는 idnolab.resilience 공통 규칙을 따름
+        # (실행 중단 오류(할당량 소진 등)는 그대로 올려 보냄)
+        try:
+            result = RetryPolicy('perplexity', 'sonar', max_attempts=max_retries, base_delay=5).call(self.pool.call, post)
+        except AbortRun:
+            raise
+        except requests.exceptions.Timeout:
+            logger.error(f"'{item_name}' API 호출 타임아웃")
+            return {'success': False, 'error': 'Request timeout'}
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code
+            logger.error(f"HTTP 오류 {status_code}: {e}")
+            return {'success': False, 'error': f'HTTP {status_code}: {str(e)}'}
+        except Exception as e:
+            logger.error(f"예상치 못한 오류: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+        if 'choices' in result and len(result['choices']) > 0:
+            content = result['choices'][0]['message']['content']
+            logger.info(f"'{item_name}' API 호출 성공")
+            logger.debug(f"응답 길이: {len(content)} 문자")
+
+            return {
+                'content': content,
+                'citations': result.get('citations', []),
+                'usage': result.get('usage', {}),
+                'success': True
+            }
+        logger.error("API 응답에 choices가 없습니다.")
+        return {'success': False, 'error': 'Invalid response format'}
     
     def _parse_market_data(self, api_response):
         """
@@ -368,7 +358,7 @@ class PerplexityMarketResearch:
                     ref_value = data.get("references", {}).get(region, {}).get(year, "")
                     market_size_value = data.get("market_size", {}).get(region, {}).get(year, "")
                     # 참조 정보가 없거나 "데이터없음", "없음" 등인 경우 해당 연도 모든 데이터 삭제
-                    if not ref_value or ref_value in ["데이터없음", "없음", "데이터 없음", "", "괸련 데이터 없음", ""] or not market_size_value or market_size_value in ["데이터없음", "없음", "데이터 없음", "", "괸련 데이터 없음", ""]:
+                    if is_missing(ref_value) or is_missing(market_size_value):
                         logger.warning(f"{region} {year}년 참조 정보 없음, 모든 관련 데이터 삭제")
                         
                         # 모든 필드에서 해당 연도 데이터 삭제
@@ -383,28 +373,32 @@ class PerplexityMarketResearch:
             logger.error(f"데이터 검증 중 오류 발생: {e}")
             return data  # 검증 실패 시 원본 반환
     
-    def research_parse(self, item_name, excel_file_path='item_info_3.xlsx'):
+    def research_parse(self, item_name, excel_file_path='item_info_3.xlsx', writer=None):
         """
         시장 규모 조사 후 엑셀 파일에 저장 (새로운 JSON 양식 지원)
         
         Args:
             item_name (str): 조사할 물품명
             excel_file_path (str): 엑셀 파일 경로
+            writer (ExcelPatchWriter): 지정하면 바뀐 셀만 기록 (save_to_excel_v2 참고)
             
         Returns:
             bool: 성공 여부
         """
         
+        from save_excel2 import save_to_excel_v2
+
         logger.info(f"'{item_name}' 시장 규모 조사 및 저장 시작")
         cnt = 0
         while cnt < 3:
             # 1. 퍼플렉시티 API로 시장 데이터 조회
+            # API 재시도는 _get_market_size_data가 담당하므로 여기서는 다시 호출하지 않음
+            # (예전에는 3회 × 3회로 최대 9번 호출됨) - 아래 루프는 파싱/저장 실패만 재시도
             api_response = self._get_market_size_data(item_name)
             
             if not api_response.get('success', False):
-                logger.error(f"'{item_name}' API 호출 실패, 재시도 {cnt+1}회")
-                cnt += 1
-                continue
+                logger.error(f"'{item_name}' API 호출 실패: {api_response.get('error')}")
+                return False
             print("api_response: ", api_response)
             # 2. 응답 데이터 파싱
             parsed_data = self._parse_market_data(api_response)
@@ -418,7 +412,7 @@ class PerplexityMarketResearch:
             
             # 3. 엑셀 파일에 저장 (새로운 JSON 양식 지원)
             try:
-                save_success = save_to_excel_v2(excel_file_path, item_name, parsed_data)
+                save_success = save_to_excel_v2(excel_file_path, item_name, parsed_data, writer=writer)
                 
                 if save_success:
                     logger.info(f"'{item_name}' 데이터가 엑셀 파일에 성공적으로 저장되었습니다.")
@@ -440,6 +434,8 @@ class PerplexityMarketResearch:
 
 
 if __name__ == "__main__":
+    from save_excel2 import save_to_excel_v2
+
     data = {
     'content': '{ "market_size": { "domestic": { "year_2022": "없음", "year_2023": "없음", "year_2024": "ioT 관련 데이터가 아닌 Wi-Fi 라우터 시장 기준으로 4692억 원(약 3억 5천만 달러)" }, "overseas": { "year_2022": "없음", "year_2023": "없음", "year_2024": "없음" } }, "is_estimated": { "domestic": { "year_2022": "없음", "year_2023": "없음", "year_2024": "실제금액" }, "overseas": { "year_2022": "없음", "year_2023": "없음", "year_2024": "없음" } }, "estimate_reason": { "domestic": { "year_2022": "데이터 없음", "year_2023": "데이터 없음", "year_2024": "실제 데이터" }, "overseas": { "year_2022": "데이터 없음", "year_2023": "데이터 없음", "year_2024": "데이터 없음" } }, "references": { "domestic": { "year_2022": "데이터없음", "year_2023": "데이터없음", "year_2024": "https://v.daum.net/v/Wun1pAaV8I" }, "overseas": { "year_2022": "데이터없음", "year_2023": "데이터없음", "year_2024": "데이터없음" } } }',
     'citations': [
@@ -2,6 +2,7 @@ import pandas as pd
 import json
 import re
 from logger_config import get_logger
+from idnolab.schema import YEARS, market_columns
 
 # 로거 설정
 logger = get_logger("save_excel2")
@@ -44,7 +45,7 @@ def find_item_row(excel_file_path, item_name, column_name='Unnamed: 1'):
         return None
 
 
-def save_to_excel_v2(excel_file_path, item_name, data):
+def save_to_excel_v2(excel_file_path, item_name, data, writer=None, years=YEARS):
     """
     새로운 JSON 양식에 맞춰 엑셀 파일의 특정 행에 산업 데이터를 저장하는 함수
     
@@ -58,15 +59,22 @@ def save_to_excel_v2(excel_file_path, item_name, data):
         excel_file_path (str): 엑셀 파일 경로
         item_name (str): 물품명
         data (dict): JSON 형태의 파싱된 데이터
+        writer (ExcelPatchWriter): 지정하면 해당 행만 읽고 바뀐 셀만 기록 (파일 저장은 writer가 담당)
+        years (Iterable[str]): 저장할 조사 연도
     
     Returns:
         bool: 저장 성공 여부
     """
     
-    # 엑셀 파일 읽기
-    logger.debug(f"엑셀 파일 읽기: {excel_file_path}")
-    df = pd.read_excel(excel_file_path)
-    row_index = find_item_row(excel_file_path, item_name)
+    if writer is not None:
+        # 셀 단위 저장: 해당 행 하나만 DataFrame으로 만들어 같은 로직 적용
+        row_index = writer.find_row(item_name, column_name='Unnamed: 1')
+        df = writer.row(row_index).to_frame().T if row_index is not None else None
+    else:
+        # 엑셀 파일 읽기
+        logger.debug(f"엑셀 파일 읽기: {excel_file_path}")
+        df = pd.read_excel(excel_file_path)
+        row_index = find_item_row(excel_file_path, item_name)
 
     if row_index is None:
         logger.error(f"'{item_name}' 항목을 찾을 수 없습니다.")
@@ -81,20 +89,7 @@ def save_to_excel_v2(excel_file_path, item_name, data):
     
     try:
         # 필요한 모든 열이 존재하는지 확인하고, 없으면 추가
-        required_columns = [
-            # 시장 규모
-            '국내 산업규모 (2022)', '국내 산업규모 (2023)', '국내 산업규모 (2024)',
-            '해외 산업규모 (2022)', '해외 산업규모 (2023)', '해외 산업규모 (2024)',
-            # 추정 여부
-            '국내 추정여부 (2022)', '국내 추정여부 (2023)', '국내 추정여부 (2024)',
-            '해외 추정여부 (2022)', '해외 추정여부 (2023)', '해외 추정여부 (2024)',
-            # 추정 근거
-            '국내 추정근거 (2022)', '국내 추정근거 (2023)', '국내 추정근거 (2024)',
-            '해외 추정근거 (2022)', '해외 추정근거 (2023)', '해외 추정근거 (2024)',
-            # 출처
-            '출처 (국내 2022)', '출처 (국내 2023)', '출처 (국내 2024)',
-            '출처 (해외 2022)', '출처 (해외 2023)', '출처 (해외 2024)'
-        ]
+        required_columns = market_columns(years)
         
         # 없는 열들을 찾아서 추가
         missing_columns = [col for col in required_columns if col not in df.columns]
@@ -113,7 +108,7 @@ def save_to_excel_v2(excel_file_path, item_name, data):
             # 국내 시장 규모
             if '국내' in data['market_size']:
                 domestic_market = data['market_size']['국내']
-                for year in ['2022', '2023', '2024']:
+                for year in years:
                     if year in domestic_market:
                         value = domestic_market[year]
                         if value is not None and str(value).strip() not in ['', 'None', 'null', 'none']:
@@ -124,7 +119,7 @@ def save_to_excel_v2(excel_file_path, item_name, data):
             # 해외 시장 규모
             if '해외' in data['market_size']:
                 overseas_market = data['market_size']['해외']
-                for year in ['2022', '2023', '2024']:
+                for year in years:
                     if year in overseas_market:
                         value = overseas_market[year]
                         if value is not None and str(value).strip() not in ['', 'None', 'null', 'none']:
@@ -137,7 +132,7 @@ def save_to_excel_v2(excel_file_path, item_name, data):
             # 국내 추정 여부
             if '국내' in data['isEstimated']:
                 domestic_estimated = data['isEstimated']['국내']
-                for year in ['2022', '2023', '2024']:
+                for year in years:
                     if year in domestic_estimated:
                         value = domestic_estimated[year]
                         # 값이 존재하고 비어있지 않은 경우에만 저장
@@ -149,7 +144,7 @@ def save_to_excel_v2(excel_file_path, item_name, data):
             # 해외 추정 여부
             if '해외' in data['isEstimated']:
                 overseas_estimated = data['isEstimated']['해외']
-                for year in ['2022', '2023', '2024']:
+                for year in years:
                     if year in overseas_estimated:
                         value = overseas_estimated[year]
                         # 값이 존재하고 비어있지 않은 경우에만 저장
@@ -163,7 +158,7 @@ def save_to_excel_v2(excel_file_path, item_name, data):
             # 국내 추정 근거
             if '국내' in data['estimateReason']:
                 domestic_reason = data['estimateReason']['국내']
-                for year in ['2022', '2023', '2024']:
+                for year in years:
                     if year in domestic_reason:
                         value = domestic_reason[year]
                         if value is not None and str(value).strip() not in ['', 'None', 'null', 'none']:
@@ -178,7 +173,7 @@ def save_to_excel_v2(excel_file_path, item_name, data):
             # 해외 추정 근거
             if '해외' in data['estimateReason']:
                 overseas_reason = data['estimateReason']['해외']
-                for year in ['2022', '2023', '2024']:
+                for year in years:
                     if year in overseas_reason:
                         value = overseas_reason[year]
                         if value is not None and str(value).strip() not in ['', 'None', 'null', 'none']:
@@ -194,7 +189,7 @@ def save_to_excel_v2(excel_file_path, item_name, data):
             # 국내 참고자료
             if '국내' in data['references']:
                 domestic_refs = data['references']['국내']
-                for year in ['2022', '2023', '2024']:
+                for year in years:
                     if year in domestic_refs:
                         value = domestic_refs[year]
                         if value is not None and str(value).strip() not in ['', 'None', 'null', 'none']:
@@ -209,7 +204,7 @@ def save_to_excel_v2(excel_file_path, item_name, data):
             # 해외 참고자료
             if '해외' in data['references']:
                 overseas_refs = data['references']['해외']
-                for year in ['2022', '2023', '2024']:
+                for year in years:
                     if year in overseas_refs:
                         value = overseas_refs[year]
                         if value is not None and str(value).strip() not in ['', 'None', 'null', 'none']:
@@ -221,7 +216,10 @@ def save_to_excel_v2(excel_file_path, item_name, data):
                             logger.debug(f"저장됨: {column_name} = {ref_text[:50]}...")
         
         # 엑셀 파일 저장
-        df.to_excel(excel_file_path, index=False)
+        if writer is not None:
+            writer.write(row_index, df.loc[row_index])
+        else:
+            df.to_excel(excel_file_path, index=False)
         logger.info(f"'{item_name}' 데이터가 {row_index + 1}행에 성공적으로 저장되었습니다.")
         
         # 저장된 데이터 요약 로그
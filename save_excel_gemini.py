@@ -2,6 +2,10 @@ import pandas as pd
 import json
 import re
 from logger_config import get_logger
+from idnolab import metrics
+from idnolab.normalize import is_missing
+from idnolab.schema import YEARS, REGIONS, FIELD_COLUMNS, column_name
+from idnolab.tracing import span
 
 # 로거 설정
 logger = get_logger("save_excel_gemini")
@@ -20,7 +24,8 @@ def find_item_row(excel_file_path, item_name, column_name='code_name') -> pd.Ser
         int or None: 찾은 행의 인덱스 (0부터 시작), 없으면 None
     """
     try:
-        df = pd.read_excel(excel_file_path)
+        with span('excel.read', path=excel_file_path):
+            df = pd.read_excel(excel_file_path)
         
         # B열 존재 여부 확인
         if column_name not in df.columns:
@@ -42,80 +47,124 @@ def find_item_row(excel_file_path, item_name, column_name='code_name') -> pd.Ser
         return None
 
 def fitter_data(data) -> bool:
-    if data == "데이터 없음" or data == "데이터 없음." or data == "데이터없음" or data == "" or data == None or data.strip() == "":
-        return False
-    return True
+    # '데이터 없음', '없음.', 빈 값 등 결측 표기는 idnolab.normalize의 정규식으로 판단
+    return not is_missing(data)
 
-def save_to_excel_gemini(excel_file_path, item_name, parsed_data) -> pd.Series:
+def save_to_excel_gemini(excel_file_path, item_name, parsed_data, writer=None, years=YEARS, index=None) -> pd.Series:
+    """
+    시장 규모 조사 결과를 품목 행에 저장
+
+    writer(idnolab.patch.ExcelPatchWriter 또는 idnolab.pipeline.ExcelRowSink)를 넘기면 파일 전체를 읽고
+    다시 쓰는 대신 writer에 행을 반영한다 (저장 시점은 writer의 flush_every).
+    값이 '데이터 없음'인 연도는 해당 연도의 네 개 열을 모두 비운다.
+    index(DataFrame 인덱스)를 넘기면 품목명 대신 행 위치로 찾는다 (같은 이름의 품목이 여러 행일 때).
+    """
     try:
-        row = find_item_row(excel_file_path, item_name)
-        if fitter_data(parsed_data['market_size']['domestic']['year_2022']):
-            row['국내 산업규모 (2022)'] = str(parsed_data['market_size']['domestic']['year_2022'])
-            row['국내 추정여부 (2022)'] = str(parsed_data['is_estimated']['domestic']['year_2022'])
-            row['국내 추정근거 (2022)'] = str(parsed_data['estimate_reason']['domestic']['year_2022'])
-            row['출처 (국내 2022)'] = str(parsed_data['references']['domestic']['year_2022'])
-        else:
-            row['국내 산업규모 (2022)'] = ""
-            row['국내 추정여부 (2022)'] = ""
-            row['국내 추정근거 (2022)'] = ""
-            row['출처 (국내 2022)'] = ""
-        if fitter_data(parsed_data['market_size']['domestic']['year_2023']):
-            row['국내 산업규모 (2023)'] = str(parsed_data['market_size']['domestic']['year_2023'])
-            row['국내 추정여부 (2023)'] = str(parsed_data['is_estimated']['domestic']['year_2023'])
-            row['국내 추정근거 (2023)'] = str(parsed_data['estimate_reason']['domestic']['year_2023'])
-            row['출처 (국내 2023)'] = str(parsed_data['references']['domestic']['year_2023'])
-        else:
-            row['국내 산업규모 (2023)'] = ""
-            row['국내 추정여부 (2023)'] = ""
-            row['국내 추정근거 (2023)'] = ""
-            row['출처 (국내 2023)'] = ""
-        if fitter_data(parsed_data['market_size']['domestic']['year_2024']):
-            row['국내 산업규모 (2024)'] = str(parsed_data['market_size']['domestic']['year_2024'])
-            row['국내 추정여부 (2024)'] = str(parsed_data['is_estimated']['domestic']['year_2024'])
-            row['국내 추정근거 (2024)'] = str(parsed_data['estimate_reason']['domestic']['year_2024'])
-            row['출처 (국내 2024)'] = str(parsed_data['references']['domestic']['year_2024'])
-        else:
-            row['국내 산업규모 (2024)'] = ""
-            row['국내 추정여부 (2024)'] = ""
-            row['국내 추정근거 (2024)'] = ""
-            row['출처 (국내 2024)'] = ""
-
-        if fitter_data(parsed_data['market_size']['overseas']['year_2022']):
-            row['해외 산업규모 (2022)'] = str(parsed_data['market_size']['overseas']['year_2022'])
-            row['해외 추정여부 (2022)'] = str(parsed_data['is_estimated']['overseas']['year_2022'])
-            row['해외 추정근거 (2022)'] = str(parsed_data['estimate_reason']['overseas']['year_2022'])
-            row['출처 (해외 2022)'] = str(parsed_data['references']['overseas']['year_2022'])
-        else:
-            row['해외 산업규모 (2022)'] = ""
-            row['해외 추정여부 (2022)'] = ""
-            row['해외 추정근거 (2022)'] = ""
-            row['출처 (해외 2022)'] = ""
-        if fitter_data(parsed_data['market_size']['overseas']['year_2023']):
-            row['해외 산업규모 (2023)'] = str(parsed_data['market_size']['overseas']['year_2023'])
-            row['해외 추정여부 (2023)'] = str(parsed_data['is_estimated']['overseas']['year_2023'])
-            row['해외 추정근거 (2023)'] = str(parsed_data['estimate_reason']['overseas']['year_2023'])
-            row['출처 (해외 2023)'] = str(parsed_data['references']['overseas']['year_2023'])
-        else:
-            row['해외 산업규모 (2023)'] = ""
-            row['해외 추정여부 (2023)'] = ""
-            row['해외 추정근거 (2023)'] = ""
-            row['출처 (해외 2023)'] = ""
-        if fitter_data(parsed_data['market_size']['overseas']['year_2024']):
-            row['해외 산업규모 (2024)'] = str(parsed_data['market_size']['overseas']['year_2024'])
-            row['해외 추정여부 (2024)'] = str(parsed_data['is_estimated']['overseas']['year_2024'])
-            row['해외 추정근거 (2024)'] = str(parsed_data['estimate_reason']['overseas']['year_2024'])
-            row['출처 (해외 2024)'] = str(parsed_data['references']['overseas']['year_2024'])
-        else:
-            row['해외 산업규모 (2024)'] = ""
-            row['해외 추정여부 (2024)'] = ""
-            row['해외 추정근거 (2024)'] = ""
-            row['출처 (해외 2024)'] = ""  
+        row = _find_row(excel_file_path, item_name, writer, index)
+        for region, key in REGIONS.items():
+            for year in years:
+                columns = {field: column_name(field, region, year) for field in FIELD_COLUMNS}
+                if fitter_data(parsed_data['market_size'][key][f'year_{year}']):
+                    for field, column in columns.items():
+                        row[column] = str(parsed_data[field][key][f'year_{year}'])
+                else:
+                    for column in columns.values():
+                        row[column] = ""
 
-        df = pd.read_excel(excel_file_path)
-        df.loc[row.name] = row
-        df.to_excel(excel_file_path, index=False)
+        _save_row(excel_file_path, row, writer)
         return row
     except Exception as e:
         logger.error(f"산업 데이터 저장 중 오류 발생: {e}")
         return None
 
+
+def _find_row(excel_file_path, item_name, writer=None, index=None):
+    # writer가 있으면 열어 둔 통합 문서에서, 없으면 파일을 읽어 품목 행을 찾음
+    if index is not None:
+        if writer is not None:
+            return writer.row(index)
+        with span('excel.read', path=excel_file_path):
+            return pd.read_excel(excel_file_path, dtype=object).loc[index]
+    if writer is None:
+        return find_item_row(excel_file_path, item_name)
+    index = writer.find_row(item_name)
+    if index is None:
+        logger.error(f"'{item_name}' 항목을 B열에서 찾을 수 없습니다.")
+        return None
+    return writer.row(index)
+
+
+def _save_row(excel_file_path, row, writer=None):
+    if writer is not None:
+        writer.write(row.name, row)
+        return
+
+    # 비어 있는 열이 float64로 읽히면 문자열을 넣을 수 없으므로 object로 읽음
+    with span('excel.read', path=excel_file_path):
+        df = pd.read_excel(excel_file_path, dtype=object)
+    df.loc[row.name] = row
+    with span('excel.write', path=excel_file_path, rows=len(df)), metrics.EXCEL_FLUSH.time(sink='market'):
+        df.to_excel(excel_file_path, index=False)
+
+
+def missing_cells(row, years=YEARS):
+    """
+    품목 행에서 산업규모가 비어 있는 (지역, 연도) 목록
+
+    Args:
+        row (Mapping): 품목 행 ('국내 산업규모 (2022)' 등의 열 포함)
+    """
+    return [
+        (region, year) for region in REGIONS for year in years
+        if is_missing(row.get(column_name('market_size', region, year)))
+    ]
+
+
+def merge_gap_data(row, parsed_data, cells):
+    """
+    빈 셀 조회 결과 중 요청한 셀만 기존 행에 병합
+
+    새 값이 '데이터 없음'이면 기존 값을 그대로 두므로 채워져 있던 데이터를 지우지 않는다.
+
+    Returns:
+        int: 새로 채운 셀 수
+    """
+    def value(field, region, year):
+        return ((parsed_data.get(field) or {}).get(REGIONS[region]) or {}).get(f'year_{year}')
+
+    filled = 0
+    for region, year in cells:
+        market_size = value('market_size', region, year)
+        if not fitter_data(market_size):
+            continue
+        for field in FIELD_COLUMNS:
+            row[column_name(field, region, year)] = str(value(field, region, year) or "")
+        filled += 1
+    return filled
+
+
+def save_gap_data_gemini(excel_file_path, item_name, parsed_data, cells, writer=None, index=None):
+    """
+    빈 셀 조회 결과를 품목 행에 병합해 저장 (요청하지 않은 셀과 기존 값은 유지)
+
+    Args:
+        cells (list[tuple[str, str]]): 조회한 (지역, 연도) 목록
+        writer (ExcelPatchWriter | ExcelRowSink): 지정하면 파일 대신 writer에 행을 반영
+        index (int): DataFrame 인덱스 (지정하면 품목명 대신 행 위치로 찾음)
+
+    Returns:
+        int or None: 새로 채운 셀 수 (오류 시 None)
+    """
+    try:
+        row = _find_row(excel_file_path, item_name, writer, index)
+        if row is None:
+            return None
+        filled = merge_gap_data(row, parsed_data, cells)
+        if filled:
+            _save_row(excel_file_path, row, writer)
+        logger.info(f"'{item_name}' 빈 셀 {len(cells)}개 중 {filled}개 채움")
+        return filled
+    except Exception as e:
+        logger.error(f"빈 셀 데이터 저장 중 오류 발생: {e}")
+        return None
+
@@ -1,15 +1,10 @@
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from logger_config import setup_logger
+from functools import lru_cache
 import os
-import time
+import threading
 import json
-from google import genai
-from google.genai import types
-import random
-
-# .env 파일에서 환경변수 로드
-load_dotenv()
 
 # 로거 설정
 logger = setup_logger(__name__)
@@ -24,30 +19,69 @@ class TrendItemKeyWordList(BaseModel):
     item_keyword_2 : TrendItemKeyWord
     item_keyword_3 : TrendItemKeyWord
 
+class PackedTrendItemKeyWordList(BaseModel):
+    item_code : str
+    item_keyword_1 : TrendItemKeyWord
+    item_keyword_2 : TrendItemKeyWord
+    item_keyword_3 : TrendItemKeyWord
+
+
+# 여러 작업자 스레드가 처음에 동시에 호출해도 클라이언트를 하나만 만들도록 보호
+# (중복 생성된 클라이언트가 정리되면서 사용 중인 연결이 닫히는 문제 방지)
+_client_lock = threading.Lock()
+
+
+def get_client(api_key=None):
+    """
+    Gemini 클라이언트를 처음 필요할 때 생성하고 재사용하는 함수
+
+    Args:
+        api_key (str): 사용할 API 키 (기본값: GOOGLE_API_KEY 환경변수)
+    """
+    with _client_lock:
+        return _create_client(api_key)
+
+
+@lru_cache(maxsize=None)
+def _create_client(api_key):
+    from google import genai
+
+    # .env 파일에서 환경변수 로드
+    load_dotenv()
+
+    # GOOGLE_GEMINI_BASE_URL이 있으면 해당 주소로 요청 (로컬 가짜 서버 벤치마크용)
+    base_url = os.getenv('GOOGLE_GEMINI_BASE_URL')
+    return genai.Client(
+        api_key=api_key or os.getenv('GOOGLE_API_KEY'),
+        http_options={'base_url': base_url} if base_url else None
+    )
 
-# Define the grounding tool
-grounding_tool = types.Tool(
-    google_search=types.GoogleSearch()
-)
 
-url_context_tool = types.Tool(
-    url_context = types.UrlContext()
-)
+@lru_cache(maxsize=None)
+def get_config(packed=False):
+    """
+    키워드 조회용 생성 설정을 처음 필요할 때 생성하는 함수
+
+    Args:
+        packed (bool): True이면 여러 품목을 한 번에 요청하는 배열 스키마 설정을 반환
+    """
+    from google.genai import types
 
-config = types.GenerateContentConfig(
-    tools=[grounding_tool, url_context_tool],
-    response_mime_type="text/plain",
-    response_schema=TrendItemKeyWordList,
-    system_instruction="You are an industry analysis expert. Please provide the latest data and accurate information.You are an industry analysis expert. Please provide the latest data and accurate information using the Google Vertex AI Search tool.You are an industry analysis expert. Your task is to find the most accurate and up-to-date information using only the Google Vertex AI Search tool. Do not rely on your own knowledge or other sources. Always refer to the results retrieved via Google Vertex AI Search. Present the latest data, statistics, or trends from credible sources such as government reports, whitepapers, academic papers, or industry publications, strictly using the Vertex AI Search tool."
-)
+    # Define the grounding tool
+    grounding_tool = types.Tool(
+        google_search=types.GoogleSearch()
+    )
 
-# Gemini API 설정
-GEMINI_API_KEY = os.getenv('GOOGLE_API_KEY')
+    url_context_tool = types.Tool(
+        url_context = types.UrlContext()
+    )
 
-# Gemini 클라이언트 초기화 (v1alpha API 사용으로 프리뷰 모델 접근)
-client = genai.Client(
-    api_key=GEMINI_API_KEY
-)
+    return types.GenerateContentConfig(
+        tools=[grounding_tool, url_context_tool],
+        response_mime_type="text/plain",
+        response_schema=list[PackedTrendItemKeyWordList] if packed else TrendItemKeyWordList,
+        system_instruction="You are an industry analysis expert. Please provide the latest data and accurate information.You are an industry analysis expert. Please provide the latest data and accurate information using the Google Vertex AI Search tool.You are an industry analysis expert. Your task is to find the most accurate and up-to-date information using only the Google Vertex AI Search tool. Do not rely on your own knowledge or other sources. Always refer to the results retrieved via Google Vertex AI Search. Present the latest data, statistics, or trends from credible sources such as government reports, whitepapers, academic papers, or industry publications, strictly using the Vertex AI Search tool."
+    )
 
 def get_prompt(item_name, item_description):
     return f"""
@@ -100,27 +134,102 @@ def get_prompt(item_name, item_description):
                         
     """
 
+def request_gemini(contents, packed=False, api_key=None):
+    """
+    키워드 조회 설정으로 Gemini API를 호출하고 응답 텍스트를 반환
+
+    Args:
+        contents (str): 프롬프트
+        packed (bool): 여러 품목 묶음 요청 여부
+        api_key (str): 사용할 API 키 (기본값: GOOGLE_API_KEY 환경변수)
+    """
+    response = get_client(api_key).models.generate_content(
+        model="gemini-2.5-pro",
+        contents=contents,
+        config=get_config(packed=packed)
+    )
+    return response.text
+
+
+def get_packed_prompt(items):
+    """
+    여러 품목의 키워드를 한 번에 요청하는 프롬프트 생성
+
+    Args:
+        items (list[dict]): 'code', 'code_name', 'description' 키를 가진 품목 목록
+    """
+    item_lines = "\n".join(
+        f"            - [{item['code']}] {item['code_name']} : {item['description']}" for item in items
+    )
+    return f"""
+        You are an industry analysis expert. Your task is to find the most accurate and up-to-date information using only the Google Vertex AI Search tool. Do not rely on your own knowledge or other sources. Always refer to the results retrieved via Google Vertex AI Search. Present the latest data, statistics, or trends from credible sources such as government reports, whitepapers, academic papers, or industry publications, strictly using the Vertex AI Search tool.
+
+            The following {len(items)} items belong to the same parent category. For EACH item, find one reliable official document, academic paper, or article that provides trend data on that item.
+            You may reuse search results across items, but the keywords must be chosen separately for each item.
+
+{item_lines}
+
+            Please only refer to the following types of official documents:
+            - Reports/White Papers issued by international organizations.
+            - Reports/White Papers issued by national governments.
+
+            Based on the found document, identify keywords within the URL's content and provide information for each keyword.
+
+            For each keyword, please include the following information:
+            item_keyword: The keyword 
+            item_description: A description of the keyword
+            item_url: The URL of the source official document, paper, or article
+
+            Constraints:
+
+            All URLs must be precise and currently accessible.
+            All URLs must be HTTPS.
+            Use the Google VertexAISearch tool to find the information and verify that the URL's HTTPS status code is 200. If the status code is not 200, find another keyword from a URL that does have a 200 status code.
+            If the keyword description contains citation numbers such as [1] or [2, 5], please remove them.
+            The keyword description should be a concise summary of the core concept, approximately 50 characters in length.
+
+            응답 형식 (one array element per item, item_code must be the code in square brackets):
+
+            [
+                {{
+                    "item_code": "item code",
+                    "item_keyword_1": {{
+                        "item_keyword": "keyword",
+                        "item_description": "keyword description",
+                        "item_url": "source official document, paper, or article URL"
+                    }},
+                    "item_keyword_2": {{
+                        "item_keyword": "keyword",
+                        "item_description": "keyword description",
+                        "item_url": "source official document, paper, or article URL"
+                    }},
+                    "item_keyword_3": {{
+                        "item_keyword": "keyword",
+                        "item_description": "keyword description",
+                        "item_url": "source official document, paper, or article URL"
+                    }}
+                }}
+            ]
+
+    """
+
 def get_item_keyword_with_gemini(item_name, item_description, max_retries=3):
     """
-    Gemini API를 사용하여 특정 물품과 관련된 트렌드 기업 정보를 요청
+    Gemini API를 사용하여 특정 물품과 관련된 키워드 정보를 요청
+
+    재시도는 idnolab.resilience 공통 규칙(백오프, 서킷 브레이커, 재시도 예산)으로 최대 max_retries번 시도하고,
+    각 시도는 API 키 풀(idnolab.keys)에서 여유가 가장 많은 키의 속도 제한기 차례를 기다린다.
     """
-    logger.debug(f"'{item_name}' 항목에 대한 트렌드 기업 정보 Gemini API 호출 시작")
-    
-    try:
-        logger.debug(f"API 호출 시도")
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
-            contents= get_prompt(item_name, item_description),            
-            config=config
-        )
-        
-        logger.debug(f"'{item_name}' 트렌드 기업 정보 API 호출 성공")
-        # logger.debug(f"응답 길이: {len(response.text)} 문자")
-        return response.text
-            
-    except Exception as e:
-        # logger.error(f"API 호출 오류 발생: {e} {response.text}")
-        raise e
+    from idnolab.keys import pooled
+    from idnolab.resilience import RetryPolicy
+
+    logger.debug(f"'{item_name}' 항목에 대한 키워드 정보 Gemini API 호출 시작")
+    policy = RetryPolicy('gemini', 'gemini-2.5-pro', max_attempts=max_retries)
+    request = pooled(request_gemini, 'gemini', 'gemini-2.5-pro')
+    response_text = policy.call(request, get_prompt(item_name, item_description))
+    logger.debug(f"'{item_name}' 키워드 정보 API 호출 성공")
+    logger.debug(f"응답 길이: {len(response_text or '')} 문자")
+    return response_text
 
 
 def parse_item_keyword_with_gemini(response_text):
@@ -175,6 +284,64 @@ def parse_item_keyword_with_gemini(response_text):
         raise e
 
 
+def get_item_keyword_packed_with_gemini(items, api_key=None):
+    """
+    Gemini API를 사용하여 여러 품목의 키워드 정보를 한 번에 요청
+    """
+    logger.debug(f"{len(items)}개 품목 묶음 키워드 정보 Gemini API 호출 시작")
+    return request_gemini(get_packed_prompt(items), packed=True, api_key=api_key)
+
+
+def parse_item_keyword_packed_with_gemini(response_text):
+    """
+    묶음 요청 응답을 파싱하여 {품목 코드: 키워드 정보} 딕셔너리로 변환하는 함수
+    """
+    json_text = response_text.strip()
+
+    # ```json 코드 블록 제거
+    if '```json' in json_text:
+        start = json_text.find('```json') + 7
+        end = json_text.find('```', start)
+        if end != -1:
+            json_text = json_text[start:end].strip()
+
+    # [ ]로 감싸진 JSON 배열만 추출
+    if '[' in json_text and ']' in json_text:
+        start = json_text.find('[')
+        end = json_text.rfind(']') + 1
+        if end > start:
+            json_text = json_text[start:end]
+
+    parsed_data = json.loads(json_text)
+    if isinstance(parsed_data, dict):
+        parsed_data = [parsed_data]
+
+    results = {}
+    for entry in parsed_data:
+        if not isinstance(entry, dict) or 'item_code' not in entry:
+            logger.warning(f"item_code가 없는 응답 원소 무시: {str(entry)[:100]}")
+            continue
+        code = str(entry.pop('item_code')).strip().strip('[]')
+        results[code] = entry
+    return results
+
+
+def is_valid_item_keyword(parsed_data):
+    """
+    save_to_excel에 필요한 키워드 3개가 모두 채워져 있는지 확인하는 함수
+    """
+    for i in range(1, 4):
+        keyword = parsed_data.get(f'item_keyword_{i}')
+        if not isinstance(keyword, dict):
+            return False
+        for field in ['item_keyword', 'item_description', 'item_url']:
+            value = keyword.get(field)
+            if value is None or not str(value).strip():
+                return False
+        if not str(keyword['item_url']).startswith('http'):
+            return False
+    return True
+
 
 
 if __name__ == "__main__":
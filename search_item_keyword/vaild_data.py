@@ -1,17 +1,19 @@
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from logger_config import setup_logger
+from functools import lru_cache
+from contextlib import nullcontext
 import os
+import sys
+import threading
 import time
 import json
-from google import genai
-from google.genai import types
 import pandas as pd
 from typing import Optional, Dict, Any
 import requests
 
-# .env 파일에서 환경변수 로드
-load_dotenv()
+# 공용 idnolab 패키지 경로 추가 (로컬 모듈이 우선하도록 뒤에 추가)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # 로거 설정
 logger = setup_logger(__name__)
@@ -31,25 +33,54 @@ class KeywordValidationResult(BaseModel):
     validation_score: ValidationScore
     is_valid: bool = Field(description="전체 검증 통과 여부")
 
-url_context_tool = types.Tool(
-    url_context = types.UrlContext()
-)
+# 여러 작업자 스레드가 처음에 동시에 호출해도 클라이언트를 하나만 만들도록 보호
+# (중복 생성된 클라이언트가 정리되면서 사용 중인 연결이 닫히는 문제 방지)
+_client_lock = threading.Lock()
 
-# 검증을 위한 Gemini API 설정
-validation_config = types.GenerateContentConfig(
-    tools=[url_context_tool],
-    response_mime_type="text/plain",
-    response_schema=ValidationScore,
-    system_instruction="You are a data validation expert. Evaluate the given information and provide accurate scoring based on the criteria."
-)
 
-# Gemini API 설정
-GEMINI_API_KEY = os.getenv('GOOGLE_API_KEY')
+def get_client(api_key=None):
+    """
+    Gemini 클라이언트를 처음 필요할 때 생성하고 재사용하는 함수
+
+    Args:
+        api_key (str): 사용할 API 키 (기본값: GOOGLE_API_KEY 환경변수)
+    """
+    with _client_lock:
+        return _create_client(api_key)
+
+
+@lru_cache(maxsize=None)
+def _create_client(api_key):
+    from google import genai
+
+    # .env 파일에서 환경변수 로드
+    load_dotenv()
+
+    # GOOGLE_GEMINI_BASE_URL이 있으면 해당 주소로 요청 (로컬 가짜 서버 벤치마크용)
+    base_url = os.getenv('GOOGLE_GEMINI_BASE_URL')
+    return genai.Client(
+        api_key=api_key or os.getenv('GOOGLE_API_KEY'),
+        http_options={'base_url': base_url} if base_url else None
+    )
+
+
+@lru_cache(maxsize=None)
+def get_validation_config():
+    """
+    검증을 위한 Gemini API 설정을 처음 필요할 때 생성하는 함수
+    """
+    from google.genai import types
+
+    url_context_tool = types.Tool(
+        url_context = types.UrlContext()
+    )
 
-# Gemini 클라이언트 초기화
-client = genai.Client(
-    api_key=GEMINI_API_KEY
-)
+    return types.GenerateContentConfig(
+        tools=[url_context_tool],
+        response_mime_type="text/plain",
+        response_schema=ValidationScore,
+        system_instruction="You are a data validation expert. Evaluate the given information and provide accurate scoring based on the criteria."
+    )
 
 def get_validation_prompt(item_name: str, item_keyword: str, item_description: str, item_url: str) -> str:
     """검증을 위한 프롬프트 생성"""
@@ -92,9 +123,12 @@ def get_validation_prompt(item_name: str, item_keyword: str, item_description: s
     }}
     """
 
-def validate_keyword_with_gemini(item_name: str, item_keyword: str, item_description: str, item_url: str, max_retries: int = 3) -> ValidationScore:
+def validate_keyword_with_gemini(item_name: str, item_keyword: str, item_description: str, item_url: str, max_retries: int = 3,
+                                 rate_limiter=None) -> ValidationScore:
     """
     Gemini API를 사용하여 키워드 데이터의 유효성을 검증
+
+    rate_limiter(idnolab.ratelimit.AdaptiveRateLimiter)를 주면 API 호출마다 차례를 기다리고 429 응답을 속도에 반영한다.
     """
     logger.debug(f"'{item_name}' - '{item_keyword}' 검증 시작")
     
@@ -105,11 +139,12 @@ def validate_keyword_with_gemini(item_name: str, item_keyword: str, item_descrip
             # URL 접근성 사전 체크
             url_accessible = check_url_accessibility(item_url)
             
-            response = client.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=get_validation_prompt(item_name, item_keyword, item_description, item_url),
-                config=validation_config
-            )
+            with rate_limiter.slot() if rate_limiter is not None else nullcontext():
+                response = get_client().models.generate_content(
+                    model="gemini-2.5-pro",
+                    contents=get_validation_prompt(item_name, item_keyword, item_description, item_url),
+                    config=get_validation_config()
+                )
             
             # 응답 파싱
             validation_result = parse_validation_response(response.text)
@@ -192,9 +227,13 @@ def validate_keyword_data(df: pd.DataFrame, output_file: str = "validation_resul
     """
     엑셀 파일의 키워드 데이터를 검증하고 결과를 저장
     """
+    from idnolab.ratelimit import limiter
+
     logger.info("키워드 데이터 검증 시작")
     
     results = []
+    # 호출 간격은 적응형 속도 제한기가 조절 (분당 60회에서 시작)
+    rate = limiter('gemini', 'gemini-2.5-pro', rpm=60)
     
     temp = [33]
 
@@ -222,7 +261,8 @@ def validate_keyword_data(df: pd.DataFrame, output_file: str = "validation_resul
                         item_name=item_name,
                         item_keyword=keyword,
                         item_description=description,
-                        item_url=url
+                        item_url=url,
+                        rate_limiter=rate
                     )
                     
                     # 검증 결과 저장
@@ -239,11 +279,15 @@ def validate_keyword_data(df: pd.DataFrame, output_file: str = "validation_resul
                     
                     # 진행 상황 로깅
                     logger.info(f"검증 완료: {keyword} - 점수: {validation_score.total_score}/20")
-                    
-                    # API 호출 제한을 위한 대기
-                    time.sleep(1)
     
     # 결과를 DataFrame으로 변환하여 엑셀로 저장
+    save_validation_results(results, output_file)
+
+
+def save_validation_results(results: list, output_file: str = "validation_results.xlsx"):
+    """
+    검증 결과 목록을 엑셀로 저장하고 요약 통계를 로깅
+    """
     if results:
         results_df = pd.DataFrame(results)
         
@@ -267,8 +311,6 @@ def validate_keyword_data(df: pd.DataFrame, output_file: str = "validation_resul
         logger.warning("검증할 데이터가 없습니다.")
 
 
-
-
 if __name__ == "__main__":
     import argparse
     
@@ -1,15 +1,10 @@
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from logger_config import setup_logger
+from functools import lru_cache
 import os
-import time
+import threading
 import json
-from google import genai
-from google.genai import types
-import random
-
-# .env 파일에서 환경변수 로드
-load_dotenv()
 
 # 로거 설정
 logger = setup_logger(__name__)
@@ -34,30 +29,68 @@ class TrendCompanies(BaseModel):
     domestic_companies: TrendDomesticCompany  # 국내 트렌드 기업 목록
     global_companies: TrendGlobalCompany  # 해외 트렌드 기업 목록
 
-# Define the grounding tool
-grounding_tool = types.Tool(
-    google_search=types.GoogleSearch()
-)
+class PackedTrendCompanies(BaseModel):
+    item_code: str  # 품목 코드
+    domestic_company: TrendDomesticCompany  # 국내 트렌드 기업
+    global_company: TrendGlobalCompany  # 해외 트렌드 기업
+
+# 여러 작업자 스레드가 처음에 동시에 호출해도 클라이언트를 하나만 만들도록 보호
+# (중복 생성된 클라이언트가 정리되면서 사용 중인 연결이 닫히는 문제 방지)
+_client_lock = threading.Lock()
+
+
+def get_client(api_key=None):
+    """
+    Gemini 클라이언트를 처음 필요할 때 생성하고 재사용하는 함수
+
+    Args:
+        api_key (str): 사용할 API 키 (기본값: GOOGLE_API_KEY 환경변수)
+    """
+    with _client_lock:
+        return _create_client(api_key)
+
 
-url_context_tool = types.Tool(
-    url_context = types.UrlContext()
-)
+@lru_cache(maxsize=None)
+def _create_client(api_key):
+    from google import genai
 
-config = types.GenerateContentConfig(
-    tools=[grounding_tool, url_context_tool],
-    response_mime_type="text/plain",
-    response_schema=TrendCompanies,
-    temperature=0.0,
-    system_instruction="당신은 산업 분석 전문가입니다. 최신 데이터와 정확한 정보를 제공해주세요."
-)
+    # .env 파일에서 환경변수 로드
+    load_dotenv()
 
-# Gemini API 설정
-GEMINI_API_KEY = os.getenv('GOOGLE_API_KEY')
+    # GOOGLE_GEMINI_BASE_URL이 있으면 해당 주소로 요청 (로컬 가짜 서버 벤치마크용)
+    base_url = os.getenv('GOOGLE_GEMINI_BASE_URL')
+    return genai.Client(
+        api_key=api_key or os.getenv('GOOGLE_API_KEY'),
+        http_options={'base_url': base_url} if base_url else None
+    )
 
-# Gemini 클라이언트 초기화 (v1alpha API 사용으로 프리뷰 모델 접근)
-client = genai.Client(
-    api_key=GEMINI_API_KEY
-)
+
+@lru_cache(maxsize=None)
+def get_config(packed=False):
+    """
+    트렌드 기업 조회용 생성 설정을 처음 필요할 때 생성하는 함수
+
+    Args:
+        packed (bool): True이면 여러 품목을 한 번에 요청하는 배열 스키마 설정을 반환
+    """
+    from google.genai import types
+
+    # Define the grounding tool
+    grounding_tool = types.Tool(
+        google_search=types.GoogleSearch()
+    )
+
+    url_context_tool = types.Tool(
+        url_context = types.UrlContext()
+    )
+
+    return types.GenerateContentConfig(
+        tools=[grounding_tool, url_context_tool],
+        response_mime_type="text/plain",
+        response_schema=list[PackedTrendCompanies] if packed else TrendCompanies,
+        temperature=0.0,
+        system_instruction="당신은 산업 분석 전문가입니다. 최신 데이터와 정확한 정보를 제공해주세요."
+    )
 
 def get_prompt(item_name, item_description):
     return f"""
@@ -112,28 +145,108 @@ def get_prompt(item_name, item_description):
                         
     """
 
+def request_gemini(contents, packed=False, api_key=None):
+    """
+    트렌드 기업 조회 설정으로 Gemini API를 호출하고 응답 텍스트를 반환
+
+    Args:
+        contents (str): 프롬프트
+        packed (bool): 여러 품목 묶음 요청 여부
+        api_key (str): 사용할 API 키 (기본값: GOOGLE_API_KEY 환경변수)
+    """
+    response = get_client(api_key).models.generate_content(
+        model="gemini-2.5-pro",
+        contents=contents,
+        config=get_config(packed=packed)
+    )
+    return response.text
+
+
+def get_packed_prompt(items):
+    """
+    여러 품목의 트렌드 기업을 한 번에 요청하는 프롬프트 생성
+
+    Args:
+        items (list[dict]): 'code', 'code_name', 'description' 키를 가진 품목 목록
+    """
+    item_lines = "\n".join(
+        f"            - [{item['code']}] {item['code_name']} : {item['description']}" for item in items
+    )
+    return f"""
+        당신은 산업 분석 전문가입니다. 최신 데이터와 정확한 정보를 제공해주세요.
+
+            아래 {len(items)}개 품목 각각에 대해 관련 트렌드 기업들의 정보를 제공해주세요.
+            품목들은 같은 상위 분류에 속하므로 검색 결과를 함께 활용해도 되지만, 기업은 품목별로 따로 선정해주세요.
+
+{item_lines}
+
+            각 기업에 대해 다음 정보를 포함해주세요: 
+            - company_name: 기업명
+            - company_url: 기업 홈페이지 URL
+            - company_description: 기업 소개/설명
+            - company_best_product: 주력 제품명
+            - company_best_product_url: 주력 제품 페이지 URL
+            - company_best_product_description: 주력 제품 설명
+
+            모든 URL은 실제 접근 가능한 정확한 URL이어야 합니다.
+            URL응답코드가 200이 아닌 경우 URL응답코드가 200인 다른 기업을 찾아주세요.
+            기업 소개와 제품 설명에 [1] 또는 [2, 5] 이런식으로 참고 자료 번호가 있는 경우 참고 자료 번호를 제거하고 작성해주세요.
+            기업 설명과 제품 설명은 30자 내외로 핵심만 요약하여 작성해주세요.
+            트렌드 기업 선정 기준은 다음과 같습니다.
+            - 정량적 분석
+                - 성장 지표 (Growth Metrics): 3개년 연평균 성장률(CAGR) 20% 이상, 인력 증가율 15% 이상.
+                - 투자 유치 (Funding): 최근 2년 내 Series A 라운드 이상의 투자 유치 실적 보유.
+                - 혁신 지표 (Innovation Metrics): 매출 대비 R&D 투자 비율 10% 이상, 핵심 기술 관련 특허 포트폴리오 보유.
+            - 정성적 분석
+                - 업계 인지도 (Industry Recognition): CES 등 권위 있는 어워드 수상 경력 보유.
+                - 미디어 버즈 (Media Buzz): 주요 언론 및 소셜 미디어 내 긍정적 언급량, Google Trends 상승세.
+                - 시장 리더십 (Market Leadership): 해당 산업 내 선도적 위치를 점하고 있거나, 경쟁사의 벤치마킹 대상이 되는 경우를 포함.
+
+            기업 선정 우선순위는 성장 지표, 투자 유치, 혁신 지표, 업계 인지도, 미디어 버즈, 시장 리더십 순으로 합니다.
+
+            응답 형식 (품목마다 배열 원소 하나, item_code에는 대괄호 안의 품목 코드를 그대로 기록):
+
+            [
+                {{
+                    "item_code": "품목 코드",
+                    "domestic_company":{{
+                        "company_name": "기업명",
+                        "company_url": "https://example.com",
+                        "company_description": "기업 소개 및 설명",
+                        "company_best_product": "주력 제품명",
+                        "company_best_product_url": "https://example.com/product",
+                        "company_best_product_description": "주력 제품 설명"
+                    }},
+                    "global_company":{{
+                        "company_name": "기업명",
+                        "company_url": "https://example.com",
+                        "company_description": "기업 소개 및 설명",
+                        "company_best_product": "주력 제품명",
+                        "company_best_product_url": "https://example.com/product",
+                        "company_best_product_description": "주력 제품 설명"
+                    }}
+                }}
+            ]
+
+    """
+
 def get_trend_companies_with_gemini(item_name, item_description, max_retries=3):
     """
     Gemini API를 사용하여 특정 물품과 관련된 트렌드 기업 정보를 요청
+
+    재시도는 idnolab.resilience 공통 규칙(백오프, 서킷 브레이커, 재시도 예산)으로 최대 max_retries번 시도하고,
+    각 시도는 API 키 풀(idnolab.keys)에서 여유가 가장 많은 키의 속도 제한기 차례를 기다린다.
     """
+    from idnolab.keys import pooled
+    from idnolab.resilience import RetryPolicy
+
     logger.debug(f"'{item_name}' 항목에 대한 트렌드 기업 정보 Gemini API 호출 시작")
-    
-    for attempt in range(max_retries):
-        try:
-            logger.debug(f"API 호출 시도 {attempt + 1}/{max_retries}")
-            response = client.models.generate_content(
-                model="gemini-2.5-pro",
-                contents= get_prompt(item_name, item_description),            
-                config=config
-            )
-            
-            logger.debug(f"'{item_name}' 트렌드 기업 정보 API 호출 성공")
-            logger.debug(f"응답 길이: {len(response.text)} 문자")
-            return response.text
-                
-        except Exception as e:
-            logger.error(f"API 호출 오류 발생: {e} {response.text}")
-            raise e
+    policy = RetryPolicy('gemini', 'gemini-2.5-pro', max_attempts=max_retries)
+    request = pooled(request_gemini, 'gemini', 'gemini-2.5-pro')
+    response_text = policy.call(request, get_prompt(item_name, item_description))
+    logger.debug(f"'{item_name}' 트렌드 기업 정보 API 호출 성공")
+    logger.debug(f"응답 길이: {len(response_text or '')} 문자")
+    return response_text
 
 
 def parse_trend_companies_with_gemini(response_text):
@@ -188,6 +301,71 @@ def parse_trend_companies_with_gemini(response_text):
         raise e
 
 
+def get_trend_companies_packed_with_gemini(items, api_key=None):
+    """
+    Gemini API를 사용하여 여러 품목의 트렌드 기업 정보를 한 번에 요청
+    """
+    logger.debug(f"{len(items)}개 품목 묶음 트렌드 기업 정보 Gemini API 호출 시작")
+    response_text = request_gemini(get_packed_prompt(items), packed=True, api_key=api_key)
+    logger.debug(f"묶음 응답 길이: {len(response_text)} 문자")
+    return response_text
+
+
+def parse_trend_companies_packed_with_gemini(response_text):
+    """
+    묶음 요청 응답을 파싱하여 {품목 코드: 트렌드 기업 정보} 딕셔너리로 변환하는 함수
+    """
+    json_text = response_text.strip()
+
+    # ```json 코드 블록 제거
+    if '```json' in json_text:
+        start = json_text.find('```json') + 7
+        end = json_text.find('```', start)
+        if end != -1:
+            json_text = json_text[start:end].strip()
+
+    # [ ]로 감싸진 JSON 배열만 추출
+    if '[' in json_text and ']' in json_text:
+        start = json_text.find('[')
+        end = json_text.rfind(']') + 1
+        if end > start:
+            json_text = json_text[start:end]
+
+    parsed_data = json.loads(json_text)
+    if isinstance(parsed_data, dict):
+        parsed_data = [parsed_data]
+
+    results = {}
+    for entry in parsed_data:
+        if not isinstance(entry, dict) or 'item_code' not in entry:
+            logger.warning(f"item_code가 없는 응답 원소 무시: {str(entry)[:100]}")
+            continue
+        code = str(entry.pop('item_code')).strip().strip('[]')
+        results[code] = entry
+    return results
+
+
+def is_valid_trend_companies(parsed_data):
+    """
+    save_to_excel에 필요한 트렌드 기업 필드가 모두 채워져 있는지 확인하는 함수
+    """
+    fields = [
+        'company_name', 'company_url', 'company_description',
+        'company_best_product', 'company_best_product_url', 'company_best_product_description'
+    ]
+    for company_key in ['domestic_company', 'global_company']:
+        company = parsed_data.get(company_key)
+        if not isinstance(company, dict):
+            return False
+        for field in fields:
+            value = company.get(field)
+            if value is None or not str(value).strip():
+                return False
+        if not str(company['company_url']).startswith('http'):
+            return False
+    return True
+
+
 if __name__ == "__main__":
     import pandas as pd
     from save_to_excel import save_to_excel
@@ -1,17 +1,10 @@
-from google import genai
 from google.genai import types
 import pandas as pd
-from gemini_api import get_prompt
+from gemini_api import get_prompt, get_client
 import os
 import json
 import time
 
-GEMINI_API_KEY = os.getenv('GOOGLE_API_KEY')
-
-client = genai.Client(
-    api_key=GEMINI_API_KEY
-)
-
 def transform_to_json(data_list, filename="batch_requests.jsonl"):
     """
     리스트 형태의 데이터를 JSONL 파일로 저장하는 함수
@@ -61,7 +54,7 @@ def upload_file_to_genai(file_path, display_name=None):
         print(f"파일 업로드 시작: {file_path}")
         
         # 파일 업로드 - 'file' 매개변수 사용
-        uploaded_file = client.files.upload(
+        uploaded_file = get_client().files.upload(
             file=file_path  # 'path' 대신 'file' 사용
         )
         
@@ -92,7 +85,7 @@ def create_batch_job_with_file(file_uri, job_name="trend-companies-batch-job"):
         print(f"배치 작업 생성 시작: {job_name}")
         
         # 배치 작업 생성
-        batch_job = client.batches.create(
+        batch_job = get_client().batches.create(
             model="models/gemini-2.5-pro",
             src=file_uri,  # 업로드된 파일 URI 사용
             config=types.CreateBatchJobConfig(
@@ -294,7 +287,7 @@ def create_inline_batch_job(inline_requests):
         )
         
         # 배치 작업 생성
-        inline_batch_job = client.batches.create(
+        inline_batch_job = get_client().batches.create(
             model="models/gemini-2.5-pro",
             src=batch_source,  # BatchJobSource 객체 전달
             config=types.CreateBatchJobConfig(
@@ -323,7 +316,7 @@ def monitor_batch_job(batch_job_name):
     배치 작업 상태를 모니터링
     """
     try:
-        job = client.batches.get(name=batch_job_name)
+        job = get_client().batches.get(name=batch_job_name)
         
         print(f"\n=== 배치 작업 상태 ===")
         print(f"작업 ID: {job.name}")
@@ -362,7 +355,7 @@ def wait_for_completion(batch_job_name, max_wait_time=300):
     start_time = time.time()
     
     while time.time() - start_time < max_wait_time:
-        job = client.batches.get(name=batch_job_name)
+        job = get_client().batches.get(name=batch_job_name)
         print(f"현재 상태: {job.state}")
         
         if job.state in completed_states:
@@ -381,7 +374,7 @@ def get_batch_results(batch_job_name):
     완료된 배치 작업의 결과 가져오기
     """
     try:
-        job = client.batches.get(name=batch_job_name)
+        job = get_client().batches.get(name=batch_job_name)
         
         if job.state == "JOB_STATE_SUCCEEDED":
             print(f"\n=== 배치 작업 결과 ===")
@@ -433,7 +426,7 @@ def list_batch_jobs():
     """
     try:
         print("\n=== 배치 작업 목록 ===")
-        for job in client.batches.list(
+        for job in get_client().batches.list(
             config=types.ListBatchJobsConfig(page_size=10)
         ):
             print(f"- {job.name}: {job.state} ({job.display_name})")
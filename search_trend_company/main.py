@@ -1,11 +1,25 @@
 import pandas as pd
-from gemini_api import get_trend_companies_with_gemini, parse_trend_companies_with_gemini
-import time
+from gemini_api import (
+    get_trend_companies_with_gemini, parse_trend_companies_with_gemini,
+    get_trend_companies_packed_with_gemini, parse_trend_companies_packed_with_gemini,
+    is_valid_trend_companies
+)
+import argparse
+import os
+import sys
 from save_to_excel import save_to_excel
 from logger_config import setup_logger
 
+# 공용 idnolab 패키지 경로 추가 (로컬 모듈이 우선하도록 뒤에 추가)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from idnolab.packing import group_by_parent, run_packed
+from idnolab.keys import key_pool
+
 logger = setup_logger(__name__)
 
+# API 키 풀 (GOOGLE_API_KEYS에 여러 키를 주면 나눠 씀, 키마다 분당 6회에서 시작해 429를 받으면 낮춤)
+pool = key_pool('gemini', 'gemini-2.5-pro', rpm=6)
+
 not_completed_rows = [  
     50, 84, 122, 125, 126, 134, 139, 144, 151, 154, 158, 174, 182, 184, 187,
     211, 213, 217, 232, 240, 245, 256, 260, 269, 284, 300, 311, 312, 317, 332, 333,
@@ -19,29 +33,64 @@ not_completed_rows = [
 ]
 
 
+def run_packed_rows(df, rows, pack_size):
+    """
+    같은 상위 분류의 품목을 pack_size 개씩 묶어 트렌드 기업 정보를 조회하고 저장
+    """
+    items = [
+        {'index': index, 'code': str(df.loc[index, 'Unnamed: 0']),
+         'code_name': df.loc[index, 'code_name'], 'description': df.loc[index, '개념설명']}
+        for index in rows
+    ]
+
+    def call(batch):
+        return parse_trend_companies_packed_with_gemini(pool.call(get_trend_companies_packed_with_gemini, batch))
+
+    def on_result(item, parsed_data):
+        update_row = save_to_excel(df.loc[item['index']].copy(), parsed_data)
+        if update_row is not None:
+            df.loc[item['index']] = update_row
+            logger.info(f"트렌드 기업 정보 저장 완료: {item['code_name']}: {item['index']}")
+
+    def on_failure(item, error):
+        logger.error(f"{item['index']}:트렌드 기업 정보 오류 발생: {error}")
+
+    for batch in group_by_parent(items, pack_size):
+        request_count = run_packed(batch, call, is_valid_trend_companies, on_result, on_failure)
+        # 묶음 단위로 한 번만 저장
+        df.to_excel("item_info_trend.xlsx", sheet_name="Sheet1", index=False)
+        logger.info(f"묶음 {len(batch)}개 처리 완료 (API 요청 {request_count}회)")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='트렌드 기업 정보 조회')
+    parser.add_argument('--pack', type=int, default=1,
+                        help='같은 상위 분류 품목을 한 번에 묶어 요청할 최대 개수 (기본값: 1, 묶지 않음)')
+    args = parser.parse_args()
 
     not_completed_rows = [i - 2 for i in not_completed_rows]
 
     try:    
         df = pd.read_excel("item_info_trend.xlsx", sheet_name="Sheet1")
         df.astype(object)
-        for index, row in df.iterrows():
-            if index not in not_completed_rows:
-                continue
-            try:
-                logger.info(f"{index}:{row['code_name']}트렌드 기업 정보 조회 시작")
-                trend_companies = get_trend_companies_with_gemini(row['code_name'], row['개념설명'])
+        if args.pack > 1:
+            run_packed_rows(df, [i for i in not_completed_rows if i in df.index], args.pack)
+        else:
+            for index, row in df.iterrows():
+                if index not in not_completed_rows:
+                    continue
+                try:
+                    logger.info(f"{index}:{row['code_name']}트렌드 기업 정보 조회 시작")
+                    trend_companies = get_trend_companies_with_gemini(row['code_name'], row['개념설명'])
             
-                parsed_data = parse_trend_companies_with_gemini(trend_companies)
-                update_row = save_to_excel(row, parsed_data)
+                    parsed_data = parse_trend_companies_with_gemini(trend_companies)
+                    update_row = save_to_excel(row, parsed_data)
                 
-                df.loc[index] = update_row
-                df.to_excel("item_info_trend.xlsx", sheet_name="Sheet1", index=False)
-                logger.info(f"트렌드 기업 정보 저장 완료: {row['code_name']}: {index}")
-                time.sleep(10)
-            except Exception as e:
-                logger.error(f"{index}:트렌드 기업 정보 오류 발생: {e}")
-                continue
+                    df.loc[index] = update_row
+                    df.to_excel("item_info_trend.xlsx", sheet_name="Sheet1", index=False)
+                    logger.info(f"트렌드 기업 정보 저장 완료: {row['code_name']}: {index}")
+                except Exception as e:
+                    logger.error(f"{index}:트렌드 기업 정보 오류 발생: {e}")
+                    continue
     except Exception as e:
         logger.error(e)
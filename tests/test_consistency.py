@@ -0,0 +1,53 @@
+"""idnolab.consistency 일관성 검사와 재조회 계획"""
+import pandas as pd
+
+from idnolab.consistency import check_consistency, load_plan, requery_plan
+from idnolab.fx import load_fx_rates, to_krw
+from idnolab.normalize import market_size_table
+
+
+def sheet(rows):
+    columns = ['Unnamed: 0', 'code_name', '국내 산업규모 (2022)', '해외 산업규모 (2022)']
+    return pd.DataFrame(rows, columns=columns)
+
+
+def checks(df):
+    issues = check_consistency(to_krw(market_size_table(df), load_fx_rates()))
+    return issues[issues['check'] == 'domestic_gt_overseas']
+
+
+def test_domestic_below_overseas_after_conversion_is_not_flagged():
+    # 국내 1,000억 원 < 해외 1억 달러 (천 단위: 100,000,000 천원 / 100,000 천달러)
+    assert checks(sheet([['F010101', '품목', '100000000', '100000']])).empty
+
+
+def test_domestic_above_overseas_is_flagged_on_both_cells():
+    flagged = checks(sheet([['F010101', '품목', '100000000', '10']]))
+    assert sorted(flagged['region']) == ['국내', '해외']
+
+
+def test_plan_is_keyed_by_code(tmp_path):
+    # 이름이 같은 두 품목 중 두 번째 품목만 재조회
+    df = sheet([['F010101', '시스템', '100000', '1000000'], ['F020101', '시스템', '100000000', '10']])
+    # 출처·추정여부 열이 없는 표이므로 국내/해외 비교 결과만 계획에 넣음
+    plan = requery_plan(checks(df))
+    path = tmp_path / 'plan.csv'
+    plan.to_csv(path, index=False, encoding='utf-8-sig')
+    cells = load_plan(path)
+    assert list(cells) == ['F020101']
+    assert sorted(cells['F020101']) == [('국내', '2022'), ('해외', '2022')]
+
+
+def test_boolean_estimate_flags():
+    columns = ['Unnamed: 0', 'code_name', '국내 산업규모 (2022)', '국내 추정여부 (2022)', '국내 추정근거 (2022)',
+               '출처 (국내 2022)']
+    df = pd.DataFrame([
+        ['F010101', '추정 근거 있음', '1000', True, '시장 점유율로 추정', '보고서'],
+        ['F010102', '추정 근거 없음', '1000', True, None, '보고서'],
+        ['F010103', '실제 금액', '1000', False, '협회 통계', '보고서'],
+        ['F010104', '실제인데 추정 설명', '1000', 'False', '성장률로 추정', '보고서'],
+        ['F010105', '추정 표기', '1000', '추정', None, '보고서'],
+    ], columns=columns)
+    issues = check_consistency(to_krw(market_size_table(df), load_fx_rates()))
+    flagged = issues.loc[issues['check'] == 'estimate_mismatch', 'code']
+    assert sorted(flagged) == ['F010102', 'F010104', 'F010105']
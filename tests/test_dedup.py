@@ -0,0 +1,30 @@
+"""idnolab.dedup 유사 품목 묶기"""
+from idnolab.dedup import cluster, minhash, share_tasks
+from idnolab.pipeline import Task
+
+SYSTEM = '시스템 | 여러 구성요소가 결합되어 하나의 기능을 수행하는 장치'
+OTHER = '반도체 장비 | 웨이퍼 표면에 박막을 증착하는 공정 장비'
+
+
+def test_identical_texts_share_first_position():
+    assert cluster(minhash([SYSTEM, OTHER, SYSTEM, SYSTEM]), 0.9) == [0, 1, 0, 0]
+
+
+def test_excluded_positions_stay_alone():
+    # 대표 위치를 빼면 남은 같은 텍스트끼리 묶임
+    assert cluster(minhash([SYSTEM, OTHER, SYSTEM, SYSTEM]), 0.9, exclude={0}) == [0, 1, 2, 2]
+    assert cluster(minhash([SYSTEM, SYSTEM, SYSTEM]), 0.9, exclude={1}) == [0, 1, 0]
+
+
+def test_share_tasks_puts_members_on_representative():
+    rows = [('F010101', '시스템'), ('F010102', '장비'), ('F020101', '시스템')]
+    tasks = [Task(key=code, row={'index': n, 'code_name': name, '개념설명': '설명'})
+             for n, (code, name) in enumerate(rows)]
+    shared = list(share_tasks(tasks, {}, threshold=0.9))
+    assert [task.key for task in shared] == ['F010101', 'F010102']
+    assert [task.key for task in shared[0].row['members']] == ['F020101']
+
+    # 엑셀 4행(index 2)은 따로 조회
+    alone = list(share_tasks(tasks, {}, threshold=0.9, exclude_rows={4}))
+    assert [task.key for task in alone] == ['F010101', 'F010102', 'F020101']
+    assert all(task.row['members'] == [] for task in alone)
@@ -0,0 +1,39 @@
+"""idnolab.fx 원화 환산"""
+import pandas as pd
+import pytest
+
+from idnolab.fx import compare_regions, load_fx_rates, to_krw
+from idnolab.normalize import market_size_table
+
+
+@pytest.fixture
+def rates():
+    return load_fx_rates()
+
+
+def usd_rate(rates, year):
+    return rates[(rates['year'] == year) & (rates['currency'] == 'USD')]['krw_per_unit'].iloc[0]
+
+
+def test_overseas_plain_cell_uses_usd_rate(rates):
+    df = pd.DataFrame({
+        'Unnamed: 0': ['F010101'], 'code_name': ['품목'],
+        '국내 산업규모 (2022)': ['163830000'], '해외 산업규모 (2022)': ['2197000'],
+    })
+    table = to_krw(market_size_table(df), rates).set_index('region')
+    assert table.loc['해외', 'fx_rate'] == usd_rate(rates, 2022)
+    assert table.loc['해외', 'krw_value'] == pytest.approx(2197000 * usd_rate(rates, 2022))
+    assert table.loc['국내', 'fx_rate'] == 1.0
+    assert compare_regions(to_krw(market_size_table(df), rates))['domestic_share'].iloc[0] < 1
+
+
+def test_missing_currency_falls_back_to_region(rates):
+    table = pd.DataFrame({'region': ['해외', '국내'], 'year': ['2023', '2023'], 'value': [10.0, 10.0],
+                          'currency': [None, None]})
+    result = to_krw(table, rates)
+    assert result['fx_rate'].tolist() == [usd_rate(rates, 2023), 1.0]
+
+
+def test_unknown_year_uses_nearest_rate(rates):
+    table = pd.DataFrame({'year': ['2030'], 'value': [1.0], 'currency': ['USD']})
+    assert to_krw(table, rates)['fx_rate'].iloc[0] == usd_rate(rates, rates['year'].max())
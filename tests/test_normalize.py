@@ -0,0 +1,62 @@
+"""idnolab.normalize 금액 정규화"""
+import math
+
+import pandas as pd
+
+from idnolab.normalize import (STATUS_EMPTY, STATUS_MISSING, STATUS_OK, STATUS_UNPARSED, market_size_table,
+                               normalize_amounts)
+
+
+def test_plain_number_is_already_thousands():
+    # 프롬프트가 '천원 단위의 숫자'를 요구하므로 숫자만 있는 셀은 나누지 않음
+    result = normalize_amounts(['2197000', '1,500'])
+    assert result['value'].tolist() == [2197000.0, 1500.0]
+    assert result['currency'].tolist() == ['KRW', 'KRW']
+
+
+def test_unit_expressions_convert_to_thousands():
+    result = normalize_amounts(['4692억 원(약 3억 5천만 달러)', 'USD 3.2 billion', '5천만'])
+    assert result['value'].tolist() == [469_200_000.0, 3_200_000.0, 50_000.0]
+    assert result['currency'].tolist() == ['KRW', 'USD', 'KRW']
+
+
+def test_missing_and_empty_cells():
+    result = normalize_amounts(['데이터없음', '', None])
+    assert result['status'].tolist() == [STATUS_MISSING, STATUS_EMPTY, STATUS_EMPTY]
+    assert all(math.isnan(value) for value in result['value'])
+
+
+def test_default_currency_per_cell():
+    result = normalize_amounts(['2197000', '3억', 'USD 5 million'], ['USD', 'USD', 'KRW'])
+    assert result['currency'].tolist() == ['USD', 'USD', 'USD']
+    assert result['status'].tolist() == [STATUS_OK] * 3
+
+
+def test_market_size_table_uses_region_currency():
+    df = pd.DataFrame({
+        'Unnamed: 0': ['F010101'], 'code_name': ['품목'],
+        '국내 산업규모 (2022)': ['1500000'], '해외 산업규모 (2022)': ['2197000'],
+    })
+    table = market_size_table(df).set_index('region')
+    assert table.loc['국내', 'currency'] == 'KRW'
+    assert table.loc['해외', 'currency'] == 'USD'
+    assert table.loc['해외', 'value'] == 2197000.0
+
+
+def test_unspaced_compound_amounts():
+    result = normalize_amounts(['1억2천만원', '2조3000억원', '1억 2천만원'])
+    assert result['value'].tolist() == [120_000.0, 2_300_000_000.0, 120_000.0]
+    assert result['status'].tolist() == [STATUS_OK] * 3
+
+
+def test_currency_suffix_after_compound_amount():
+    result = normalize_amounts(['3억5천만 달러', '3억5천만달러', '2,500만 달러'])
+    assert result['value'].tolist() == [350_000.0, 350_000.0, 25_000.0]
+    assert result['currency'].tolist() == ['USD', 'USD', 'USD']
+
+
+def test_counts_are_not_amounts():
+    # '5천만 개'가 '5천'으로 잘려 금액으로 읽히지 않음
+    result = normalize_amounts(['5천만 개', '2024년 3조원'])
+    assert result['status'].tolist() == [STATUS_UNPARSED, STATUS_OK]
+    assert result['value'].iloc[1] == 3_000_000_000.0
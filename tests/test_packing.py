@@ -0,0 +1,87 @@
+"""idnolab.packing 묶음 요청 재분할 / idnolab.resilience 서킷 브레이커"""
+import pytest
+
+from idnolab.packing import run_packed
+from idnolab.pipeline import AbortRun, Pipeline, Stage, Task
+from idnolab.resilience import CircuitBreaker, ProviderDown, QuotaExhausted
+
+
+def items(*codes):
+    return [{'code': code} for code in codes]
+
+
+def run(batch, call, validate=lambda data: data == 'ok'):
+    results, failures = {}, {}
+    count = run_packed(batch, call, validate,
+                       on_result=lambda item, data: results.__setitem__(item['code'], data),
+                       on_failure=lambda item, error: failures.__setitem__(item['code'], error))
+    return count, results, failures
+
+
+def test_only_failed_items_are_split_and_retried():
+    calls = []
+
+    def call(batch):
+        codes = [item['code'] for item in batch]
+        calls.append(codes)
+        # 묶음에서는 B, C가 누락되고 단독 요청에서는 C만 계속 실패
+        if len(batch) > 1 and len(calls) == 1:
+            return {'F0101': 'ok', 'F0104': 'ok'}
+        return {code: 'ok' for code in codes if code != 'F0103'}
+
+    count, results, failures = run(items('F0101', 'F0102', 'F0103', 'F0104'), call)
+    assert calls == [['F0101', 'F0102', 'F0103', 'F0104'], ['F0102'], ['F0103']]
+    assert count == 3
+    assert set(results) == {'F0101', 'F0102', 'F0104'}
+    assert list(failures) == ['F0103']
+
+
+def test_single_item_error_is_reported_as_failure():
+    def call(batch):
+        raise ValueError('잘못된 요청')
+
+    count, results, failures = run(items('F0101'), call)
+    assert count == 1 and not results
+    assert failures == {'F0101': '잘못된 요청'}
+
+
+def test_abort_is_not_split_and_propagates():
+    calls = []
+
+    def call(batch):
+        calls.append(len(batch))
+        raise QuotaExhausted('exceeded your current quota')
+
+    with pytest.raises(AbortRun):
+        run(items('F0101', 'F0102', 'F0103'), call)
+    assert calls == [3]
+
+
+def test_abort_in_packed_stage_stops_pipeline():
+    calls = []
+
+    def exhausted(batch):
+        raise QuotaExhausted('exceeded your current quota')
+
+    def call(task):
+        calls.append(task.row['items'])
+        return run(task.row['items'], exhausted)
+
+    source = [Task(key=None, row={'items': items(f'F01{n:02d}')}) for n in range(20)]
+    pipeline = Pipeline('packed', source, [Stage('call', call, workers=1)])
+    pipeline.run()
+    assert pipeline.stop_event.is_set()
+    assert len(calls) < len(source)
+
+
+def test_breaker_waits_for_probe_window_then_gives_up():
+    breaker = CircuitBreaker('test', threshold=1, reset_timeout=0.05, max_openings=2)
+    breaker.failure()
+    assert breaker.state == 'open'
+    # 열려 있으면 예외 없이 시험 호출 시각까지 기다림
+    breaker.before()
+    assert breaker.state == 'half_open'
+    with pytest.raises(ProviderDown):
+        breaker.failure()
+    with pytest.raises(ProviderDown):
+        breaker.before()
@@ -0,0 +1,127 @@
+"""idnolab.resilience 오류 분류 / 재시도 / 서킷 브레이커 / 재시도 예산"""
+import threading
+import time
+
+import pytest
+
+from idnolab.pipeline import AbortRun
+from idnolab.resilience import (ABORT, FATAL, RETRYABLE, CircuitBreaker, QuotaExhausted, RetryBudget, RetryPolicy,
+                                classify)
+
+
+class ApiError(Exception):
+    def __init__(self, code, message=''):
+        super().__init__(message or f"{code} error")
+        self.code = code
+
+
+def policy(max_attempts=3, budget=None, threshold=1):
+    result = RetryPolicy('test', max_attempts=max_attempts, base_delay=0, budget=budget or RetryBudget())
+    result.breaker = CircuitBreaker('test', threshold=threshold, reset_timeout=0.05, max_openings=10)
+    return result
+
+
+def failing(error, calls):
+    def func():
+        calls.append(1)
+        raise error
+    return func
+
+
+def test_classify():
+    assert classify(ApiError(429)) == RETRYABLE
+    assert classify(ApiError(503)) == RETRYABLE
+    assert classify(ApiError(400)) == FATAL
+    assert classify(ValueError('잘못된 스키마')) == FATAL
+    assert classify(ApiError(429, 'You exceeded your current quota')) == ABORT
+    assert classify(ApiError(403)) == ABORT
+    assert classify(AbortRun('중단')) == ABORT
+
+
+def test_retryable_error_is_retried_until_success():
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ApiError(503)
+        return 'ok'
+
+    retry = policy(threshold=5)
+    assert retry.call(func) == 'ok'
+    assert len(calls) == 3
+    assert retry.breaker.state == 'closed' and retry.breaker.failures == 0
+
+
+def test_fatal_error_is_not_retried():
+    calls = []
+    with pytest.raises(ValueError):
+        policy().call(failing(ValueError('잘못된 요청'), calls))
+    assert len(calls) == 1
+
+
+def test_abort_error_becomes_quota_exhausted():
+    calls = []
+    with pytest.raises(QuotaExhausted):
+        policy().call(failing(ApiError(429, 'exceeded your current quota'), calls))
+    assert len(calls) == 1
+
+
+def test_retry_budget_limits_retries():
+    budget = RetryBudget(ratio=0, minimum=1)
+    calls = []
+    with pytest.raises(ApiError):
+        policy(max_attempts=5, budget=budget, threshold=100).call(failing(ApiError(503), calls))
+    # 첫 호출 + 예산 1회 재시도
+    assert len(calls) == 2
+    assert not budget.allow()
+
+
+@pytest.mark.parametrize('error, raised', [
+    (ValueError('잘못된 스키마'), ValueError),
+    (ApiError(400), ApiError),
+    (ApiError(429, 'exceeded your current quota'), QuotaExhausted),
+    (AbortRun('중단'), AbortRun),
+])
+def test_probe_is_released_when_it_ends_without_provider_verdict(error, raised):
+    retry = policy(max_attempts=1)
+    retry.breaker.failure()
+    assert retry.breaker.state == 'open'
+    time.sleep(0.06)
+
+    with pytest.raises(raised):
+        retry.call(failing(error, []))
+    assert not retry.breaker._probing
+    assert retry.breaker.state == 'half_open'
+
+    # 다른 작업자가 시험 호출 자리를 얻어 바로 진행함
+    waiter = threading.Thread(target=lambda: retry.call(lambda: 'ok'), daemon=True)
+    waiter.start()
+    waiter.join(timeout=2)
+    assert not waiter.is_alive()
+    assert retry.breaker.state == 'closed'
+
+
+def test_probe_is_released_on_interrupt():
+    retry = policy(max_attempts=1)
+    retry.breaker.failure()
+    time.sleep(0.06)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        retry.call(interrupted)
+    assert not retry.breaker._probing
+
+
+def test_only_the_probe_releases_the_probe_slot():
+    breaker = CircuitBreaker('test', threshold=1, reset_timeout=0.05)
+    assert breaker.before() is False
+    breaker.failure()
+    time.sleep(0.06)
+    assert breaker.before() is True
+    breaker.release_probe()
+    assert breaker.before() is True
+    breaker.success()
+    assert breaker.state == 'closed'
@@ -0,0 +1,19 @@
+"""idnolab.schedule 비용 추정 / 예산"""
+from idnolab.pipeline import Task
+from idnolab.schedule import Scheduler
+
+
+def tasks(count):
+    return [Task(key=f'F01{n:02d}', row={'index': n, 'code_name': '품목', '개념설명': '설명'}) for n in range(count)]
+
+
+def test_cost_uses_prompt_builder_and_output_estimate():
+    task = tasks(1)[0]
+    scheduler = Scheduler([task], prompt=lambda task: '가' * 2000, output_tokens=lambda task: 300)
+    assert scheduler.cost(task) == 1000 + 300
+
+
+def test_budget_stops_on_estimated_prompt_cost():
+    scheduler = Scheduler(tasks(5), budget=3000, order=False, prompt=lambda task: '가' * 2000, output_tokens=0)
+    assert [task.key for task in scheduler] == ['F0100', 'F0101', 'F0102']
+    assert scheduler.spent == 3000
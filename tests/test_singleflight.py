@@ -0,0 +1,97 @@
+"""idnolab.singleflight 진행 중 요청 합치기 / idnolab.cache 응답 캐시"""
+import threading
+import time
+
+from idnolab.cache import ResponseCache
+from idnolab.singleflight import SingleFlight, cached_call, fingerprint
+
+WAITERS = 4
+
+
+def run_concurrently(flight, func):
+    """리더 1명과 대기자 WAITERS명이 같은 키로 do()를 호출하고 결과 목록을 돌려줌"""
+    release = threading.Event()
+    calls = []
+    outcomes = []
+
+    def leader_func():
+        calls.append(1)
+        release.wait(timeout=5)
+        return func()
+
+    def worker():
+        try:
+            outcomes.append(('result', flight.do('key', leader_func)))
+        except Exception as e:
+            outcomes.append(('error', e))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(WAITERS + 1)]
+    threads[0].start()
+    while not calls:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    # 모든 대기자가 진행 중 호출에 붙은 뒤 리더를 끝냄
+    while flight._calls['key'].waiters < WAITERS:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    return calls, outcomes
+
+
+def test_concurrent_callers_share_one_result():
+    flight = SingleFlight('test')
+    calls, outcomes = run_concurrently(flight, lambda: 'ok')
+    assert len(calls) == 1
+    assert sorted(value for _, value in outcomes) == [('ok', False)] + [('ok', True)] * WAITERS
+    assert flight._calls == {}
+
+
+def test_concurrent_callers_share_one_exception():
+    flight = SingleFlight('test')
+    error = ValueError('잘못된 요청')
+
+    def fail():
+        raise error
+
+    calls, outcomes = run_concurrently(flight, fail)
+    assert len(calls) == 1
+    assert outcomes == [('error', error)] * (WAITERS + 1)
+    # 실패한 호출은 남지 않으므로 다음 호출은 다시 실행됨
+    assert flight.do('key', lambda: 'again') == ('again', False)
+
+
+def test_fingerprint_depends_on_options_not_their_order():
+    assert fingerprint('market', '프롬프트', a=1, b=2) == fingerprint('market', '프롬프트', b=2, a=1)
+    assert fingerprint('market', '프롬프트', a=1) != fingerprint('market', '프롬프트', a=2)
+    assert fingerprint('market', '프롬프트') != fingerprint('url', '프롬프트')
+
+
+def test_cache_is_reloaded_from_file(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    cache = ResponseCache(path, name='test')
+    cache.put('a', '{"회사명": "가"}')
+    cache.put('b', '응답')
+    cache.put('c', None)
+    cache.put('a', '새 응답')
+
+    reloaded = ResponseCache(path, name='test')
+    assert len(reloaded) == 2
+    # 같은 키는 나중에 쓴 응답을 사용
+    assert reloaded.get('a') == '새 응답'
+    assert reloaded.get('b') == '응답'
+    assert reloaded.get('c') is None
+
+
+def test_cached_call_skips_request_after_reload(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    calls = []
+
+    def request():
+        calls.append(1)
+        return '응답'
+
+    assert cached_call('key', request, SingleFlight('test'), ResponseCache(path, name='test')) == '응답'
+    assert cached_call('key', request, SingleFlight('test'), ResponseCache(path, name='test')) == '응답'
+    assert len(calls) == 1
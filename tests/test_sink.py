@@ -0,0 +1,42 @@
+"""ExcelRowSink / ExcelPatchWriter 체크포인트 기록 시점"""
+import pandas as pd
+import pytest
+
+from idnolab.patch import ExcelPatchWriter
+from idnolab.pipeline import Checkpoint, ExcelRowSink
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / 'items.xlsx')
+    pd.DataFrame({'Unnamed: 0': ['F0101', 'F0102', 'F0103'], 'code_name': ['가', '나', '가'],
+                  '회사명': [None, None, None]}).to_excel(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('sink_class', [ExcelRowSink, ExcelPatchWriter])
+def test_keys_are_marked_only_after_flush(workbook, tmp_path, sink_class):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.jsonl'))
+    sink = sink_class(workbook, flush_every=2, checkpoint=checkpoint)
+
+    for index, key in enumerate(['F0101', 'F0102', 'F0103']):
+        row = sink.row(index)
+        row['회사명'] = f'기업 {index}'
+        sink.write(index, row)
+        sink.done(key)
+        if index == 0:
+            # 아직 파일에 저장되지 않았으므로 기록하지 않음
+            assert 'F0101' not in checkpoint
+
+    # 두 번째 행에서 저장되면서 그 전에 끝난 작업이 기록됨
+    assert 'F0101' in checkpoint and 'F0103' not in checkpoint
+    sink.close()
+    assert all(key in checkpoint for key in ['F0101', 'F0102', 'F0103'])
+    assert pd.read_excel(workbook)['회사명'].tolist() == ['기업 0', '기업 1', '기업 2']
+    assert len(Checkpoint(checkpoint.path).done) == 3
+
+
+def test_row_sink_find_row(workbook):
+    sink = ExcelRowSink(workbook)
+    assert sink.find_row('가') == 0
+    assert sink.find_row('다') is None
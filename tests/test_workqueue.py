@@ -0,0 +1,76 @@
+"""idnolab.workqueue 임대 만료 / 재임대 / 큐 서버 토큰"""
+import time
+
+import pytest
+import requests
+
+from idnolab.pipeline import Task
+from idnolab.workqueue import RemoteQueue, WorkQueue, serve
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.db'), lease_seconds=0.05, max_attempts=2)
+    queue.add([Task(key='F0101', row={'code_name': '가'}), Task(key='F0102', row={'code_name': '나'})])
+    return queue
+
+
+def test_expired_lease_is_leased_again(queue):
+    first = queue.lease('a', limit=1)
+    assert [item['key'] for item in first] == ['F0101']
+    assert [item['key'] for item in queue.lease('b', limit=1)] == ['F0102']
+    assert queue.lease('b', limit=1) == []
+
+    time.sleep(0.1)
+    again = queue.lease('b', limit=1)
+    assert again[0]['key'] == 'F0101' and again[0]['attempts'] == 2
+    # 만료된 임대는 heartbeat로 되살릴 수 없음
+    assert queue.heartbeat('a', ['F0101']) == []
+
+
+def test_lease_expiring_past_max_attempts_is_failed(queue):
+    for _ in range(2):
+        queue.lease('a', limit=2)
+        time.sleep(0.1)
+    assert queue.lease('a', limit=2) == []
+    assert queue.stats()['failed'] == 2
+    assert queue.reset_failed() == 2
+    assert queue.stats()['pending'] == 2
+
+
+def test_complete_keeps_first_result(queue):
+    queue.lease('a', limit=1)
+    time.sleep(0.1)
+    queue.lease('b', limit=1)
+    assert queue.complete('b', 'F0101', {'value': 'b'})
+    assert not queue.complete('a', 'F0101', {'value': 'a'})
+    assert [item['result'] for item in queue.results()] == [{'value': 'b'}]
+    queue.mark_merged(['F0101'])
+    assert queue.results() == []
+    assert queue.stats()['done'] == 1 and queue.stats()['merged'] == 1
+
+
+def test_fail_requeues_until_max_attempts(queue):
+    queue.lease('a', limit=1)
+    queue.fail('a', 'F0101', '오류')
+    assert queue.stats()['pending'] == 2
+    queue.lease('a', limit=1)
+    queue.fail('a', 'F0101', '오류')
+    assert queue.stats()['failed'] == 1
+
+
+def test_server_requires_token(queue, monkeypatch):
+    monkeypatch.delenv('IDNOLAB_QUEUE_TOKEN', raising=False)
+    with pytest.raises(ValueError):
+        serve(queue, 0, host='0.0.0.0')
+
+    server = serve(queue, 0, token='secret')
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        assert requests.post(f"{url}/stats", json={}, timeout=5).status_code == 401
+        assert RemoteQueue(url, token='secret').stats()['pending'] == 2
+        with pytest.raises(requests.HTTPError):
+            RemoteQueue(url, token='other').stats()
+    finally:
+        server.shutdown()
+        server.server_close()